@@ -39,6 +39,11 @@ DEFAULT_SETTINGS = {
     'speech_hotkey_key': 't',
     'max_translation_length': '1000',
     'auto_add_to_vocabulary': 'False',
+    'dictionary_cache_size': '1024',  # 辞書検索のLRUキャッシュ件数（0で無効）
+    'translation_cache_ttl_days': '30',  # 翻訳キャッシュの有効期間（日、0で無期限）
+    'translation_cache_max_entries': '5000',  # 翻訳キャッシュの最大件数（0で無制限）
+    'use_translation_memory': 'True',  # 履歴のあいまい一致で翻訳する
+    'translation_memory_threshold': '0.95',  # 履歴の訳文をそのまま使う類似度の下限（0〜1）
     # 家庭教師モード設定
     'tutor_enabled': 'True',
     'tutor_model': 'sonnet',
@@ -327,6 +332,8 @@ MESSAGES = {
         'no_text_selected': 'テキストが選択されていません',
         'all_text_selected': 'すべてのテキストを選択しました',
         'text_cleared': 'テキストをクリアしました',
+        'dict_import_progress': '辞書をインポート中: {source} ({current}/{total})',
+        'dict_import_complete': '辞書のインポートが完了しました ({words}語)',
         'font_size': 'フォントサイズ:',
         'script_running': 'スクリプトが実行中です...',
         'input_label': '【入力】',
@@ -339,7 +346,9 @@ MESSAGES = {
         'dict_meaning_label': '【意味】',
         'dict_only_for_words': '辞書検索は単語のみ対応しています。通常の翻訳ホットキーをご使用ください。',
         'claude_lookup_complete': 'Claude検索完了',
+        'claude_ttft': '（最初の応答まで {ttft:.2f}秒 / 合計 {total:.2f}秒）',
         'text_too_long': '文字数制限（{max_length}文字）を超えています。翻訳を中止しました。',
+        'text_split_translation': '長いテキストを{segments}文に分けて翻訳します（{requests}回のリクエスト）',
         'claude_api_error': 'APIが機能していないため辞書検索に失敗しました。',
         'cache_used': '[キャッシュから]',
         'ui_language_label': 'UI言語:',
@@ -463,6 +472,8 @@ DeepL API とClaude APIを使用して、
         'no_text_selected': 'No text selected',
         'all_text_selected': 'All text selected',
         'text_cleared': 'Text cleared',
+        'dict_import_progress': 'Importing dictionary: {source} ({current}/{total})',
+        'dict_import_complete': 'Dictionary import complete ({words} words)',
         'font_size': 'Font size:',
         'script_running': 'Script is running...',
         'input_label': '【Input】',
@@ -475,7 +486,9 @@ DeepL API とClaude APIを使用して、
         'dict_meaning_label': '【Meaning】',
         'dict_only_for_words': 'Dictionary lookup is only for single words. Please use the normal translation hotkey.',
         'claude_lookup_complete': 'Claude lookup complete',
+        'claude_ttft': '(first token {ttft:.2f}s / total {total:.2f}s)',
         'text_too_long': 'Character limit ({max_length}) exceeded. Translation aborted.',
+        'text_split_translation': 'Long text: translating {segments} sentences in {requests} request(s)',
         'claude_api_error': 'Dictionary lookup failed because the API is not functioning.',
         'cache_used': '[From cache]',
         'ui_language_label': 'UI Language:',
@@ -599,6 +612,8 @@ Also includes text-to-speech feature.''',
         'no_text_selected': '未选择文本',
         'all_text_selected': '已选择全部文本',
         'text_cleared': '文本已清除',
+        'dict_import_progress': '正在导入词典: {source} ({current}/{total})',
+        'dict_import_complete': '词典导入完成 ({words}词)',
         'font_size': '字体大小:',
         'script_running': '脚本运行中...',
         'input_label': '【输入】',
@@ -611,7 +626,9 @@ Also includes text-to-speech feature.''',
         'dict_meaning_label': '【释义】',
         'dict_only_for_words': '词典查询仅支持单词。请使用普通翻译热键。',
         'claude_lookup_complete': 'Claude查询完成',
+        'claude_ttft': '（首个响应 {ttft:.2f}秒 / 共 {total:.2f}秒）',
         'text_too_long': '超出字符限制（{max_length}字符）。翻译已中止。',
+        'text_split_translation': '长文本：分为{segments}句，分{requests}次请求翻译',
         'claude_api_error': 'API无法正常工作，词典查询失败。',
         'cache_used': '[来自缓存]',
         'ui_language_label': '界面语言:',
@@ -735,6 +752,8 @@ Version {version}
         'no_text_selected': '선택된 텍스트 없음',
         'all_text_selected': '모든 텍스트 선택됨',
         'text_cleared': '텍스트 삭제됨',
+        'dict_import_progress': '사전 가져오는 중: {source} ({current}/{total})',
+        'dict_import_complete': '사전 가져오기 완료 ({words}단어)',
         'font_size': '글꼴 크기:',
         'script_running': '스크립트 실행 중...',
         'input_label': '【입력】',
@@ -747,7 +766,9 @@ Version {version}
         'dict_meaning_label': '【의미】',
         'dict_only_for_words': '사전 검색은 단어만 지원합니다. 일반 번역 단축키를 사용하세요.',
         'claude_lookup_complete': 'Claude 검색 완료',
+        'claude_ttft': '(첫 응답 {ttft:.2f}초 / 전체 {total:.2f}초)',
         'text_too_long': '문자 제한({max_length}자) 초과. 번역이 중단되었습니다.',
+        'text_split_translation': '긴 텍스트를 {segments}문장으로 나누어 번역합니다 ({requests}회 요청)',
         'claude_api_error': 'API가 작동하지 않아 사전 검색에 실패했습니다.',
         'cache_used': '[캐시에서]',
         'ui_language_label': 'UI 언어:',
@@ -871,6 +892,8 @@ DeepL API와 Claude API를 사용하여
         'no_text_selected': 'Ningún texto seleccionado',
         'all_text_selected': 'Todo el texto seleccionado',
         'text_cleared': 'Texto borrado',
+        'dict_import_progress': 'Importando diccionario: {source} ({current}/{total})',
+        'dict_import_complete': 'Importación del diccionario completada ({words} palabras)',
         'font_size': 'Tamaño de fuente:',
         'script_running': 'Script en ejecución...',
         'input_label': '【Entrada】',
@@ -883,7 +906,9 @@ DeepL API와 Claude API를 사용하여
         'dict_meaning_label': '【Significado】',
         'dict_only_for_words': 'La búsqueda solo funciona con palabras individuales.',
         'claude_lookup_complete': 'Búsqueda Claude completa',
+        'claude_ttft': '(primer token {ttft:.2f}s / total {total:.2f}s)',
         'text_too_long': 'Límite de caracteres ({max_length}) excedido.',
+        'text_split_translation': 'Texto largo: traduciendo {segments} frases en {requests} solicitud(es)',
         'claude_api_error': 'La búsqueda falló porque la API no funciona.',
         'cache_used': '[Desde caché]',
         'ui_language_label': 'Idioma de la interfaz:',
@@ -1007,6 +1032,8 @@ También incluye función de texto a voz.''',
         'no_text_selected': 'Aucun texte sélectionné',
         'all_text_selected': 'Tout le texte sélectionné',
         'text_cleared': 'Texte effacé',
+        'dict_import_progress': 'Importation du dictionnaire : {source} ({current}/{total})',
+        'dict_import_complete': 'Importation du dictionnaire terminée ({words} mots)',
         'font_size': 'Taille de police:',
         'script_running': 'Script en cours...',
         'input_label': '【Entrée】',
@@ -1019,7 +1046,9 @@ También incluye función de texto a voz.''',
         'dict_meaning_label': '【Signification】',
         'dict_only_for_words': 'La recherche ne fonctionne que pour les mots individuels.',
         'claude_lookup_complete': 'Recherche Claude terminée',
+        'claude_ttft': '(premier jeton {ttft:.2f}s / total {total:.2f}s)',
         'text_too_long': 'Limite de caractères ({max_length}) dépassée.',
+        'text_split_translation': 'Texte long : traduction de {segments} phrases en {requests} requête(s)',
         'claude_api_error': 'Échec car l\'API ne fonctionne pas.',
         'cache_used': '[Depuis le cache]',
         'ui_language_label': 'Langue de l\'interface:',
@@ -1143,6 +1172,8 @@ Inclut également la synthèse vocale.''',
         'no_text_selected': 'Kein Text ausgewählt',
         'all_text_selected': 'Gesamter Text ausgewählt',
         'text_cleared': 'Text gelöscht',
+        'dict_import_progress': 'Wörterbuch wird importiert: {source} ({current}/{total})',
+        'dict_import_complete': 'Wörterbuch-Import abgeschlossen ({words} Wörter)',
         'font_size': 'Schriftgröße:',
         'script_running': 'Skript läuft...',
         'input_label': '【Eingabe】',
@@ -1155,7 +1186,9 @@ Inclut également la synthèse vocale.''',
         'dict_meaning_label': '【Bedeutung】',
         'dict_only_for_words': 'Die Suche funktioniert nur für einzelne Wörter.',
         'claude_lookup_complete': 'Claude-Suche abgeschlossen',
+        'claude_ttft': '(erstes Token {ttft:.2f}s / gesamt {total:.2f}s)',
         'text_too_long': 'Zeichenlimit ({max_length}) überschritten.',
+        'text_split_translation': 'Langer Text: {segments} Sätze werden in {requests} Anfrage(n) übersetzt',
         'claude_api_error': 'Suche fehlgeschlagen, da die API nicht funktioniert.',
         'cache_used': '[Aus Cache]',
         'ui_language_label': 'Oberflächensprache:',
@@ -1279,6 +1312,8 @@ Enthält auch Sprachausgabe-Funktion.''',
         'no_text_selected': 'Nenhum texto selecionado',
         'all_text_selected': 'Todo o texto selecionado',
         'text_cleared': 'Texto apagado',
+        'dict_import_progress': 'Importando dicionário: {source} ({current}/{total})',
+        'dict_import_complete': 'Importação do dicionário concluída ({words} palavras)',
         'font_size': 'Tamanho da fonte:',
         'script_running': 'Script em execução...',
         'input_label': '【Entrada】',
@@ -1291,7 +1326,9 @@ Enthält auch Sprachausgabe-Funktion.''',
         'dict_meaning_label': '【Significado】',
         'dict_only_for_words': 'A pesquisa funciona apenas para palavras individuais.',
         'claude_lookup_complete': 'Pesquisa Claude concluída',
+        'claude_ttft': '(primeiro token {ttft:.2f}s / total {total:.2f}s)',
         'text_too_long': 'Limite de caracteres ({max_length}) excedido.',
+        'text_split_translation': 'Texto longo: traduzindo {segments} frases em {requests} solicitação(ões)',
         'claude_api_error': 'Pesquisa falhou porque a API não está funcionando.',
         'cache_used': '[Do cache]',
         'ui_language_label': 'Idioma da interface:',
@@ -1415,6 +1452,8 @@ Também inclui função de texto em voz.''',
         'no_text_selected': 'Текст не выбран',
         'all_text_selected': 'Весь текст выбран',
         'text_cleared': 'Текст удалён',
+        'dict_import_progress': 'Импорт словаря: {source} ({current}/{total})',
+        'dict_import_complete': 'Импорт словаря завершён ({words} слов)',
         'font_size': 'Размер шрифта:',
         'script_running': 'Скрипт выполняется...',
         'input_label': '【Ввод】',
@@ -1427,7 +1466,9 @@ Também inclui função de texto em voz.''',
         'dict_meaning_label': '【Значение】',
         'dict_only_for_words': 'Поиск работает только для отдельных слов.',
         'claude_lookup_complete': 'Поиск Claude завершён',
+        'claude_ttft': '(первый токен {ttft:.2f}с / всего {total:.2f}с)',
         'text_too_long': 'Превышен лимит символов ({max_length}).',
+        'text_split_translation': 'Длинный текст: перевод {segments} предложений за {requests} запрос(а)',
         'claude_api_error': 'Поиск не удался, API не работает.',
         'cache_used': '[Из кэша]',
         'ui_language_label': 'Язык интерфейса:',
@@ -1,5 +1,6 @@
 # ClipboardTranslator v1.00 - Core Module
-from .translation import translate_with_deepl, translate_with_google, query_claude_api
+from .translation import translate_with_deepl, translate_with_deepl_batch, translate_with_google, query_claude_api
+from .segmentation import split_sentences, translate_segmented
 from .dictionary import (
     check_dictionary,
     load_ngsl_dictionary,
@@ -8,11 +9,15 @@ from .dictionary import (
     load_dictionary_cache,
     get_dictionary_size,
     init_dictionaries,
+    needs_dictionary_import,
+    start_background_import,
     close_dictionary
 )
 from .language_detection import detect_language, is_single_word
 from .text_to_speech import TextToSpeechHandler
 from .history import TranslationHistory
+from .translation_cache import TranslationCache
+from .translation_memory import TranslationMemory
 from .network import is_connected
 
 # SQLite辞書モジュール
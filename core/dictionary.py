@@ -2,6 +2,8 @@
 import os
 import pickle
 import csv
+import shutil
+import threading
 
 # 辞書データのグローバル変数（レガシー互換用）
 COMMON_JA_WORDS = {}
@@ -13,14 +15,25 @@ EJDICT_DICTIONARY = {}
 USE_SQLITE = False
 _db_initialized = False
 
+# 初回インポートのチェックポイント（dictionary_meta のキー: 'running' / 'done'）
+INITIAL_IMPORT_KEY = 'initial_import'
+_import_thread = None
 
-def init_dictionaries(data_dir, use_sqlite=True):
+# 配布用の辞書DB（python -m core.dictionary_build で生成）
+PREBUILT_DB_NAME = 'dictionary_base.db'
+_input_hash_cache = {}
+# 入力ファイルのハッシュのメモ（dictionary_meta のキー接頭辞。値は "サイズ 更新時刻(ns) ハッシュ"）
+INPUT_HASH_KEY_PREFIX = 'input_hash:'
+
+
+def init_dictionaries(data_dir, use_sqlite=True, defer_import=False):
     """
     辞書データを初期化
 
     Parameters:
     data_dir (str): データディレクトリのパス
     use_sqlite (bool): SQLiteモードを使用するか
+    defer_import (bool): 初回インポートを行わずに戻る（start_background_importで後から実行）
     """
     global COMMON_JA_WORDS, COMMON_EN_WORDS, NGSL_DICTIONARY, USE_SQLITE, _db_initialized
 
@@ -30,15 +43,20 @@ def init_dictionaries(data_dir, use_sqlite=True):
         # SQLiteモード
         try:
             from . import dictionary_db as db
+            _copy_prebuilt_database(data_dir)
             if db.init_database(data_dir):
                 _db_initialized = True
-
-                # 既存データがなければインポート
-                stats = db.get_dictionary_stats()
-                if stats['total'] == 0:
-                    print("初回起動: 辞書データをSQLiteにインポートします...")
-                    _import_all_dictionaries(data_dir)
+                _apply_prebuilt_database(data_dir)
+
+                # 未完了のインポートがあれば実行（前回中断した場合は続きから）
+                if needs_dictionary_import(data_dir):
+                    if defer_import:
+                        print("初回起動: 辞書データはバックグラウンドでインポートします")
+                    else:
+                        print("初回起動: 辞書データをSQLiteにインポートします...")
+                        _import_all_dictionaries(data_dir)
                 else:
+                    stats = db.get_dictionary_stats()
                     print(f"SQLite辞書を読み込みました: {stats['total']}単語")
                     for src in stats['sources']:
                         print(f"  - {src['name']}: {src['word_count']}単語")
@@ -52,10 +70,7 @@ def init_dictionaries(data_dir, use_sqlite=True):
     dict_data_path = os.path.join(data_dir, 'dictionary_data.py')
     if os.path.exists(dict_data_path):
         try:
-            import importlib.util
-            spec = importlib.util.spec_from_file_location("dictionary_data", dict_data_path)
-            dict_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(dict_module)
+            dict_module = _load_dictionary_data_module(dict_data_path)
             COMMON_JA_WORDS = dict_module.COMMON_JA_WORDS
             COMMON_EN_WORDS = {v: k for k, v in COMMON_JA_WORDS.items()}
             print(f"辞書データを読み込みました: {len(COMMON_JA_WORDS)}単語")
@@ -66,53 +81,300 @@ def init_dictionaries(data_dir, use_sqlite=True):
         _init_basic_dictionary()
 
 
-def _import_all_dictionaries(data_dir):
-    """全辞書データをSQLiteにインポート"""
+def _load_dictionary_data_module(dict_data_path):
+    """dictionary_data.py をモジュールとして読み込む"""
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("dictionary_data", dict_data_path)
+    dict_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dict_module)
+    return dict_module
+
+
+def _build_import_plan(data_dir):
+    """
+    インポート対象のソースを優先順に並べる
+    （カスタム辞書 → NGSL → ejdict。先に終わったソースから検索に使える）
+
+    Returns:
+    list: (ソース名, 入力ファイルパス, インポート関数(progress_callback)) のリスト
+    """
     from . import dictionary_db as db
 
-    total = 0
+    plan = []
 
     # 1. カスタム辞書 (dictionary_data.py)
     dict_data_path = os.path.join(data_dir, 'dictionary_data.py')
     if os.path.exists(dict_data_path):
-        try:
-            import importlib.util
-            spec = importlib.util.spec_from_file_location("dictionary_data", dict_data_path)
-            dict_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(dict_module)
-            if hasattr(dict_module, 'COMMON_JA_WORDS'):
-                count = db.import_from_dict(
-                    dict_module.COMMON_JA_WORDS,
-                    source="custom_ja",
-                    description="カスタム日本語→英語辞書",
-                    priority=100
-                )
-                total += count
-                # 逆引きもインポート
-                en_words = {v: k for k, v in dict_module.COMMON_JA_WORDS.items()}
-                count = db.import_from_dict(
-                    en_words,
-                    source="custom_en",
-                    description="カスタム英語→日本語辞書",
-                    priority=100
-                )
-                total += count
-        except Exception as e:
-            print(f"カスタム辞書インポートエラー: {e}")
+        def load_custom_words():
+            dict_module = _load_dictionary_data_module(dict_data_path)
+            return getattr(dict_module, 'COMMON_JA_WORDS', {})
+
+        plan.append(('custom_ja', dict_data_path, lambda callback: db.import_from_dict(
+            load_custom_words(),
+            source="custom_ja",
+            description="カスタム日本語→英語辞書",
+            priority=100,
+            progress_callback=callback,
+            replace=True
+        )))
+        # 逆引きもインポート
+        plan.append(('custom_en', dict_data_path, lambda callback: db.import_from_dict(
+            {v: k for k, v in load_custom_words().items()},
+            source="custom_en",
+            description="カスタム英語→日本語辞書",
+            priority=100,
+            progress_callback=callback,
+            replace=True
+        )))
 
     # 2. NGSL辞書
     ngsl_path = os.path.join(data_dir, 'ngsl-1.2-ja.csv')
     if os.path.exists(ngsl_path):
-        count = db.import_from_csv_ngsl(ngsl_path, source="ngsl", priority=50)
-        total += count
+        plan.append(('ngsl', ngsl_path, lambda callback: db.import_from_csv_ngsl(
+            ngsl_path, source="ngsl", priority=50, progress_callback=callback
+        )))
 
     # 3. ejdict
     ejdict_path = os.path.join(data_dir, 'ejdict-hand-utf8.txt')
     if os.path.exists(ejdict_path):
-        count = db.import_from_ejdict(ejdict_path, source="ejdict", priority=40)
+        plan.append(('ejdict', ejdict_path, lambda callback: db.import_from_ejdict(
+            ejdict_path, source="ejdict", priority=40, progress_callback=callback
+        )))
+
+    return plan
+
+
+def _input_hash(file_path):
+    """
+    入力ファイルのハッシュ
+
+    サイズと更新時刻が同じ間は再計算しない（プロセス内のキャッシュと、
+    DBの dictionary_meta に保存したメモを使う。起動のたびに全体を読まない）
+    """
+    from . import dictionary_db as db
+
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_size, stat.st_mtime_ns)
+    if key in _input_hash_cache:
+        return _input_hash_cache[key]
+
+    use_meta = USE_SQLITE and _db_initialized
+    meta_key = INPUT_HASH_KEY_PREFIX + os.path.basename(file_path)
+    memo = db.get_meta(meta_key) if use_meta else None
+    parts = memo.split(' ') if memo else []
+    if len(parts) == 3 and parts[:2] == [str(stat.st_size), str(stat.st_mtime_ns)]:
+        content_hash = parts[2]
+    else:
+        content_hash = db.compute_file_hash(file_path)
+        if use_meta:
+            db.set_meta(meta_key, f"{stat.st_size} {stat.st_mtime_ns} {content_hash}")
+    _input_hash_cache[key] = content_hash
+    return content_hash
+
+
+def _find_stale_sources(plan):
+    """
+    入力ファイルのハッシュとDBに記録されたハッシュが異なるソースを返す
+    （初回インポート完了後にユーザーが削除したソースは対象外）
+    """
+    from . import dictionary_db as db
+
+    state = db.get_meta(INITIAL_IMPORT_KEY)
+    stale = []
+    for source, input_path, _ in plan:
+        info = db.get_source_info(source)
+        if info is None and state == 'done':
+            continue
+        if (not info or not info['word_count'] or
+                info.get('content_hash') != _input_hash(input_path)):
+            stale.append(source)
+    return stale
+
+
+def _copy_prebuilt_database(data_dir):
+    """
+    DBファイルがまだない場合、配布用DBをそのままコピーする
+
+    Returns:
+    bool: コピーした場合True
+    """
+    from . import dictionary_db as db
+
+    db_path = db.get_db_path(data_dir)
+    prebuilt_path = os.path.join(data_dir, PREBUILT_DB_NAME)
+    if os.path.exists(db_path) or not os.path.exists(prebuilt_path):
+        return False
+    if not db.read_prebuilt_sources(prebuilt_path):
+        return False
+
+    try:
+        shutil.copyfile(prebuilt_path, db_path)
+        print(f"配布用辞書DBをコピーしました: {prebuilt_path}")
+        return True
+    except OSError as e:
+        print(f"配布用辞書DBのコピーに失敗しました: {e}")
+        return False
+
+
+def _apply_prebuilt_database(data_dir):
+    """
+    配布用DBから、ユーザーDBと内容が異なる辞書ソースを取り込む
+    （手元の入力ファイルが配布用DBと異なるソースは入力から再構築する）
+    """
+    from . import dictionary_db as db
+
+    prebuilt_path = os.path.join(data_dir, PREBUILT_DB_NAME)
+    if not os.path.exists(prebuilt_path):
+        return
+
+    prebuilt = db.read_prebuilt_sources(prebuilt_path)
+    if not prebuilt:
+        return
+
+    input_hashes = {source: _input_hash(path) for source, path, _ in _build_import_plan(data_dir)}
+    state = db.get_meta(INITIAL_IMPORT_KEY)
+
+    targets = []
+    for source, info in prebuilt.items():
+        if source in input_hashes and input_hashes[source] != info['content_hash']:
+            continue
+        current = db.get_source_info(source)
+        if current is None and state == 'done':
+            continue
+        if current and current['word_count'] and current.get('content_hash') == info['content_hash']:
+            continue
+        targets.append(source)
+
+    try:
+        db.copy_sources_from_prebuilt(prebuilt_path, targets)
+    except Exception as e:
+        print(f"配布用辞書DBの取り込みに失敗しました: {e}")
+
+
+def needs_dictionary_import(data_dir):
+    """
+    辞書のインポートが必要か判定
+    （初回起動、中断されたインポートの再開、入力ファイルの変更）
+
+    Returns:
+    bool: インポートが必要な場合True
+    """
+    if not (USE_SQLITE and _db_initialized):
+        return False
+
+    from . import dictionary_db as db
+
+    # 旧バージョンで作成済みのDB（チェックポイントなし）は初回インポート済みとみなす
+    if db.get_meta(INITIAL_IMPORT_KEY) is None and db.get_dictionary_stats()['total'] > 0:
+        db.set_meta(INITIAL_IMPORT_KEY, 'done')
+
+    return bool(_find_stale_sources(_build_import_plan(data_dir)))
+
+
+def _notify_progress(on_progress, source, current, total, state, rows=0):
+    """インポート進捗をコールバックに通知"""
+    if on_progress:
+        try:
+            on_progress({
+                'source': source,
+                'current': current,
+                'total': total,
+                'state': state,
+                'rows': rows
+            })
+        except Exception as e:
+            print(f"インポート進捗通知エラー: {e}")
+
+
+def _import_all_dictionaries(data_dir, on_progress=None):
+    """
+    全辞書データをSQLiteにインポート
+
+    ソースごとに1トランザクションで取り込み、入力ハッシュが一致する
+    （完了済みの）ソースはスキップするため、途中で終了しても次回は続きから再開できる。
+
+    Parameters:
+    data_dir (str): データディレクトリのパス
+    on_progress (callable): 進捗コールバック(event)
+        event: {'source', 'current', 'total', 'state', 'rows'}
+        state: 'started' / 'progress' / 'done' / 'skipped'
+
+    Returns:
+    int: インポートした単語数
+    """
+    from . import dictionary_db as db
+
+    plan = _build_import_plan(data_dir)
+    stale = set(_find_stale_sources(plan))
+    if db.get_meta(INITIAL_IMPORT_KEY) != 'done':
+        db.set_meta(INITIAL_IMPORT_KEY, 'running')
+
+    total = 0
+    failed = False
+    for current, (source, input_path, importer) in enumerate(plan, 1):
+        if source not in stale:
+            print(f"[{source}] インポート済みのためスキップします")
+            _notify_progress(on_progress, source, current, len(plan), 'skipped')
+            continue
+
+        _notify_progress(on_progress, source, current, len(plan), 'started')
+        try:
+            count = importer(
+                lambda rows, s=source, c=current: _notify_progress(
+                    on_progress, s, c, len(plan), 'progress', rows)
+            )
+        except Exception as e:
+            print(f"[{source}] インポートエラー: {e}")
+            count = 0
+        if db.is_source_imported(source):
+            db.set_source_hash(source, _input_hash(input_path))
+        else:
+            failed = True
         total += count
+        _notify_progress(on_progress, source, current, len(plan), 'done', count)
+
+    if not failed:
+        db.set_meta(INITIAL_IMPORT_KEY, 'done')
 
     print(f"合計 {total} 単語をインポートしました")
+    return total
+
+
+def start_background_import(data_dir, on_progress=None, on_complete=None):
+    """
+    辞書のインポートをバックグラウンドスレッドで開始する
+
+    Parameters:
+    data_dir (str): データディレクトリのパス
+    on_progress (callable): 進捗コールバック(event)（ワーカースレッドから呼ばれる）
+    on_complete (callable): 完了コールバック(インポートした単語数)
+
+    Returns:
+    threading.Thread: インポートスレッド
+    """
+    global _import_thread
+
+    if _import_thread is not None and _import_thread.is_alive():
+        return _import_thread
+
+    def worker():
+        total = 0
+        try:
+            # 書き込みは dictionary_db の書き込み接続で直列化される
+            total = _import_all_dictionaries(data_dir, on_progress)
+        except Exception as e:
+            print(f"バックグラウンドインポートエラー: {e}")
+        if on_complete:
+            on_complete(total)
+
+    _import_thread = threading.Thread(target=worker, name="dictionary-import", daemon=True)
+    _import_thread.start()
+    return _import_thread
+
+
+def is_import_running():
+    """バックグラウンドインポートが実行中か"""
+    return _import_thread is not None and _import_thread.is_alive()
 
 
 def _init_basic_dictionary():
@@ -0,0 +1,111 @@
+# ClipboardTranslator v1.00 - Prebuilt Dictionary Builder
+"""
+配布用の辞書データベース（data/dictionary_base.db）を生成するビルドコマンド
+
+ngsl-1.2-ja.csv / ejdict-hand-utf8.txt / dictionary_data.py から
+インデックス作成・VACUUM済みの読み取り専用DBを作成する。
+各ソースの入力ハッシュを dictionary_sources.content_hash に記録し、
+起動時は init_dictionaries がハッシュを比較して必要なソースだけを取り込む。
+
+使い方:
+    python -m core.dictionary_build [--data-dir DIR] [--output PATH]
+"""
+import os
+import sys
+import stat
+import time
+import argparse
+import hashlib
+from datetime import datetime
+
+# 親ディレクトリをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import dictionary_db as db
+from core.dictionary import PREBUILT_DB_NAME, _build_import_plan, _input_hash
+
+
+def _remove_file(path):
+    """読み取り専用属性を外してファイルを削除"""
+    if os.path.exists(path):
+        os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+        os.remove(path)
+
+
+def build_prebuilt_database(data_dir, output_path=None):
+    """
+    配布用の辞書データベースを生成する
+
+    Parameters:
+    data_dir (str): 入力ファイルのあるデータディレクトリ
+    output_path (str): 出力先（Noneの場合は data_dir/dictionary_base.db）
+
+    Returns:
+    dict or None: ビルド結果 {path, words, inputs_hash, seconds}、入力がない場合はNone
+    """
+    output_path = output_path or os.path.join(data_dir, PREBUILT_DB_NAME)
+    plan = _build_import_plan(data_dir)
+    if not plan:
+        print(f"辞書の入力ファイルが見つかりません: {data_dir}")
+        return None
+
+    start = time.perf_counter()
+    temp_path = output_path + '.tmp'
+    _remove_file(temp_path)
+
+    inputs_digest = hashlib.sha256()
+    total = 0
+    with db.dedicated_connection(temp_path) as conn:
+        db.create_schema(conn)
+        conn.commit()
+
+        for source, input_path, importer in plan:
+            content_hash = _input_hash(input_path)
+            total += importer(None)
+            db.set_source_hash(source, content_hash)
+            inputs_digest.update(f"{source}:{content_hash}\n".encode('utf-8'))
+
+        inputs_hash = inputs_digest.hexdigest()
+        db.set_meta('prebuilt_format_version', str(db.PREBUILT_FORMAT_VERSION))
+        db.set_meta('prebuilt_inputs_hash', inputs_hash)
+        db.set_meta('prebuilt_built_at', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+        conn.execute(f'PRAGMA user_version = {db.PREBUILT_FORMAT_VERSION}')
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.execute('VACUUM')
+
+    _remove_file(output_path)
+    os.replace(temp_path, output_path)
+    # 配布物は読み取り専用（アプリはATTACHまたはコピーして使用する）
+    os.chmod(output_path, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"配布用辞書DBを作成しました: {output_path}")
+    print(f"  {total}単語, {size_mb:.1f}MB, {elapsed:.2f}秒, inputs={inputs_hash[:12]}")
+
+    return {
+        'path': output_path,
+        'words': total,
+        'inputs_hash': inputs_hash,
+        'seconds': elapsed
+    }
+
+
+def main(argv=None):
+    """コマンドラインのエントリーポイント"""
+    default_data_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'
+    )
+
+    parser = argparse.ArgumentParser(description="配布用の辞書データベースを生成します")
+    parser.add_argument('--data-dir', default=default_data_dir, help="入力ファイルのあるディレクトリ")
+    parser.add_argument('--output', default=None, help=f"出力先（既定: DATA_DIR/{PREBUILT_DB_NAME}）")
+    args = parser.parse_args(argv)
+
+    result = build_prebuilt_database(args.data_dir, args.output)
+    return 0 if result else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
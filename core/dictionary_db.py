@@ -1,12 +1,77 @@
 # ClipboardTranslator v1.00 - SQLite Dictionary Module
 import os
+import json
 import sqlite3
 import csv
-from typing import Optional, Dict, List, Tuple
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Tuple, Iterable, Iterator, Callable
 
 # データベースファイルパス
 DB_PATH = None
-_connection = None
+
+# 接続管理
+# - 読み取り: スレッドごとの専用接続（WALにより書き込み中も待たずに読める）
+# - 書き込み: 単一の書き込み接続を _write_lock で直列化
+BUSY_TIMEOUT_SEC = 30
+_writer_connection: Optional[sqlite3.Connection] = None
+_write_lock = threading.RLock()
+_pool_lock = threading.Lock()
+_read_connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+_pool_generation = 0  # init/close のたびに増加（古いスレッドローカル接続を検出）
+_pool_stats = {
+    'journal_mode': None,
+    'readers_opened': 0,
+    'readers_closed': 0,
+    'writes': 0,
+    'write_wait_total': 0.0,
+    'write_wait_max': 0.0,
+    'write_hold_max': 0.0,
+}
+
+# スレッドローカル（読み取り接続、dedicated_connection の接続）
+_thread_local = threading.local()
+
+# 一括インポート設定
+BULK_BATCH_SIZE = 5000
+BULK_CACHE_SIZE_KB = -65536  # 負の値はKiB単位（約64MB）
+_BULK_INSERT_SQL = 'INSERT INTO dictionary (word, meaning, source, priority) VALUES (?, ?, ?, ?)'
+
+# 配布用DB（dictionary_base.db）のフォーマットバージョン（PRAGMA user_version）
+PREBUILT_FORMAT_VERSION = 1
+
+# lookup_word のLRUキャッシュ（正規化した単語 → (意味, ソース)、未登録語は (None, None)）
+LOOKUP_CACHE_SIZE = 1024
+_lookup_cache: "OrderedDict[str, Tuple[Optional[str], Optional[str]]]" = OrderedDict()
+_lookup_cache_lock = threading.Lock()
+_lookup_cache_stats = {'hits': 0, 'misses': 0}
+_lookup_cache_generation = 0  # 無効化のたびに増加（検索中の無効化で古い結果を保存しないため）
+
+# 翻訳履歴のキー（原文・ソース言語・タイプの64bitハッシュ）のマイグレーション設定
+HISTORY_KEY_MIGRATION_BATCH = 2000
+HISTORY_TYPES = ('normal', 'dictionary', 'speech', 'memory')  # memory: 翻訳メモリで返した訳文
+
+# 履歴のページサイズ（get_history_page / iter_history）
+HISTORY_PAGE_SIZE = 200
+# 読み取りの取り消しを確認する間隔（SQLite仮想マシンの命令数）
+PROGRESS_HANDLER_STEPS = 1000
+
+# 履歴の全文検索（FTS5 trigram）。create_schema で利用可否を判定し、使えない場合は LIKE で検索する
+HISTORY_FTS_MIN_QUERY = 3  # trigram はこれより短い検索語に使えない
+HISTORY_SNIPPET_TOKENS = 16
+HISTORY_HIGHLIGHT = ('[', ']')
+# 変更フィード（history_changes）に保持する件数。これより古い版からは差分を取れない
+HISTORY_CHANGES_RETENTION = 10000
+# トークンキャッシュ（token_cache）の最大件数
+TOKEN_CACHE_MAX_ENTRIES = 200000
+HISTORY_RECENT_SCAN_ROWS = 2000  # get_history_page で全文検索の前に LIKE で調べる直近の行数
+_history_fts_available = False
+
+# 直近の一括インポート計測結果 {source: {rows, words, seconds, rows_per_sec}}
+_import_stats: Dict[str, Dict] = {}
 
 
 def get_db_path(data_dir: str) -> str:
@@ -14,89 +79,470 @@ def get_db_path(data_dir: str) -> str:
     return os.path.join(data_dir, "dictionary.db")
 
 
+def _open_connection(db_path: str) -> sqlite3.Connection:
+    """接続を開いて共通の設定を行う"""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SEC, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
+
+
+def _close_pool() -> None:
+    """書き込み接続とすべての読み取り接続を閉じる"""
+    global _writer_connection, _pool_generation
+    with _write_lock:
+        if _writer_connection is not None:
+            _writer_connection.close()
+            _writer_connection = None
+    with _pool_lock:
+        _pool_generation += 1
+        for _, conn in _read_connections.values():
+            conn.close()
+            _pool_stats['readers_closed'] += 1
+        _read_connections.clear()
+
+
+def _prune_read_connections() -> None:
+    """終了したスレッドの読み取り接続を閉じる（_pool_lock 内で呼ぶ）"""
+    for ident, (thread, conn) in list(_read_connections.items()):
+        if not thread.is_alive():
+            conn.close()
+            del _read_connections[ident]
+            _pool_stats['readers_closed'] += 1
+
+
 def get_connection() -> sqlite3.Connection:
-    """データベース接続を取得（シングルトン）"""
-    global _connection
-    if _connection is None:
+    """
+    現在のスレッドの読み取り用接続を取得する
+
+    スレッドごとに接続を持つため、ワーカースレッドやTkスレッドが
+    同じ接続を共有することはない。書き込みは write_transaction() を使用する。
+    """
+    dedicated = getattr(_thread_local, 'connection', None)
+    if dedicated is not None:
+        return dedicated
+    if DB_PATH is None:
+        raise RuntimeError("Database not initialized. Call init_database() first.")
+
+    conn = getattr(_thread_local, 'read_connection', None)
+    if conn is not None and getattr(_thread_local, 'read_generation', None) == _pool_generation:
+        return conn
+
+    conn = _open_connection(DB_PATH)
+    thread = threading.current_thread()
+    with _pool_lock:
+        _prune_read_connections()
+        _read_connections[thread.ident] = (thread, conn)
+        _pool_stats['readers_opened'] += 1
+        _thread_local.read_generation = _pool_generation
+    _thread_local.read_connection = conn
+    return conn
+
+
+def _get_writer_connection() -> sqlite3.Connection:
+    """書き込み接続を取得（_write_lock 内で呼ぶ）"""
+    global _writer_connection
+    if _writer_connection is None:
         if DB_PATH is None:
             raise RuntimeError("Database not initialized. Call init_database() first.")
-        _connection = sqlite3.connect(DB_PATH, check_same_thread=False)
-        _connection.row_factory = sqlite3.Row
-    return _connection
+        conn = _open_connection(DB_PATH)
+        _pool_stats['journal_mode'] = conn.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+        _writer_connection = conn
+    return _writer_connection
 
 
-def init_database(data_dir: str) -> bool:
+@contextmanager
+def writer_connection():
     """
-    データベースを初期化する
+    書き込み接続を排他的に取得する（トランザクションは開始しない）
+    ATTACH などトランザクション外で実行する処理に使用する
+    """
+    dedicated = getattr(_thread_local, 'connection', None)
+    if dedicated is not None:
+        yield dedicated
+        return
+
+    requested = time.perf_counter()
+    with _write_lock:
+        outermost = not getattr(_thread_local, 'holds_writer', False)
+        acquired = time.perf_counter()
+        _thread_local.holds_writer = True
+        try:
+            yield _get_writer_connection()
+        finally:
+            if outermost:
+                _thread_local.holds_writer = False
+                waited = acquired - requested
+                _pool_stats['writes'] += 1
+                _pool_stats['write_wait_total'] += waited
+                _pool_stats['write_wait_max'] = max(_pool_stats['write_wait_max'], waited)
+                _pool_stats['write_hold_max'] = max(
+                    _pool_stats['write_hold_max'], time.perf_counter() - acquired
+                )
+
+
+@contextmanager
+def write_transaction():
+    """
+    書き込み接続でトランザクションを実行する（with文で使用）
+    正常終了でコミット、例外でロールバック。入れ子の場合は外側のトランザクションに含まれる。
+    """
+    with writer_connection() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN')
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def get_pool_stats() -> Dict:
+    """
+    接続プールの統計を取得する
+
+    Returns:
+    dict: {db_path, journal_mode, open_readers, readers_opened, readers_closed,
+           writes, write_wait_avg_ms, write_wait_max_ms, write_hold_max_ms}
+    """
+    with _pool_lock:
+        open_readers = sum(1 for thread, _ in _read_connections.values() if thread.is_alive())
+        stats = dict(_pool_stats)
+    writes = stats['writes']
+    return {
+        'db_path': DB_PATH,
+        'journal_mode': stats['journal_mode'],
+        'open_readers': open_readers,
+        'readers_opened': stats['readers_opened'],
+        'readers_closed': stats['readers_closed'],
+        'writes': writes,
+        'write_wait_avg_ms': stats['write_wait_total'] / writes * 1000 if writes else 0.0,
+        'write_wait_max_ms': stats['write_wait_max'] * 1000,
+        'write_hold_max_ms': stats['write_hold_max'] * 1000,
+    }
+
+
+@contextmanager
+def dedicated_connection(db_path: Optional[str] = None):
+    """
+    現在のスレッド専用の接続を開く（with文で使用）
+
+    ブロック内の get_connection() と write_transaction() はこの接続を使うため、
+    別のDBファイル（配布用DBのビルドなど）をプールと混ぜずに操作できる。
 
     Parameters:
-    data_dir (str): データディレクトリのパス
+    db_path (str): 接続先のDBパス（Noneの場合は DB_PATH）
+    """
+    db_path = db_path or DB_PATH
+    if db_path is None:
+        raise RuntimeError("Database not initialized. Call init_database() first.")
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SEC)
+    conn.row_factory = sqlite3.Row
+    _thread_local.connection = conn
+    try:
+        yield conn
+    finally:
+        _thread_local.connection = None
+        conn.close()
 
-    Returns:
-    bool: 初期化が成功したかどうか
+
+class QueryCancelled(Exception):
+    """cancellable_reads で読み取りが取り消された"""
+
+
+@contextmanager
+def cancellable_reads(cancel_event: threading.Event):
     """
-    global DB_PATH, _connection
+    現在のスレッドの読み取りを取り消し可能にする（with文で使用）
+
+    読み取り接続に progress handler を設定し、cancel_event がセットされると
+    実行中のクエリを中断する。中断されたクエリは QueryCancelled を送出する。
 
+    Parameters:
+    cancel_event (threading.Event): 取り消し要求
+    """
+    conn = get_connection()
+    conn.set_progress_handler(lambda: 1 if cancel_event.is_set() else 0, PROGRESS_HANDLER_STEPS)
     try:
-        DB_PATH = get_db_path(data_dir)
+        yield conn
+    finally:
+        conn.set_progress_handler(None, PROGRESS_HANDLER_STEPS)
 
-        # 既存の接続を閉じる
-        if _connection is not None:
-            _connection.close()
-            _connection = None
 
-        conn = get_connection()
-        cursor = conn.cursor()
+def _is_interrupted(error: Exception) -> bool:
+    return isinstance(error, sqlite3.OperationalError) and 'interrupted' in str(error)
 
-        # 辞書テーブルを作成
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dictionary (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                word TEXT NOT NULL,
-                meaning TEXT NOT NULL,
-                source TEXT NOT NULL,
-                priority INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
 
-        # インデックスを作成
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_word ON dictionary(word)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source ON dictionary(source)')
-        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_word_source ON dictionary(word, source)')
+def create_schema(conn: sqlite3.Connection) -> None:
+    """テーブルとインデックスを作成（既存DBのマイグレーションを含む）"""
+    cursor = conn.cursor()
 
-        # メタデータテーブルを作成（辞書ソースの管理用）
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dictionary_sources (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                description TEXT,
-                word_count INTEGER DEFAULT 0,
-                priority INTEGER DEFAULT 0,
-                enabled INTEGER DEFAULT 1,
-                imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+    # 辞書テーブルを作成
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dictionary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT NOT NULL,
+            meaning TEXT NOT NULL,
+            source TEXT NOT NULL,
+            priority INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # インデックスを作成
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_word ON dictionary(word)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_source ON dictionary(source)')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_word_source ON dictionary(word, source)')
+
+    # 単語ごとに有効な意味（最優先の1件）を保持する実体化テーブル
+    resolved_exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resolved_dictionary'"
+    ).fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resolved_dictionary (
+            word TEXT PRIMARY KEY,
+            meaning TEXT NOT NULL,
+            source TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+    # メタデータテーブルを作成（辞書ソースの管理用）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dictionary_sources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            description TEXT,
+            word_count INTEGER DEFAULT 0,
+            priority INTEGER DEFAULT 0,
+            enabled INTEGER DEFAULT 1,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
 
-        # 翻訳履歴テーブルを作成
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS translation_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                original_text TEXT NOT NULL,
-                translated_text TEXT NOT NULL,
-                source_lang TEXT NOT NULL,
-                target_lang TEXT NOT NULL,
-                translation_type TEXT DEFAULT 'normal',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    # メタデータ（キー・バリュー）テーブル
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dictionary_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+    # 翻訳履歴テーブルを作成
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS translation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_text TEXT NOT NULL,
+            translated_text TEXT NOT NULL,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            translation_type TEXT DEFAULT 'normal',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            entry_key INTEGER
+        )
+    ''')
+
+    # 履歴用インデックス
+    # キーセットページネーション（created_at, id の降順シーク）用の複合インデックス
+    cursor.execute('DROP INDEX IF EXISTS idx_history_type')
+    cursor.execute('DROP INDEX IF EXISTS idx_history_created')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_history_created_id ON translation_history(created_at, id)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_history_type_created '
+        'ON translation_history(translation_type, created_at, id)'
+    )
+
+    # 翻訳キャッシュテーブル（表示用の履歴とは独立。キーは原文・言語・プロバイダー・プロンプト版のハッシュ）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS translation_cache (
+            cache_key INTEGER PRIMARY KEY,
+            original_text TEXT NOT NULL,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            prompt_version TEXT NOT NULL DEFAULT '',
+            translated_text TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_hit_at REAL NOT NULL,
+            hit_count INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_translation_cache_last_hit ON translation_cache(last_hit_at)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_translation_cache_created ON translation_cache(created_at)'
+    )
+
+    # 翻訳履歴の変更フィード（追加・更新・削除をトリガーで記録。seq が履歴のバージョン）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS history_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            history_id INTEGER NOT NULL,
+            op TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_history_changes_insert AFTER INSERT ON translation_history BEGIN
+            INSERT INTO history_changes (history_id, op) VALUES (new.id, 'upsert');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_history_changes_update
+        AFTER UPDATE OF original_text, translated_text, translation_type, created_at
+        ON translation_history BEGIN
+            INSERT INTO history_changes (history_id, op) VALUES (new.id, 'upsert');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_history_changes_delete AFTER DELETE ON translation_history BEGIN
+            INSERT INTO history_changes (history_id, op) VALUES (old.id, 'delete');
+        END
+    ''')
+
+    # トークン化結果のキャッシュ（テキストのハッシュとトークナイザーの版がキー）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS token_cache (
+            text_hash INTEGER NOT NULL,
+            tokenizer TEXT NOT NULL,
+            tokens TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (text_hash, tokenizer)
+        ) WITHOUT ROWID
+    ''')
+
+    # 家庭教師モードの履歴検索（BM25）の転置インデックス
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_index_documents (
+            history_id INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL,
+            length INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_index_postings (
+            term TEXT NOT NULL,
+            history_id INTEGER NOT NULL,
+            tf INTEGER NOT NULL,
+            PRIMARY KEY (term, history_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # entry_key 列の追加（既存DBは migrate_history_keys で値を埋めてから一意インデックスを作成）
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(translation_history)')}
+    if 'entry_key' not in columns:
+        cursor.execute('ALTER TABLE translation_history ADD COLUMN entry_key INTEGER')
+    elif cursor.execute(
+            'SELECT 1 FROM translation_history WHERE entry_key IS NULL LIMIT 1').fetchone() is None:
+        cursor.execute('DROP INDEX IF EXISTS idx_history_original')
+        cursor.execute(
+            'CREATE UNIQUE INDEX IF NOT EXISTS idx_history_entry_key ON translation_history(entry_key)'
+        )
+
+    # content_hash 列の追加（入力ファイルのハッシュ。配布用DBとの差分判定に使用）
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(dictionary_sources)')}
+    if 'content_hash' not in columns:
+        cursor.execute('ALTER TABLE dictionary_sources ADD COLUMN content_hash TEXT')
+
+    # 既存DBのマイグレーション: 実体化テーブルを初回作成時に構築
+    if not resolved_exists:
+        rebuild_resolved_dictionary(conn)
+
+    _create_history_fts(conn)
+
+
+_HISTORY_FTS_TRIGGERS = {
+    'trg_history_fts_insert': '''
+        CREATE TRIGGER trg_history_fts_insert AFTER INSERT ON translation_history BEGIN
+            INSERT INTO translation_history_fts(rowid, original_text, translated_text)
+            VALUES (new.id, new.original_text, new.translated_text);
+        END
+    ''',
+    'trg_history_fts_delete': '''
+        CREATE TRIGGER trg_history_fts_delete AFTER DELETE ON translation_history BEGIN
+            INSERT INTO translation_history_fts(translation_history_fts, rowid, original_text, translated_text)
+            VALUES ('delete', old.id, old.original_text, old.translated_text);
+        END
+    ''',
+    'trg_history_fts_update': '''
+        CREATE TRIGGER trg_history_fts_update
+        AFTER UPDATE OF original_text, translated_text ON translation_history BEGIN
+            INSERT INTO translation_history_fts(translation_history_fts, rowid, original_text, translated_text)
+            VALUES ('delete', old.id, old.original_text, old.translated_text);
+            INSERT INTO translation_history_fts(rowid, original_text, translated_text)
+            VALUES (new.id, new.original_text, new.translated_text);
+        END
+    ''',
+}
+
+
+def _create_history_fts(conn: sqlite3.Connection) -> None:
+    """
+    履歴の全文検索インデックス（FTS5 trigram、外部コンテンツ）とトリガーを作成する
+
+    FTS5 または trigram トークナイザーがないSQLiteではトリガーを削除して
+    LIKE 検索にフォールバックする（トリガーが残っていると履歴の書き込みが失敗するため）。
+    トリガーを作り直したとき（初回・フォールバック後）はインデックスを再構築する。
+    """
+    global _history_fts_available
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS translation_history_fts USING fts5(
+                original_text, translated_text,
+                content='translation_history', content_rowid='id', tokenize='trigram'
             )
         ''')
+        conn.execute('SELECT rowid FROM translation_history_fts LIMIT 0').fetchall()
+    except sqlite3.OperationalError as e:
+        for name in _HISTORY_FTS_TRIGGERS:
+            conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        print(f"履歴の全文検索は使用できません（LIKE検索を使用）: {e}")
+        _history_fts_available = False
+        return
+
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'translation_history'")}
+    if not set(_HISTORY_FTS_TRIGGERS) <= existing:
+        for name, sql in _HISTORY_FTS_TRIGGERS.items():
+            conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+            conn.execute(sql)
+        conn.execute("INSERT INTO translation_history_fts(translation_history_fts) VALUES ('rebuild')")
+    _history_fts_available = True
+
+
+def history_fts_available() -> bool:
+    """履歴の全文検索（FTS5 trigram）が使用可能か"""
+    return _history_fts_available
+
+
+def init_database(data_dir: str) -> bool:
+    """
+    データベースを初期化する
+
+    Parameters:
+    data_dir (str): データディレクトリのパス
+
+    Returns:
+    bool: 初期化が成功したかどうか
+    """
+    global DB_PATH
 
-        # 履歴用インデックス
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_original ON translation_history(original_text)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_type ON translation_history(translation_type)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_created ON translation_history(created_at DESC)')
+    try:
+        # 既存の接続を閉じる
+        _close_pool()
+        clear_lookup_cache()
+        DB_PATH = get_db_path(data_dir)
+
+        with write_transaction() as conn:
+            create_schema(conn)
+        migrate_history_keys()
+        prune_history_changes()
+        prune_token_cache()
 
-        conn.commit()
         print(f"データベースを初期化しました: {DB_PATH}")
         return True
 
@@ -106,11 +552,9 @@ def init_database(data_dir: str) -> bool:
 
 
 def close_database():
-    """データベース接続を閉じる"""
-    global _connection
-    if _connection is not None:
-        _connection.close()
-        _connection = None
+    """データベース接続（書き込み接続とすべての読み取り接続）を閉じる"""
+    _close_pool()
+    clear_lookup_cache()
 
 
 def get_source_info(source_name: str) -> Optional[Dict]:
@@ -132,79 +576,406 @@ def get_source_info(source_name: str) -> Optional[Dict]:
 
 
 def register_source(name: str, description: str = "", priority: int = 0) -> bool:
-    """辞書ソースを登録"""
+    """辞書ソースを登録（優先度・有効状態が変わった場合のみ resolved_dictionary を再構築）"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO dictionary_sources (name, description, priority)
-            VALUES (?, ?, ?)
-        ''', (name, description, priority))
-        conn.commit()
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            previous = cursor.execute(
+                'SELECT priority, enabled FROM dictionary_sources WHERE name = ?', (name,)
+            ).fetchone()
+            cursor.execute('''
+                INSERT OR REPLACE INTO dictionary_sources (name, description, priority)
+                VALUES (?, ?, ?)
+            ''', (name, description, priority))
+            if previous is None:
+                # 新しいソース: 既に単語がある場合のみ解決結果が変わる
+                changed = cursor.execute(
+                    'SELECT 1 FROM dictionary WHERE source = ? LIMIT 1', (name,)
+                ).fetchone() is not None
+            else:
+                changed = previous['priority'] != priority or not previous['enabled']
+            if changed:
+                rebuild_resolved_dictionary(conn)
+        if changed:
+            clear_lookup_cache()
         return True
     except Exception as e:
         print(f"ソース登録エラー: {e}")
         return False
 
 
-def update_source_count(source_name: str, count: int) -> bool:
-    """辞書ソースの単語数を更新"""
+def is_source_imported(source_name: str) -> bool:
+    """辞書ソースのインポートが完了しているか（単語数はインポートと同一トランザクションで更新）"""
     try:
         conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE dictionary_sources SET word_count = ? WHERE name = ?',
-            (count, source_name)
-        )
-        conn.commit()
+        row = conn.execute(
+            'SELECT word_count FROM dictionary_sources WHERE name = ?',
+            (source_name,)
+        ).fetchone()
+        return bool(row and row['word_count'] > 0)
+    except Exception as e:
+        print(f"ソース情報取得エラー: {e}")
+        return False
+
+
+def get_meta(key: str, default: Optional[str] = None) -> Optional[str]:
+    """メタデータの値を取得"""
+    try:
+        conn = get_connection()
+        row = conn.execute('SELECT value FROM dictionary_meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else default
+    except Exception as e:
+        print(f"メタデータ取得エラー: {e}")
+        return default
+
+
+def set_meta(key: str, value: str) -> bool:
+    """メタデータの値を設定"""
+    try:
+        with write_transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO dictionary_meta (key, value) VALUES (?, ?)',
+                (key, value)
+            )
+        return True
+    except Exception as e:
+        print(f"メタデータ設定エラー: {e}")
+        return False
+
+
+def compute_file_hash(file_path: str) -> str:
+    """入力ファイルのハッシュ（フォーマットバージョンを含むSHA-256）を計算"""
+    digest = hashlib.sha256(f"v{PREBUILT_FORMAT_VERSION}:".encode('ascii'))
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def set_source_hash(source_name: str, content_hash: str) -> bool:
+    """辞書ソースの入力ハッシュを記録"""
+    try:
+        with write_transaction() as conn:
+            conn.execute(
+                'UPDATE dictionary_sources SET content_hash = ? WHERE name = ?',
+                (content_hash, source_name)
+            )
         return True
     except Exception as e:
         print(f"ソース更新エラー: {e}")
         return False
 
 
-def import_dictionary_data(words: Dict[str, str], source: str, priority: int = 0) -> int:
+def read_prebuilt_sources(prebuilt_path: str) -> Dict[str, Dict]:
     """
-    辞書データをインポートする
+    配布用DBに含まれる辞書ソースの情報を取得
+
+    Returns:
+    dict: {ソース名: {description, word_count, priority, content_hash}}
+          フォーマットバージョンが一致しない場合は空
+    """
+    try:
+        conn = sqlite3.connect(f"file:{prebuilt_path}?mode=ro", uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != PREBUILT_FORMAT_VERSION:
+                print(f"配布用辞書DBのバージョンが一致しません: {version}")
+                return {}
+            rows = conn.execute('''
+                SELECT name, description, word_count, priority, content_hash
+                FROM dictionary_sources
+            ''').fetchall()
+            return {row['name']: dict(row) for row in rows}
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"配布用辞書DB読み込みエラー: {e}")
+        return {}
 
-    Parameters:
-    words (dict): {単語: 意味} の辞書
-    source (str): 辞書ソース名 (例: 'custom', 'ngsl', 'ejdict')
-    priority (int): 優先度（高いほど優先）
+
+def copy_sources_from_prebuilt(prebuilt_path: str, sources: List[str]) -> int:
+    """
+    配布用DBをATTACHし、指定ソースの単語を1トランザクションでコピーする
+    （ユーザーが設定した有効/無効は保持）
 
     Returns:
-    int: インポートした単語数
+    int: コピーした単語数
+    """
+    if not sources:
+        return 0
+
+    start = time.perf_counter()
+    copied = 0
+    # ATTACH はトランザクション外で行う必要があるため書き込み接続を先に確保する
+    with writer_connection() as conn:
+        conn.execute('ATTACH DATABASE ? AS prebuilt', (prebuilt_path,))
+        try:
+            with write_transaction() as conn:
+                for source in sources:
+                    conn.execute('DELETE FROM dictionary WHERE source = ?', (source,))
+                    cursor = conn.execute('''
+                        INSERT INTO dictionary (word, meaning, source, priority)
+                        SELECT word, meaning, source, priority FROM prebuilt.dictionary
+                        WHERE source = ?
+                    ''', (source,))
+                    copied += cursor.rowcount
+                    conn.execute('''
+                        INSERT INTO dictionary_sources (name, description, word_count, priority, content_hash)
+                        SELECT name, description, word_count, priority, content_hash
+                        FROM prebuilt.dictionary_sources WHERE name = ?
+                        ON CONFLICT(name) DO UPDATE SET
+                            description = excluded.description,
+                            word_count = excluded.word_count,
+                            priority = excluded.priority,
+                            content_hash = excluded.content_hash,
+                            imported_at = CURRENT_TIMESTAMP
+                    ''', (source,))
+                rebuild_resolved_dictionary(conn)
+        finally:
+            conn.execute('DETACH DATABASE prebuilt')
+            clear_lookup_cache()
+
+    elapsed = time.perf_counter() - start
+    print(f"配布用辞書DBから{copied}件の単語をコピーしました "
+          f"({', '.join(sources)}, {elapsed * 1000:.0f}ms)")
+    return copied
+
+
+# ========== 実体化テーブル（resolved_dictionary） ==========
+
+# 単語ごとの最優先の意味（lookup_word と同じ優先順位）
+_RESOLVE_SELECT_SQL = '''
+    SELECT word, meaning, source FROM (
+        SELECT d.word, d.meaning, d.source,
+               ROW_NUMBER() OVER (
+                   PARTITION BY d.word ORDER BY d.priority DESC, s.priority DESC
+               ) AS rank
+        FROM dictionary d
+        JOIN dictionary_sources s ON d.source = s.name
+        WHERE s.enabled = 1{condition}
+    ) WHERE rank = 1
+'''
+
+
+def rebuild_resolved_dictionary(conn: Optional[sqlite3.Connection] = None) -> int:
+    """
+    resolved_dictionary を全件再構築する（ソースの切り替え・削除・インポート時）
+    conn を渡した場合は呼び出し側のトランザクション内で実行する
+
+    Returns:
+    int: 有効な単語数
     """
+    if conn is None:
+        with write_transaction() as conn:
+            return rebuild_resolved_dictionary(conn)
+    conn.execute('DELETE FROM resolved_dictionary')
+    conn.execute(
+        'INSERT INTO resolved_dictionary (word, meaning, source) ' +
+        _RESOLVE_SELECT_SQL.format(condition='')
+    )
+    return conn.execute('SELECT COUNT(*) FROM resolved_dictionary').fetchone()[0]
+
+
+def _resolve_word(conn: sqlite3.Connection, word: str) -> None:
+    """1単語分の resolved_dictionary を更新する（単語の追加・削除時）"""
+    conn.execute('DELETE FROM resolved_dictionary WHERE word = ?', (word,))
+    conn.execute(
+        'INSERT INTO resolved_dictionary (word, meaning, source) ' +
+        _RESOLVE_SELECT_SQL.format(condition=' AND d.word = ?'),
+        (word,)
+    )
+
+
+def update_source_count(source_name: str, count: int) -> bool:
+    """辞書ソースの単語数を更新"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'UPDATE dictionary_sources SET word_count = ? WHERE name = ?',
+                (count, source_name)
+            )
+        return True
+    except Exception as e:
+        print(f"ソース更新エラー: {e}")
+        return False
 
-        count = 0
-        for word, meaning in words.items():
-            try:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO dictionary (word, meaning, source, priority)
-                    VALUES (?, ?, ?, ?)
-                ''', (word.lower().strip(), meaning.strip(), source, priority))
-                count += 1
-            except Exception as e:
-                print(f"単語インポートエラー ({word}): {e}")
+
+def _normalize_rows(rows: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+    """(単語, 意味) を正規化し、空の行を除外する"""
+    for word, meaning in rows:
+        if not word or not meaning:
+            continue
+        word = word.lower().strip()
+        meaning = meaning.strip()
+        if word and meaning:
+            yield word, meaning
+
+
+def iter_ngsl_csv(file_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    NGSL形式のCSVファイルを1行ずつ読み込む（ジェネレータ）
+    フォーマット: entry,meaning
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if 'entry' in row and 'meaning' in row:
+                yield row['entry'] or '', row['meaning'] or ''
+
+
+def iter_ejdict(file_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    ejdict-hand形式のテキストファイルを1行ずつ読み込む（ジェネレータ）
+    フォーマット: word\tmeaning
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or '\t' not in line:
                 continue
+            parts = line.split('\t', 1)
+            if len(parts) == 2:
+                yield parts[0], parts[1]
 
-        conn.commit()
 
-        # ソース情報を更新
-        update_source_count(source, count)
+def _set_bulk_pragmas(conn: sqlite3.Connection) -> Dict[str, object]:
+    """一括インポート用にPRAGMAを調整し、元の値を返す"""
+    previous = {}
+    for name in ('synchronous', 'cache_size', 'temp_store'):
+        previous[name] = conn.execute(f'PRAGMA {name}').fetchone()[0]
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute(f'PRAGMA cache_size = {BULK_CACHE_SIZE_KB}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return previous
 
-        print(f"[{source}] {count}件の単語をインポートしました")
-        return count
 
+def _restore_pragmas(conn: sqlite3.Connection, previous: Dict[str, object]) -> None:
+    """一括インポート前のPRAGMAに戻す"""
+    for name, value in previous.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def bulk_import(rows: Iterable[Tuple[str, str]], source: str, priority: int = 0,
+                batch_size: int = BULK_BATCH_SIZE,
+                progress_callback: Optional[Callable[[int], None]] = None,
+                replace: bool = False) -> int:
+    """
+    辞書データを単一トランザクションで一括インポートする
+
+    - 入力はイテラブルから逐次読み込み（全件をメモリに展開しない）
+    - executemany でバッチ挿入
+    - idx_word / idx_word_source はロード後に再作成
+    - 既存データとはマージ（同じ単語は上書き、重複語は後勝ち）。
+      replace=True なら同じソースの既存データを置き換える（ファイル全体の再インポート用）
+
+    Parameters:
+    rows (iterable): (単語, 意味) のイテラブル
+    source (str): 辞書ソース名
+    priority (int): 優先度（高いほど優先）
+    batch_size (int): executemany 1回あたりの行数
+    progress_callback (callable): バッチ挿入ごとに呼ばれる (挿入済み行数)
+    replace (bool): 同じソースの既存データを削除してからインポートする
+
+    Returns:
+    int: インポートした単語数
+    """
+    start = time.perf_counter()
+    inserted = 0
+
+    with writer_connection() as conn:
+        # PRAGMA synchronous はトランザクション外で変更する
+        previous = _set_bulk_pragmas(conn)
+        try:
+            with write_transaction() as conn:
+                conn.execute('DROP INDEX IF EXISTS idx_word')
+                conn.execute('DROP INDEX IF EXISTS idx_word_source')
+                if replace:
+                    conn.execute('DELETE FROM dictionary WHERE source = ?', (source,))
+                # この id より後の行が今回インポートした単語
+                last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM dictionary').fetchone()[0]
+
+                batch = []
+                for word, meaning in _normalize_rows(rows):
+                    batch.append((word, meaning, source, priority))
+                    if len(batch) >= batch_size:
+                        conn.executemany(_BULK_INSERT_SQL, batch)
+                        inserted += len(batch)
+                        batch = []
+                        if progress_callback:
+                            progress_callback(inserted)
+                if batch:
+                    conn.executemany(_BULK_INSERT_SQL, batch)
+                    inserted += len(batch)
+
+                # 重複語は最後に出現したものを残す（INSERT OR REPLACE と同じ結果）
+                conn.execute('''
+                    DELETE FROM dictionary
+                    WHERE source = ? AND id NOT IN (
+                        SELECT MAX(id) FROM dictionary WHERE source = ? GROUP BY word
+                    )
+                ''', (source, source))
+
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_word ON dictionary(word)')
+                conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_word_source ON dictionary(word, source)')
+
+                count = conn.execute(
+                    'SELECT COUNT(*) FROM dictionary WHERE source = ? AND id > ?', (source, last_id)
+                ).fetchone()[0]
+                conn.execute(
+                    'UPDATE dictionary_sources SET word_count = '
+                    '(SELECT COUNT(*) FROM dictionary WHERE source = ?) WHERE name = ?',
+                    (source, source)
+                )
+                rebuild_resolved_dictionary(conn)
+        finally:
+            _restore_pragmas(conn, previous)
+            clear_lookup_cache()
+
+    elapsed = time.perf_counter() - start
+    rows_per_sec = inserted / elapsed if elapsed > 0 else 0.0
+    _import_stats[source] = {
+        'rows': inserted,
+        'words': count,
+        'seconds': elapsed,
+        'rows_per_sec': rows_per_sec,
+    }
+    print(f"[{source}] {count}件の単語をインポートしました "
+          f"({elapsed:.2f}秒, {rows_per_sec:,.0f} rows/sec)")
+    return count
+
+
+def get_import_stats() -> Dict[str, Dict]:
+    """直近の一括インポートの計測結果を取得（ソース名 → 統計）"""
+    return {name: dict(stats) for name, stats in _import_stats.items()}
+
+
+def import_dictionary_data(words: Dict[str, str], source: str, priority: int = 0,
+                           progress_callback: Optional[Callable[[int], None]] = None,
+                           replace: bool = False) -> int:
+    """
+    辞書データをインポートする（既定では既存データにマージ）
+
+    Parameters:
+    words (dict): {単語: 意味} の辞書
+    source (str): 辞書ソース名 (例: 'custom', 'ngsl', 'ejdict')
+    priority (int): 優先度（高いほど優先）
+    replace (bool): 同じソースの既存データを置き換える
+
+    Returns:
+    int: インポートした単語数
+    """
+    try:
+        return bulk_import(words.items(), source, priority,
+                           progress_callback=progress_callback, replace=replace)
     except Exception as e:
         print(f"辞書インポートエラー: {e}")
         return 0
 
 
-def import_from_csv_ngsl(file_path: str, source: str = "ngsl", priority: int = 50) -> int:
+def import_from_csv_ngsl(file_path: str, source: str = "ngsl", priority: int = 50,
+                         progress_callback: Optional[Callable[[int], None]] = None) -> int:
     """
     NGSL形式のCSVファイルからインポート
     フォーマット: entry,meaning
@@ -217,24 +988,16 @@ def import_from_csv_ngsl(file_path: str, source: str = "ngsl", priority: int = 5
         # ソースを登録
         register_source(source, "NGSL (New General Service List)", priority)
 
-        words = {}
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if 'entry' in row and 'meaning' in row:
-                    word = row['entry'].strip().lower()
-                    meaning = row['meaning'].strip()
-                    if word and meaning:
-                        words[word] = meaning
-
-        return import_dictionary_data(words, source, priority)
+        return bulk_import(iter_ngsl_csv(file_path), source, priority,
+                           progress_callback=progress_callback, replace=True)
 
     except Exception as e:
         print(f"NGSL CSVインポートエラー: {e}")
         return 0
 
 
-def import_from_ejdict(file_path: str, source: str = "ejdict", priority: int = 40) -> int:
+def import_from_ejdict(file_path: str, source: str = "ejdict", priority: int = 40,
+                       progress_callback: Optional[Callable[[int], None]] = None) -> int:
     """
     ejdict-hand形式のテキストファイルからインポート
     フォーマット: word\tmeaning
@@ -247,20 +1010,8 @@ def import_from_ejdict(file_path: str, source: str = "ejdict", priority: int = 4
         # ソースを登録
         register_source(source, "ejdict-hand (パブリックドメイン英和辞書)", priority)
 
-        words = {}
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line or '\t' not in line:
-                    continue
-                parts = line.split('\t', 1)
-                if len(parts) == 2:
-                    word = parts[0].strip().lower()
-                    meaning = parts[1].strip()
-                    if word and meaning:
-                        words[word] = meaning
-
-        return import_dictionary_data(words, source, priority)
+        return bulk_import(iter_ejdict(file_path), source, priority,
+                           progress_callback=progress_callback, replace=True)
 
     except Exception as e:
         print(f"ejdictインポートエラー: {e}")
@@ -268,45 +1019,134 @@ def import_from_ejdict(file_path: str, source: str = "ejdict", priority: int = 4
 
 
 def import_from_dict(words: Dict[str, str], source: str = "custom",
-                     description: str = "カスタム辞書", priority: int = 100) -> int:
+                     description: str = "カスタム辞書", priority: int = 100,
+                     progress_callback: Optional[Callable[[int], None]] = None,
+                     replace: bool = False) -> int:
     """
-    Pythonの辞書からインポート
+    Pythonの辞書からインポート（replace=True で同じソースの既存データを置き換える）
     """
     try:
         register_source(source, description, priority)
-        return import_dictionary_data(words, source, priority)
+        return import_dictionary_data(words, source, priority, progress_callback, replace)
     except Exception as e:
         print(f"辞書インポートエラー: {e}")
         return 0
 
 
+# ========== 検索キャッシュ ==========
+
+def _normalize_word(word: str) -> str:
+    """辞書のキーとして使う正規化済みの単語"""
+    return word.lower().strip()
+
+
+def set_lookup_cache_size(size: int) -> None:
+    """
+    lookup_word のキャッシュサイズを設定する（0でキャッシュ無効）
+    """
+    global LOOKUP_CACHE_SIZE
+    with _lookup_cache_lock:
+        LOOKUP_CACHE_SIZE = max(0, int(size))
+        while len(_lookup_cache) > LOOKUP_CACHE_SIZE:
+            _lookup_cache.popitem(last=False)
+
+
+def clear_lookup_cache() -> None:
+    """lookup_word のキャッシュを全て破棄する"""
+    global _lookup_cache_generation
+    with _lookup_cache_lock:
+        _lookup_cache_generation += 1
+        _lookup_cache.clear()
+
+
+def _invalidate_lookup_word(word: str) -> None:
+    """指定した単語のキャッシュを破棄する"""
+    global _lookup_cache_generation
+    with _lookup_cache_lock:
+        _lookup_cache_generation += 1
+        _lookup_cache.pop(_normalize_word(word), None)
+
+
+def _invalidate_lookup_source(source_name: str) -> None:
+    """
+    指定ソースの意味を返しているキャッシュだけを破棄する
+    （ソースの無効化・削除では他のエントリや未登録語の結果は変わらない）
+    """
+    global _lookup_cache_generation
+    with _lookup_cache_lock:
+        _lookup_cache_generation += 1
+        stale = [key for key, (_, source) in _lookup_cache.items() if source == source_name]
+        for key in stale:
+            del _lookup_cache[key]
+
+
+def get_lookup_cache_stats() -> Dict:
+    """lookup_word のキャッシュ統計 {size, max_size, hits, misses, hit_rate}"""
+    with _lookup_cache_lock:
+        hits = _lookup_cache_stats['hits']
+        misses = _lookup_cache_stats['misses']
+        total = hits + misses
+        return {
+            'size': len(_lookup_cache),
+            'max_size': LOOKUP_CACHE_SIZE,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0
+        }
+
+
+def reset_lookup_cache_stats() -> None:
+    """lookup_word のキャッシュ統計をリセットする"""
+    with _lookup_cache_lock:
+        _lookup_cache_stats['hits'] = 0
+        _lookup_cache_stats['misses'] = 0
+
+
 def lookup_word(word: str) -> Optional[str]:
     """
     単語を検索する（優先度の高い順）
 
+    結果（見つからなかった場合も含む）はLRUキャッシュに保持し、
+    単語の追加・削除、ソースの切り替え・削除、インポートで無効化する。
+
     Parameters:
     word (str): 検索する単語
 
     Returns:
     str or None: 意味（見つからない場合はNone）
     """
+    key = _normalize_word(word)
+
+    with _lookup_cache_lock:
+        cached = _lookup_cache.get(key)
+        if cached is not None:
+            _lookup_cache.move_to_end(key)
+            _lookup_cache_stats['hits'] += 1
+            return cached[0]
+        _lookup_cache_stats['misses'] += 1
+        generation = _lookup_cache_generation
+
     try:
         conn = get_connection()
         cursor = conn.cursor()
 
-        # 優先度の高い順に検索
-        cursor.execute('''
-            SELECT d.meaning FROM dictionary d
-            JOIN dictionary_sources s ON d.source = s.name
-            WHERE d.word = ? AND s.enabled = 1
-            ORDER BY d.priority DESC, s.priority DESC
-            LIMIT 1
-        ''', (word.lower().strip(),))
+        # 優先順位は resolved_dictionary に解決済み（主キー1回の検索）
+        cursor.execute(
+            'SELECT meaning, source FROM resolved_dictionary WHERE word = ?',
+            (key,)
+        )
 
         row = cursor.fetchone()
-        if row:
-            return row['meaning']
-        return None
+        entry = (row['meaning'], row['source']) if row else (None, None)
+
+        with _lookup_cache_lock:
+            if LOOKUP_CACHE_SIZE > 0 and generation == _lookup_cache_generation:
+                _lookup_cache[key] = entry
+                _lookup_cache.move_to_end(key)
+                if len(_lookup_cache) > LOOKUP_CACHE_SIZE:
+                    _lookup_cache.popitem(last=False)
+
+        return entry[0]
 
     except Exception as e:
         print(f"単語検索エラー: {e}")
@@ -383,13 +1223,18 @@ def get_dictionary_stats() -> Dict:
 def enable_source(source_name: str, enabled: bool = True) -> bool:
     """辞書ソースの有効/無効を切り替え"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE dictionary_sources SET enabled = ? WHERE name = ?',
-            (1 if enabled else 0, source_name)
-        )
-        conn.commit()
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'UPDATE dictionary_sources SET enabled = ? WHERE name = ?',
+                (1 if enabled else 0, source_name)
+            )
+            rebuild_resolved_dictionary(conn)
+        if enabled:
+            # 有効化したソースがどの単語の結果を変えるかは分からないため全破棄
+            clear_lookup_cache()
+        else:
+            _invalidate_lookup_source(source_name)
         return True
     except Exception as e:
         print(f"ソース切り替えエラー: {e}")
@@ -399,16 +1244,17 @@ def enable_source(source_name: str, enabled: bool = True) -> bool:
 def delete_source(source_name: str) -> bool:
     """辞書ソースとその単語を削除"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with write_transaction() as conn:
+            cursor = conn.cursor()
 
-        # 単語を削除
-        cursor.execute('DELETE FROM dictionary WHERE source = ?', (source_name,))
+            # 単語を削除
+            cursor.execute('DELETE FROM dictionary WHERE source = ?', (source_name,))
 
-        # ソース情報を削除
-        cursor.execute('DELETE FROM dictionary_sources WHERE name = ?', (source_name,))
+            # ソース情報を削除
+            cursor.execute('DELETE FROM dictionary_sources WHERE name = ?', (source_name,))
 
-        conn.commit()
+            rebuild_resolved_dictionary(conn)
+        _invalidate_lookup_source(source_name)
         print(f"辞書ソース '{source_name}' を削除しました")
         return True
 
@@ -420,19 +1266,19 @@ def delete_source(source_name: str) -> bool:
 def add_word(word: str, meaning: str, source: str = "user") -> bool:
     """単語を追加"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        # ユーザー辞書がなければ作成
-        if source == "user":
-            register_source("user", "ユーザー辞書", priority=200)
+        with write_transaction() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute('''
-            INSERT OR REPLACE INTO dictionary (word, meaning, source, priority)
-            VALUES (?, ?, ?, ?)
-        ''', (word.lower().strip(), meaning.strip(), source, 200))
+            # ユーザー辞書がなければ作成
+            if source == "user" and get_source_info("user") is None:
+                register_source("user", "ユーザー辞書", priority=200)
 
-        conn.commit()
+            cursor.execute('''
+                INSERT OR REPLACE INTO dictionary (word, meaning, source, priority)
+                VALUES (?, ?, ?, ?)
+            ''', (word.lower().strip(), meaning.strip(), source, 200))
+            _resolve_word(conn, word.lower().strip())
+        _invalidate_lookup_word(word)
         return True
 
     except Exception as e:
@@ -443,21 +1289,21 @@ def add_word(word: str, meaning: str, source: str = "user") -> bool:
 def remove_word(word: str, source: str = None) -> bool:
     """単語を削除"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        if source:
-            cursor.execute(
-                'DELETE FROM dictionary WHERE word = ? AND source = ?',
-                (word.lower().strip(), source)
-            )
-        else:
-            cursor.execute(
-                'DELETE FROM dictionary WHERE word = ?',
-                (word.lower().strip(),)
-            )
-
-        conn.commit()
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+
+            if source:
+                cursor.execute(
+                    'DELETE FROM dictionary WHERE word = ? AND source = ?',
+                    (word.lower().strip(), source)
+                )
+            else:
+                cursor.execute(
+                    'DELETE FROM dictionary WHERE word = ?',
+                    (word.lower().strip(),)
+                )
+            _resolve_word(conn, word.lower().strip())
+        _invalidate_lookup_word(word)
         return True
 
     except Exception as e:
@@ -467,6 +1313,66 @@ def remove_word(word: str, source: str = None) -> bool:
 
 # ========== 翻訳履歴関連 ==========
 
+def history_entry_key(original_text: str, source_lang: str, translation_type: str) -> int:
+    """
+    翻訳履歴の一意キー（原文・ソース言語・タイプのSHA-256先頭64bit、SQLiteの符号付き整数）
+    """
+    digest = hashlib.sha256(
+        f"{source_lang}\x1f{translation_type}\x1f{original_text}".encode('utf-8')
+    ).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def migrate_history_keys(batch_size: Optional[int] = None) -> int:
+    """
+    既存の翻訳履歴に entry_key を設定し、一意インデックスを作成する（オンラインマイグレーション）
+
+    テーブルを作り直さず、batch_size 件ずつ別トランザクションで値を埋めるため、
+    大きな履歴でも書き込みロックを長時間保持しない（読み取りはWALで継続できる）。
+
+    Returns:
+    int: entry_key を設定した件数
+    """
+    batch_size = batch_size or HISTORY_KEY_MIGRATION_BATCH
+    conn = get_connection()
+    if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_history_entry_key'"
+    ).fetchone():
+        return 0
+
+    start = time.perf_counter()
+    migrated = 0
+    while True:
+        with write_transaction() as conn:
+            conn.create_function('history_entry_key', 3, history_entry_key, deterministic=True)
+            cursor = conn.execute('''
+                UPDATE translation_history
+                SET entry_key = history_entry_key(original_text, source_lang, translation_type)
+                WHERE id IN (
+                    SELECT id FROM translation_history WHERE entry_key IS NULL LIMIT ?
+                )
+            ''', (batch_size,))
+            migrated += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            break
+
+    with write_transaction() as conn:
+        # 同じキーが重複している場合は最後に追加されたものを残す
+        conn.execute('''
+            DELETE FROM translation_history
+            WHERE id NOT IN (SELECT MAX(id) FROM translation_history GROUP BY entry_key)
+        ''')
+        conn.execute('DROP INDEX IF EXISTS idx_history_original')
+        conn.execute(
+            'CREATE UNIQUE INDEX IF NOT EXISTS idx_history_entry_key ON translation_history(entry_key)'
+        )
+
+    if migrated:
+        elapsed = time.perf_counter() - start
+        print(f"翻訳履歴のキーを移行しました: {migrated}件 ({elapsed:.2f}秒)")
+    return migrated
+
+
 def add_history_entry(original_text: str, translated_text: str,
                       source_lang: str, target_lang: str,
                       translation_type: str = "normal") -> bool:
@@ -478,89 +1384,307 @@ def add_history_entry(original_text: str, translated_text: str,
     translated_text (str): 翻訳されたテキスト
     source_lang (str): 原文の言語コード
     target_lang (str): 翻訳先の言語コード
-    translation_type (str): 翻訳タイプ ('normal', 'dictionary', 'speech')
+    translation_type (str): 翻訳タイプ ('normal', 'dictionary', 'speech', 'memory')
 
     Returns:
     bool: 成功したかどうか
     """
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
+    return add_history_entries([{
+        'original_text': original_text,
+        'translated_text': translated_text,
+        'source_lang': source_lang,
+        'target_lang': target_lang,
+        'translation_type': translation_type
+    }]) == 1
 
-        # 同じ原文、ソース言語、タイプの既存エントリを削除
-        cursor.execute('''
-            DELETE FROM translation_history
-            WHERE original_text = ? AND source_lang = ? AND translation_type = ?
-        ''', (original_text, source_lang, translation_type))
 
-        # 新しいエントリを追加
-        cursor.execute('''
-            INSERT INTO translation_history
-            (original_text, translated_text, source_lang, target_lang, translation_type)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (original_text, translated_text, source_lang, target_lang, translation_type))
+def add_history_entries(entries: List[Dict]) -> int:
+    """
+    複数の翻訳履歴を1トランザクションで追加する（書き込みキューのフラッシュ用）
 
-        conn.commit()
-        return True
+    Parameters:
+    entries (list): 履歴エントリのリスト（古い順）。'timestamp' があれば作成日時として使用
+
+    Returns:
+    int: 追加した件数（失敗時は0）
+    """
+    try:
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            for entry in entries:
+                # 同じ原文、ソース言語、タイプの既存エントリは entry_key の一意制約で更新
+                cursor.execute('''
+                    INSERT INTO translation_history
+                    (original_text, translated_text, source_lang, target_lang, translation_type,
+                     created_at, entry_key)
+                    VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+                    ON CONFLICT(entry_key) DO UPDATE SET
+                        original_text = excluded.original_text,
+                        translated_text = excluded.translated_text,
+                        target_lang = excluded.target_lang,
+                        created_at = excluded.created_at
+                ''', (entry['original_text'], entry['translated_text'], entry['source_lang'],
+                      entry['target_lang'], entry['translation_type'], entry.get('timestamp'),
+                      history_entry_key(entry['original_text'], entry['source_lang'],
+                                        entry['translation_type'])))
+        return len(entries)
 
     except Exception as e:
         print(f"履歴追加エラー: {e}")
-        return False
+        return 0
 
 
-def get_history(max_items: int = None, filter_type: str = None) -> List[Dict]:
+def _row_to_history_entry(row: sqlite3.Row) -> Dict:
+    """translation_history の行を履歴エントリの辞書に変換"""
+    return {
+        'id': row['id'],
+        'timestamp': row['created_at'],
+        'original_text': row['original_text'],
+        'translated_text': row['translated_text'],
+        'source_lang': row['source_lang'],
+        'target_lang': row['target_lang'],
+        'translation_type': row['translation_type']
+    }
+
+
+def _uses_history_fts(query: str) -> bool:
+    return _history_fts_available and len(query) >= HISTORY_FTS_MIN_QUERY
+
+
+def _fts_phrase(query: str) -> str:
+    """検索語をFTS5のフレーズ（部分一致）に変換"""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _history_query_condition(query: str) -> Tuple[str, List]:
+    """検索語の条件（全文検索インデックスが使えればFTS5、なければ LIKE）"""
+    if _uses_history_fts(query):
+        return ('id IN (SELECT rowid FROM translation_history_fts WHERE translation_history_fts MATCH ?)',
+                [_fts_phrase(query)])
+    return '(original_text LIKE ? OR translated_text LIKE ?)', [f'%{query}%', f'%{query}%']
+
+
+def make_snippet(text: str, query: str, width: int = HISTORY_SNIPPET_TOKENS) -> str:
     """
-    翻訳履歴を取得する
+    検索語の周辺を切り出して強調する（FTS5 の snippet() と同じ形式）
 
     Parameters:
-    max_items (int): 取得する最大数（Noneで無制限）
+    text (str): 対象の文字列
+    query (str): 検索語
+    width (int): 切り出す文字数の目安
+
+    Returns:
+    str: 検索語を HISTORY_HIGHLIGHT で囲んだ抜粋（一致しない場合は先頭部分）
+    """
+    position = text.lower().find(query.lower()) if query else -1
+    if position < 0:
+        return text[:width] + ('…' if len(text) > width else '')
+    start = max(0, position - max(0, width - len(query)) // 2)
+    end = max(position + len(query), start + width)
+    return ('…' if start > 0 else '') + text[start:position] + HISTORY_HIGHLIGHT[0] + \
+        text[position:position + len(query)] + HISTORY_HIGHLIGHT[1] + \
+        text[position + len(query):end] + ('…' if end < len(text) else '')
+
+
+def get_history_page(limit: int = HISTORY_PAGE_SIZE, cursor: Optional[Tuple[str, int]] = None,
+                     filter_type: str = None, query: str = None,
+                     text_length: Optional[int] = None) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+    """
+    翻訳履歴を新しい順に1ページ分取得する（キーセットページネーション）
+
+    OFFSET を使わず (created_at, id) の位置からシークするため、
+    何ページ目でも取得コストは一定。
+
+    Parameters:
+    limit (int): 1ページの件数
+    cursor (tuple): 前のページが返したカーソル（Noneで先頭から）
     filter_type (str): フィルタリングするタイプ（Noneで全て）
+    query (str): 原文・訳文の部分一致検索（Noneで検索なし）
+    text_length (int): 指定した場合、原文・訳文を先頭 text_length 文字だけ取得する（一覧表示用）
 
     Returns:
-    list: 履歴エントリのリスト
+    tuple: (履歴エントリのリスト, 次ページのカーソル。最後のページではNone)
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
+        conditions = []
+        params: List = []
         if filter_type:
-            query = '''
-                SELECT * FROM translation_history
-                WHERE translation_type = ?
-                ORDER BY created_at DESC
-            '''
-            params = [filter_type]
+            conditions.append('translation_type = ?')
+            params.append(filter_type)
+        if cursor is not None:
+            conditions.append('(created_at, id) < (?, ?)')
+            params.extend(cursor)
+
+        if text_length:
+            columns = (f'id, created_at, source_lang, target_lang, translation_type, '
+                       f'substr(original_text, 1, {int(text_length)}) AS original_text, '
+                       f'substr(translated_text, 1, {int(text_length)}) AS translated_text')
         else:
-            query = '''
-                SELECT * FROM translation_history
-                ORDER BY created_at DESC
-            '''
-            params = []
+            columns = '*'
+        conn = get_connection()
 
-        if max_items:
-            query += ' LIMIT ?'
-            params.append(max_items)
+        rows = None
+        if query and _uses_history_fts(query):
+            # 頻出語は直近の行だけで1ページ分見つかる（FTS5は一致する全行を集めるため遅い）。
+            # 直近 HISTORY_RECENT_SCAN_ROWS 行を LIKE で調べ、足りなければ全文検索インデックスを使う
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            boundary = conn.execute(f'''
+                SELECT created_at, id FROM translation_history {where}
+                ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?
+            ''', (*params, HISTORY_RECENT_SCAN_ROWS - 1)).fetchone()
+            recent_conditions = conditions + ['(original_text LIKE ? OR translated_text LIKE ?)']
+            recent_params = params + [f'%{query}%', f'%{query}%']
+            if boundary is not None:
+                recent_conditions.append('(created_at, id) >= (?, ?)')
+                recent_params.extend(boundary)
+            rows = conn.execute(f'''
+                SELECT {columns} FROM translation_history
+                WHERE {' AND '.join(recent_conditions)}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (*recent_params, limit)).fetchall()
+            # 境界がない（残りが少ない）場合は LIKE の結果で確定
+            if len(rows) < limit and boundary is not None:
+                rows = None
+
+        if rows is None:
+            if query:
+                condition, query_params = _history_query_condition(query)
+                conditions.append(condition)
+                params.extend(query_params)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            rows = conn.execute(f'''
+                SELECT {columns} FROM translation_history
+                {where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (*params, limit)).fetchall()
+
+        entries = [_row_to_history_entry(row) for row in rows]
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = (rows[-1]['created_at'], rows[-1]['id'])
+        return entries, next_cursor
 
-        cursor.execute(query, params)
+    except Exception as e:
+        if _is_interrupted(e):
+            raise QueryCancelled() from e
+        print(f"履歴取得エラー: {e}")
+        return [], None
 
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'id': row['id'],
-                'timestamp': row['created_at'],
-                'original_text': row['original_text'],
-                'translated_text': row['translated_text'],
-                'source_lang': row['source_lang'],
-                'target_lang': row['target_lang'],
-                'translation_type': row['translation_type']
-            })
-        return results
+
+def search_history_ranked(query: str, limit: int = HISTORY_PAGE_SIZE, offset: int = 0,
+                          filter_type: str = None, text_length: Optional[int] = None) -> List[Dict]:
+    """
+    翻訳履歴を関連度順に検索する（FTS5 の bm25 順、強調付きの抜粋を含む）
+
+    全文検索インデックスが使えない場合や検索語が短い場合は、
+    LIKE で新しい順に検索して抜粋をPython側で作成する。
+
+    Parameters:
+    query (str): 検索語
+    limit (int): 取得件数
+    offset (int): 先頭から読み飛ばす件数
+    filter_type (str): フィルタリングするタイプ（Noneで全て）
+    text_length (int): 指定した場合、原文・訳文を先頭 text_length 文字だけ取得する
+
+    Returns:
+    list: 履歴エントリのリスト（score, snippet_original, snippet_translated を追加）
+    """
+    if not query:
+        return []
+    if not _uses_history_fts(query):
+        entries, _ = get_history_page(limit + offset, None, filter_type, query)
+        entries = entries[offset:]
+        for entry in entries:
+            entry['score'] = None
+            entry['snippet_original'] = make_snippet(entry['original_text'], query)
+            entry['snippet_translated'] = make_snippet(entry['translated_text'], query)
+            if text_length:
+                entry['original_text'] = entry['original_text'][:text_length]
+                entry['translated_text'] = entry['translated_text'][:text_length]
+        return entries
+
+    try:
+        if text_length:
+            texts = (f'substr(h.original_text, 1, {int(text_length)}) AS original_text, '
+                     f'substr(h.translated_text, 1, {int(text_length)}) AS translated_text')
+        else:
+            texts = 'h.original_text, h.translated_text'
+        open_mark, close_mark = HISTORY_HIGHLIGHT
+        type_condition = 'AND h.translation_type = ?' if filter_type else ''
+        params: List = [open_mark, close_mark, open_mark, close_mark, _fts_phrase(query)]
+        if filter_type:
+            params.append(filter_type)
+        rows = get_connection().execute(f'''
+            SELECT h.id, h.created_at, h.source_lang, h.target_lang, h.translation_type, {texts},
+                   bm25(translation_history_fts) AS score,
+                   snippet(translation_history_fts, 0, ?, ?, '…', {HISTORY_SNIPPET_TOKENS}) AS snippet_original,
+                   snippet(translation_history_fts, 1, ?, ?, '…', {HISTORY_SNIPPET_TOKENS}) AS snippet_translated
+            FROM translation_history_fts
+            JOIN translation_history h ON h.id = translation_history_fts.rowid
+            WHERE translation_history_fts MATCH ? {type_condition}
+            ORDER BY score, h.created_at DESC
+            LIMIT ? OFFSET ?
+        ''', (*params, limit, offset)).fetchall()
+
+        entries = []
+        for row in rows:
+            entry = _row_to_history_entry(row)
+            entry['score'] = row['score']
+            entry['snippet_original'] = row['snippet_original']
+            entry['snippet_translated'] = row['snippet_translated']
+            entries.append(entry)
+        return entries
 
     except Exception as e:
-        print(f"履歴取得エラー: {e}")
+        if _is_interrupted(e):
+            raise QueryCancelled() from e
+        print(f"履歴検索エラー: {e}")
         return []
 
 
+def get_history_entry(entry_id: int) -> Optional[Dict]:
+    """IDを指定して履歴エントリを1件取得する"""
+    try:
+        row = get_connection().execute(
+            'SELECT * FROM translation_history WHERE id = ?', (entry_id,)
+        ).fetchone()
+        return _row_to_history_entry(row) if row else None
+    except Exception as e:
+        print(f"履歴取得エラー: {e}")
+        return None
+
+
+def iter_history(filter_type: str = None, query: str = None,
+                 page_size: int = HISTORY_PAGE_SIZE) -> Iterator[Dict]:
+    """
+    翻訳履歴を新しい順に1件ずつ返すイテレータ（page_size件ずつ読み込む）
+    """
+    cursor = None
+    while True:
+        entries, cursor = get_history_page(page_size, cursor, filter_type, query)
+        yield from entries
+        if cursor is None:
+            return
+
+
+def get_history(max_items: int = None, filter_type: str = None) -> List[Dict]:
+    """
+    翻訳履歴を取得する
+
+    Parameters:
+    max_items (int): 取得する最大数（Noneで無制限）
+    filter_type (str): フィルタリングするタイプ（Noneで全て）
+
+    Returns:
+    list: 履歴エントリのリスト
+    """
+    if max_items:
+        return get_history_page(max_items, filter_type=filter_type)[0]
+    return list(iter_history(filter_type))
+
+
 def search_history(query: str) -> List[Dict]:
     """
     翻訳履歴を検索する
@@ -571,33 +1695,7 @@ def search_history(query: str) -> List[Dict]:
     Returns:
     list: 検索結果のリスト
     """
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        search_pattern = f'%{query}%'
-        cursor.execute('''
-            SELECT * FROM translation_history
-            WHERE original_text LIKE ? OR translated_text LIKE ?
-            ORDER BY created_at DESC
-        ''', (search_pattern, search_pattern))
-
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'id': row['id'],
-                'timestamp': row['created_at'],
-                'original_text': row['original_text'],
-                'translated_text': row['translated_text'],
-                'source_lang': row['source_lang'],
-                'target_lang': row['target_lang'],
-                'translation_type': row['translation_type']
-            })
-        return results
-
-    except Exception as e:
-        print(f"履歴検索エラー: {e}")
-        return []
+    return list(iter_history(query=query))
 
 
 def find_cached_translation(original_text: str, source_lang: str,
@@ -617,30 +1715,19 @@ def find_cached_translation(original_text: str, source_lang: str,
         conn = get_connection()
         cursor = conn.cursor()
 
-        if translation_type:
-            cursor.execute('''
-                SELECT * FROM translation_history
-                WHERE original_text = ? AND source_lang = ? AND translation_type = ?
-                ORDER BY created_at DESC LIMIT 1
-            ''', (original_text, source_lang, translation_type))
-        else:
-            cursor.execute('''
-                SELECT * FROM translation_history
-                WHERE original_text = ? AND source_lang = ?
-                ORDER BY created_at DESC LIMIT 1
-            ''', (original_text, source_lang))
+        # entry_key の一意インデックスで検索（ハッシュ衝突に備えて原文も照合）
+        types = [translation_type] if translation_type else list(HISTORY_TYPES)
+        keys = [history_entry_key(original_text, source_lang, t) for t in types]
+        placeholders = ', '.join('?' * len(keys))
+        cursor.execute(f'''
+            SELECT * FROM translation_history
+            WHERE entry_key IN ({placeholders}) AND original_text = ? AND source_lang = ?
+            ORDER BY created_at DESC LIMIT 1
+        ''', (*keys, original_text, source_lang))
 
         row = cursor.fetchone()
         if row:
-            return {
-                'id': row['id'],
-                'timestamp': row['created_at'],
-                'original_text': row['original_text'],
-                'translated_text': row['translated_text'],
-                'source_lang': row['source_lang'],
-                'target_lang': row['target_lang'],
-                'translation_type': row['translation_type']
-            }
+            return _row_to_history_entry(row)
         return None
 
     except Exception as e:
@@ -651,10 +1738,9 @@ def find_cached_translation(original_text: str, source_lang: str,
 def clear_history() -> bool:
     """翻訳履歴をすべてクリアする"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM translation_history')
-        conn.commit()
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM translation_history')
         print("翻訳履歴をクリアしました")
         return True
     except Exception as e:
@@ -665,10 +1751,9 @@ def clear_history() -> bool:
 def delete_history_entry(entry_id: int) -> bool:
     """特定の履歴エントリを削除"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM translation_history WHERE id = ?', (entry_id,))
-        conn.commit()
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM translation_history WHERE id = ?', (entry_id,))
         return True
     except Exception as e:
         print(f"履歴削除エラー: {e}")
@@ -699,17 +1784,451 @@ def import_history_from_json(history_list: List[Dict]) -> int:
     """
     try:
         count = 0
-        for entry in history_list:
-            if add_history_entry(
-                entry.get('original_text', ''),
-                entry.get('translated_text', ''),
-                entry.get('source_lang', 'EN'),
-                entry.get('target_lang', 'JA'),
-                entry.get('translation_type', 'normal')
-            ):
-                count += 1
+        # 全件を1トランザクションで書き込む
+        with write_transaction():
+            for entry in history_list:
+                if add_history_entry(
+                    entry.get('original_text', ''),
+                    entry.get('translated_text', ''),
+                    entry.get('source_lang', 'EN'),
+                    entry.get('target_lang', 'JA'),
+                    entry.get('translation_type', 'normal')
+                ):
+                    count += 1
         print(f"{count}件の履歴をインポートしました")
         return count
     except Exception as e:
         print(f"履歴インポートエラー: {e}")
         return 0
+
+
+# ========== 翻訳キャッシュ関連 ==========
+
+def translation_cache_key(original_text: str, source_lang: str, target_lang: str,
+                          provider: str, prompt_version: str = "") -> int:
+    """翻訳キャッシュのキー（SHA-256先頭64bit、SQLiteの符号付き整数）"""
+    digest = hashlib.sha256(
+        f"{source_lang}\x1f{target_lang}\x1f{provider}\x1f{prompt_version}\x1f{original_text}"
+        .encode('utf-8')
+    ).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def get_cached_translation(cache_key: int, original_text: str,
+                           min_created_at: float = 0.0) -> Optional[Dict]:
+    """
+    翻訳キャッシュを検索する（ヒット数・最終ヒット日時の更新は touch_cached_translations で行う）
+
+    Parameters:
+    cache_key (int): translation_cache_key の値
+    original_text (str): 原文（ハッシュ衝突の確認用）
+    min_created_at (float): これより古いエントリは期限切れとして扱う（UNIX時刻）
+
+    Returns:
+    dict or None: {translated_text, created_at, hit_count}
+    """
+    try:
+        row = get_connection().execute('''
+            SELECT translated_text, created_at, hit_count FROM translation_cache
+            WHERE cache_key = ? AND original_text = ? AND created_at >= ?
+        ''', (cache_key, original_text, min_created_at)).fetchone()
+        return dict(row) if row else None
+    except Exception as e:
+        print(f"翻訳キャッシュ検索エラー: {e}")
+        return None
+
+
+def put_cached_translations(rows: List[Tuple]) -> int:
+    """
+    翻訳キャッシュにまとめて保存する（1トランザクション。期限切れ・上限超過の削除は
+    evict_cached_translations で行う）
+
+    Parameters:
+    rows (list): [(cache_key, 原文, ソース言語, 翻訳先言語, プロバイダー, プロンプト版, 訳文, 作成時刻), ...]
+
+    Returns:
+    int: 新しく追加したエントリ数（既存キーの上書きは含まない）。失敗時は -1
+    """
+    if not rows:
+        return 0
+    try:
+        keys = list({row[0] for row in rows})
+        with write_transaction() as conn:
+            existing = 0
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                existing += conn.execute(
+                    f'SELECT COUNT(*) FROM translation_cache WHERE cache_key IN ({",".join("?" * len(chunk))})',
+                    chunk
+                ).fetchone()[0]
+            conn.executemany('''
+                INSERT INTO translation_cache
+                (cache_key, original_text, source_lang, target_lang, provider, prompt_version,
+                 translated_text, created_at, last_hit_at, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    original_text = excluded.original_text,
+                    translated_text = excluded.translated_text,
+                    created_at = excluded.created_at,
+                    last_hit_at = excluded.last_hit_at,
+                    hit_count = 0
+            ''', [row + (row[7],) for row in rows])
+        return len(keys) - existing
+    except Exception as e:
+        print(f"翻訳キャッシュ保存エラー: {e}")
+        return -1
+
+
+def evict_cached_translations(max_entries: int = 0,
+                              min_created_at: float = 0.0) -> Tuple[int, int]:
+    """
+    翻訳キャッシュから期限切れと上限超過分（最終ヒットが古い順）を削除する
+
+    Parameters:
+    max_entries (int): 最大件数。0以下で無制限
+    min_created_at (float): これより古いエントリを削除する（UNIX時刻）
+
+    Returns:
+    tuple: (削除したエントリ数, 残りのエントリ数)。失敗時は (0, -1)
+    """
+    try:
+        with write_transaction() as conn:
+            evicted = conn.execute(
+                'DELETE FROM translation_cache WHERE created_at < ?', (min_created_at,)
+            ).rowcount
+            entries = conn.execute('SELECT COUNT(*) FROM translation_cache').fetchone()[0]
+            if 0 < max_entries < entries:
+                removed = conn.execute('''
+                    DELETE FROM translation_cache WHERE cache_key IN (
+                        SELECT cache_key FROM translation_cache
+                        ORDER BY last_hit_at ASC LIMIT ?
+                    )
+                ''', (entries - max_entries,)).rowcount
+                evicted += removed
+                entries -= removed
+        return evicted, entries
+    except Exception as e:
+        print(f"翻訳キャッシュ削除エラー: {e}")
+        return 0, -1
+
+
+def touch_cached_translations(touches: Dict[int, Tuple[float, int]]) -> bool:
+    """
+    キャッシュヒットをまとめて反映する
+
+    Parameters:
+    touches (dict): cache_key → (最終ヒット時刻, 追加するヒット数)
+    """
+    if not touches:
+        return True
+    try:
+        with write_transaction() as conn:
+            conn.executemany('''
+                UPDATE translation_cache
+                SET last_hit_at = MAX(last_hit_at, ?), hit_count = hit_count + ?
+                WHERE cache_key = ?
+            ''', [(last_hit, count, key) for key, (last_hit, count) in touches.items()])
+        return True
+    except Exception as e:
+        print(f"翻訳キャッシュ更新エラー: {e}")
+        return False
+
+
+def get_translation_cache_stats() -> Dict:
+    """翻訳キャッシュテーブルの統計 {entries, total_hits}"""
+    try:
+        row = get_connection().execute(
+            'SELECT COUNT(*) AS entries, COALESCE(SUM(hit_count), 0) AS total_hits FROM translation_cache'
+        ).fetchone()
+        return {'entries': row['entries'], 'total_hits': row['total_hits']}
+    except Exception as e:
+        print(f"翻訳キャッシュ統計エラー: {e}")
+        return {'entries': 0, 'total_hits': 0}
+
+
+def clear_translation_cache() -> bool:
+    """翻訳キャッシュをすべて削除する"""
+    try:
+        with write_transaction() as conn:
+            conn.execute('DELETE FROM translation_cache')
+        return True
+    except Exception as e:
+        print(f"翻訳キャッシュ削除エラー: {e}")
+        return False
+
+
+# ========== 履歴の変更フィード ==========
+
+def get_history_version() -> int:
+    """翻訳履歴のバージョン（変更フィードの最新の seq。変更のたびに増加し、減らない）"""
+    try:
+        row = get_connection().execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'history_changes'").fetchone()
+        return row[0] if row else 0
+    except Exception as e:
+        print(f"履歴バージョン取得エラー: {e}")
+        return 0
+
+
+def get_history_changes(since_version: Optional[int]) -> Tuple[int, Optional[List[Tuple[int, Optional[Dict]]]]]:
+    """
+    指定したバージョン以降の履歴の変更を取得する
+
+    Parameters:
+    since_version (int): 前回取得したバージョン（Noneの場合は差分なし）
+
+    Returns:
+    tuple: (現在のバージョン, [(履歴ID, 現在のエントリ。削除済みはNone), ...])。
+           同じIDの変更はまとめる。since_version がNoneか、
+           保持期間より古く差分を取れない場合、リストの代わりにNone
+    """
+    try:
+        conn = get_connection()
+        # バージョンと変更を同じスナップショットから読む
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute('BEGIN')
+        try:
+            row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'history_changes'").fetchone()
+            version = row[0] if row else 0
+            if since_version is None or since_version > version:
+                return version, None
+            if since_version == version:
+                return version, []
+            oldest = conn.execute('SELECT MIN(seq) FROM history_changes').fetchone()[0]
+            if oldest is None or oldest > since_version + 1:
+                return version, None
+
+            ids = [row[0] for row in conn.execute('''
+                SELECT history_id FROM history_changes WHERE seq > ?
+                GROUP BY history_id ORDER BY MAX(seq)
+            ''', (since_version,))]
+            entries = {}
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                for entry_row in conn.execute(
+                        f"SELECT * FROM translation_history WHERE id IN ({', '.join('?' * len(chunk))})",
+                        chunk):
+                    entries[entry_row['id']] = _row_to_history_entry(entry_row)
+            return version, [(history_id, entries.get(history_id)) for history_id in ids]
+        finally:
+            if own_transaction:
+                conn.rollback()
+    except Exception as e:
+        print(f"履歴の変更取得エラー: {e}")
+        return 0, None
+
+
+def prune_history_changes(keep: Optional[int] = None) -> int:
+    """
+    変更フィードの古い記録を削除する（最新 keep 件を残す）
+
+    Returns:
+    int: 削除した件数
+    """
+    keep = HISTORY_CHANGES_RETENTION if keep is None else keep
+    try:
+        with write_transaction() as conn:
+            cursor = conn.execute(
+                'DELETE FROM history_changes WHERE seq <= (SELECT MAX(seq) FROM history_changes) - ?',
+                (keep,)
+            )
+            return cursor.rowcount
+    except Exception as e:
+        print(f"変更フィード削除エラー: {e}")
+        return 0
+
+
+# ========== 履歴検索インデックス関連 ==========
+
+def save_search_index(tokenizer: str, history_version: int, documents: List[Tuple[int, int]],
+                      postings: Iterable[Tuple[str, int, int]]) -> bool:
+    """
+    履歴検索の転置インデックスを保存する（既存のインデックスは置き換え）
+
+    Parameters:
+    tokenizer (str): トークナイザーの版
+    history_version (int): インデックスが反映している履歴のバージョン
+    documents (list): (履歴ID, トークン数) のリスト（文書の順序どおり）
+    postings (iterable): (単語, 履歴ID, 出現回数)
+
+    Returns:
+    bool: 保存に成功したかどうか
+    """
+    try:
+        with write_transaction() as conn:
+            conn.execute('DELETE FROM search_index_documents')
+            conn.execute('DELETE FROM search_index_postings')
+            _write_search_index_documents(conn, documents, postings)
+            _set_search_index_version(conn, tokenizer, history_version)
+        return True
+    except Exception as e:
+        print(f"検索インデックス保存エラー: {e}")
+        return False
+
+
+def update_search_index(tokenizer: str, history_version: int, removed: List[Tuple[int, Iterable[str]]],
+                        documents: List[Tuple[int, int]], postings: Iterable[Tuple[str, int, int]]) -> bool:
+    """
+    保存済みの転置インデックスを差分で更新する
+
+    Parameters:
+    tokenizer (str): トークナイザーの版
+    history_version (int): 更新後のインデックスが反映している履歴のバージョン
+    removed (list): 削除する (履歴ID, その文書の単語) のリスト（更新する文書も含める）
+    documents (list): 追加する (履歴ID, トークン数)
+    postings (iterable): 追加する (単語, 履歴ID, 出現回数)
+
+    Returns:
+    bool: 更新に成功したかどうか
+    """
+    try:
+        with write_transaction() as conn:
+            conn.executemany('DELETE FROM search_index_documents WHERE history_id = ?',
+                             [(history_id,) for history_id, _ in removed])
+            conn.executemany('DELETE FROM search_index_postings WHERE term = ? AND history_id = ?',
+                             [(term, history_id) for history_id, terms in removed for term in terms])
+            _write_search_index_documents(conn, documents, postings)
+            _set_search_index_version(conn, tokenizer, history_version)
+        return True
+    except Exception as e:
+        print(f"検索インデックス更新エラー: {e}")
+        return False
+
+
+def _write_search_index_documents(conn, documents, postings):
+    """文書を末尾の位置に追加し、ポスティングを書き込む"""
+    next_position = conn.execute(
+        'SELECT COALESCE(MAX(position) + 1, 0) FROM search_index_documents').fetchone()[0]
+    conn.executemany(
+        'INSERT INTO search_index_documents (history_id, position, length) VALUES (?, ?, ?)',
+        [(history_id, next_position + i, length) for i, (history_id, length) in enumerate(documents)]
+    )
+    conn.executemany('INSERT INTO search_index_postings (term, history_id, tf) VALUES (?, ?, ?)', postings)
+
+
+def _set_search_index_version(conn, tokenizer, history_version):
+    conn.executemany('INSERT OR REPLACE INTO dictionary_meta (key, value) VALUES (?, ?)', [
+        ('search_index_tokenizer', tokenizer),
+        ('search_index_history_version', str(history_version)),
+    ])
+
+
+def load_search_index(tokenizer: str) -> Optional[Tuple[int, List[Tuple[int, int]], List[Tuple[str, int, int]]]]:
+    """
+    保存済みの履歴検索インデックスを読み込む
+
+    Parameters:
+    tokenizer (str): 現在のトークナイザーの版
+
+    Returns:
+    tuple or None: (履歴のバージョン, (履歴ID, トークン数) のリスト, (単語, 履歴ID, 出現回数) のリスト)。
+                   保存されていないか、トークナイザーの版が異なる場合はNone
+    """
+    try:
+        conn = get_connection()
+        # 版・文書・ポスティングを同じスナップショットから読む
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute('BEGIN')
+        try:
+            meta = dict(conn.execute(
+                "SELECT key, value FROM dictionary_meta "
+                "WHERE key IN ('search_index_tokenizer', 'search_index_history_version')").fetchall())
+            if meta.get('search_index_tokenizer') != tokenizer or 'search_index_history_version' not in meta:
+                return None
+            documents = [tuple(row) for row in conn.execute(
+                'SELECT history_id, length FROM search_index_documents ORDER BY position')]
+            postings = [tuple(row) for row in conn.execute(
+                'SELECT term, history_id, tf FROM search_index_postings')]
+            return int(meta['search_index_history_version']), documents, postings
+        finally:
+            if own_transaction:
+                conn.rollback()
+    except Exception as e:
+        print(f"検索インデックス読み込みエラー: {e}")
+        return None
+
+
+# ========== トークンキャッシュ関連 ==========
+
+def token_cache_key(text: str) -> int:
+    """トークンキャッシュのキー（テキストのSHA-256先頭64bit、SQLiteの符号付き整数）"""
+    return int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+
+def get_cached_tokens(keys: List[int], tokenizer: str) -> Dict[int, List[str]]:
+    """
+    キャッシュされたトークン列を取得する
+
+    Parameters:
+    keys (list): token_cache_key の値のリスト
+    tokenizer (str): トークナイザーの版
+
+    Returns:
+    dict: キー → トークンのリスト（キャッシュにあるものだけ）
+    """
+    found = {}
+    try:
+        conn = get_connection()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            for row in conn.execute(
+                    f"SELECT text_hash, tokens FROM token_cache "
+                    f"WHERE tokenizer = ? AND text_hash IN ({', '.join('?' * len(chunk))})",
+                    (tokenizer, *chunk)):
+                found[row[0]] = json.loads(row[1])
+    except Exception as e:
+        if _is_interrupted(e):
+            raise QueryCancelled() from e
+        print(f"トークンキャッシュ取得エラー: {e}")
+    return found
+
+
+def put_cached_tokens(items: List[Tuple[int, List[str]]], tokenizer: str) -> bool:
+    """
+    トークン列をキャッシュに保存する
+
+    Parameters:
+    items (list): (token_cache_key の値, トークンのリスト) のリスト
+    tokenizer (str): トークナイザーの版
+    """
+    if not items:
+        return True
+    try:
+        now = time.time()
+        with write_transaction() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO token_cache (text_hash, tokenizer, tokens, created_at) '
+                'VALUES (?, ?, ?, ?)',
+                [(key, tokenizer, json.dumps(tokens, ensure_ascii=False), now) for key, tokens in items]
+            )
+        return True
+    except Exception as e:
+        print(f"トークンキャッシュ保存エラー: {e}")
+        return False
+
+
+def prune_token_cache(max_entries: Optional[int] = None) -> int:
+    """
+    トークンキャッシュを件数上限まで削除する（古く作成されたものから）
+
+    Returns:
+    int: 削除した件数
+    """
+    max_entries = TOKEN_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    try:
+        with write_transaction() as conn:
+            count = conn.execute('SELECT COUNT(*) FROM token_cache').fetchone()[0]
+            if count <= max_entries:
+                return 0
+            cursor = conn.execute('''
+                DELETE FROM token_cache WHERE (text_hash, tokenizer) IN (
+                    SELECT text_hash, tokenizer FROM token_cache ORDER BY created_at LIMIT ?
+                )
+            ''', (count - max_entries,))
+            return cursor.rowcount
+    except Exception as e:
+        print(f"トークンキャッシュ削除エラー: {e}")
+        return 0
@@ -1,12 +1,25 @@
 # ClipboardTranslator v1.00 - Translation History Module
 import os
 import json
-from datetime import datetime
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
 
 # SQLiteモードフラグ
 USE_SQLITE = False
 _db_available = False
 
+# 書き込みキュー（SQLiteモード）: 一定間隔または一定件数ごとに1トランザクションで書き込む
+HISTORY_FLUSH_INTERVAL_MS = 500
+HISTORY_FLUSH_MAX_ENTRIES = 32
+
+# 履歴ダイアログ: 1回に読み込む件数・同時に保持するページ数（表示範囲＋前後の先読み）・一覧の文字数
+HISTORY_DIALOG_PAGE_SIZE = 200
+HISTORY_WINDOW_PAGES = 3
+SUMMARY_LENGTH = 30
+
 
 def init_history_db():
     """SQLiteモードを初期化"""
@@ -23,6 +36,128 @@ def init_history_db():
     return False
 
 
+def _entry_key(entry):
+    """上書き判定に使うキー（原文・ソース言語・タイプ）"""
+    return (entry['original_text'], entry['source_lang'], entry['translation_type'])
+
+
+class HistoryWriteQueue:
+    """
+    翻訳履歴の書き込みキュー（write-behind）
+
+    add_entry はキューに積むだけで戻り、バックグラウンドスレッドが
+    flush_interval_ms ごと、または max_entries 件たまった時点で
+    dictionary_db.add_history_entries により1トランザクションで書き込む。
+    書き込みが完了するまでエントリはキューに残り、読み取り側から参照できる。
+    """
+
+    def __init__(self, flush_interval_ms=HISTORY_FLUSH_INTERVAL_MS,
+                 max_entries=HISTORY_FLUSH_MAX_ENTRIES):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_entries = max_entries
+        self._pending = OrderedDict()  # キー → エントリ（古い順）
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        self.stats = {'enqueued': 0, 'flushes': 0, 'flushed': 0, 'last_flush_ms': 0.0}
+
+    def put(self, entry):
+        """エントリをキューに追加（同じキーの未書き込みエントリは置き換え）"""
+        with self._wakeup:
+            if not self._closed:
+                key = _entry_key(entry)
+                self._pending.pop(key, None)
+                self._pending[key] = entry
+                self.stats['enqueued'] += 1
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="history-writer", daemon=True
+                    )
+                    self._thread.start()
+                if len(self._pending) == 1 or len(self._pending) >= self.max_entries:
+                    self._wakeup.notify()
+                return
+
+        # 終了後に追加されたエントリは直接書き込む
+        from . import dictionary_db as db
+        db.add_history_entries([entry])
+
+    def pending_entries(self):
+        """未書き込みのエントリ（新しい順）"""
+        with self._lock:
+            return list(reversed(self._pending.values()))
+
+    def find(self, key):
+        """キーに一致する未書き込みのエントリ"""
+        with self._lock:
+            return self._pending.get(key)
+
+    def flush(self):
+        """
+        未書き込みのエントリを1トランザクションで書き込む
+
+        Returns:
+        int: 書き込んだ件数
+        """
+        from . import dictionary_db as db
+
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            written = db.add_history_entries(batch)
+            if written:
+                with self._lock:
+                    # 書き込み中に置き換えられたエントリは残す
+                    for entry in batch:
+                        key = _entry_key(entry)
+                        if self._pending.get(key) is entry:
+                            del self._pending[key]
+                self.stats['flushes'] += 1
+                self.stats['flushed'] += written
+                self.stats['last_flush_ms'] = (time.perf_counter() - start) * 1000
+            return written
+
+    def clear(self, clear_database):
+        """未書き込みのエントリを破棄し、clear_database() を実行する"""
+        with self._flush_lock:
+            with self._lock:
+                self._pending.clear()
+            clear_database()
+
+    def close(self):
+        """スレッドを停止し、残りのエントリをすべて書き込む"""
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        written = self.flush()
+        if written:
+            print(f"履歴の書き込みキューから{written}件を書き込みました")
+
+    def _run(self):
+        """バックグラウンドの書き込みループ"""
+        while True:
+            with self._wakeup:
+                while not self._closed and not self._pending:
+                    self._wakeup.wait()
+                if not self._closed and len(self._pending) < self.max_entries:
+                    self._wakeup.wait(self.flush_interval)
+                closed = self._closed
+            if closed:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"履歴書き込みエラー: {e}")
+
+
 class TranslationHistory:
     """翻訳履歴を管理するクラス"""
 
@@ -43,12 +178,14 @@ class TranslationHistory:
             self.history_file = history_file_path
 
         self.history = []  # レガシー互換用
+        self._write_queue = None
 
         # SQLiteモードを試行
         init_history_db()
 
         if USE_SQLITE and _db_available:
             self._migrate_json_to_sqlite()
+            self._write_queue = HistoryWriteQueue()
             print("履歴: SQLiteモードで動作中")
         else:
             self.load_history()
@@ -118,12 +255,19 @@ class TranslationHistory:
         translated_text (str): 翻訳されたテキスト
         source_lang (str): 原文の言語コード ('JA', 'EN', etc.)
         target_lang (str): 翻訳先の言語コード ('JA', 'EN', etc.)
-        translation_type (str): 翻訳タイプ ('normal', 'dictionary', 'speech')
+        translation_type (str): 翻訳タイプ ('normal', 'dictionary', 'speech', 'memory')
         """
-        # SQLiteモード
+        # SQLiteモード（書き込みキュー経由。ディスクへの同期を待たずに戻る）
         if USE_SQLITE and _db_available:
-            from . import dictionary_db as db
-            db.add_history_entry(original_text, translated_text, source_lang, target_lang, translation_type)
+            self._write_queue.put({
+                'id': None,
+                'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+                'original_text': original_text,
+                'translated_text': translated_text,
+                'source_lang': source_lang,
+                'target_lang': target_lang,
+                'translation_type': translation_type
+            })
             return
 
         # レガシーモード
@@ -158,7 +302,9 @@ class TranslationHistory:
         # SQLiteモード
         if USE_SQLITE and _db_available:
             from . import dictionary_db as db
-            return db.get_history(max_items, filter_type)
+            pending = self._matching_pending(filter_type)
+            limit = max_items + len(pending) if max_items else max_items
+            return self._merge_pending(pending, db.get_history(limit, filter_type), max_items)
 
         # レガシーモード
         if filter_type:
@@ -171,6 +317,152 @@ class TranslationHistory:
         else:
             return filtered_history
 
+    def get_history_page(self, limit=200, cursor=None, filter_type=None, query=None, text_length=None):
+        """
+        翻訳履歴を新しい順に1ページ分取得する
+
+        Parameters:
+        limit (int): 1ページの件数
+        cursor: 前のページが返したカーソル（Noneで先頭から。中身は実装依存）
+        filter_type (str): フィルタリングする翻訳タイプ
+        query (str): 原文・訳文の部分一致検索
+        text_length (int): 指定した場合、SQLiteからは原文・訳文を先頭 text_length 文字だけ取得する
+
+        Returns:
+        tuple: (履歴エントリのリスト, 次ページのカーソル。最後のページではNone)
+        """
+        # SQLiteモード（キーセットページネーション）
+        if USE_SQLITE and _db_available:
+            from . import dictionary_db as db
+            pending = self._matching_pending(filter_type, query)
+            entries, next_cursor = db.get_history_page(limit, cursor, filter_type, query, text_length)
+            if cursor is None:
+                return self._merge_pending(pending, entries), next_cursor
+            keys = {_entry_key(entry) for entry in pending}
+            return [entry for entry in entries if _entry_key(entry) not in keys], next_cursor
+
+        # レガシーモード（カーソルはリスト上の位置）
+        if query:
+            entries = self.search_history(query)
+            if filter_type:
+                entries = [entry for entry in entries if entry['translation_type'] == filter_type]
+        else:
+            entries = self.get_history(filter_type=filter_type)
+        start = cursor or 0
+        end = start + limit
+        return entries[start:end], (end if end < len(entries) else None)
+
+    def search_history_page(self, query, limit=200, cursor=None, filter_type=None, text_length=None):
+        """
+        翻訳履歴を関連度順に検索する（強調付きの抜粋を含む）
+
+        Parameters:
+        query (str): 検索語
+        limit (int): 1ページの件数
+        cursor (int): 前のページが返したカーソル（Noneで先頭から）
+        filter_type (str): フィルタリングする翻訳タイプ
+        text_length (int): 指定した場合、SQLiteからは原文・訳文を先頭 text_length 文字だけ取得する
+
+        Returns:
+        tuple: (履歴エントリのリスト, 次ページのカーソル。最後のページではNone)
+        各エントリには score（FTS5 の bm25。小さいほど関連度が高い）と
+        snippet_original / snippet_translated が追加される
+        """
+        from . import dictionary_db as db
+        offset = cursor or 0
+
+        # SQLiteモード（未書き込みのエントリは先頭ページに重ねる）
+        if USE_SQLITE and _db_available:
+            entries = db.search_history_ranked(query, limit, offset, filter_type, text_length)
+            next_cursor = offset + limit if len(entries) == limit else None
+            pending = self._matching_pending(filter_type, query)
+            keys = {_entry_key(entry) for entry in pending}
+            entries = [entry for entry in entries if _entry_key(entry) not in keys]
+            if cursor is None and pending:
+                entries = [dict(entry, score=None,
+                                snippet_original=db.make_snippet(entry['original_text'], query),
+                                snippet_translated=db.make_snippet(entry['translated_text'], query))
+                           for entry in pending] + entries
+            return entries, next_cursor
+
+        # レガシーモード（新しい順）
+        entries, next_cursor = self.get_history_page(limit, cursor, filter_type, query)
+        return [dict(entry, score=None,
+                     snippet_original=db.make_snippet(entry['original_text'], query),
+                     snippet_translated=db.make_snippet(entry['translated_text'], query))
+                for entry in entries], next_cursor
+
+    def iter_history(self, filter_type=None, query=None, page_size=200):
+        """
+        翻訳履歴を新しい順に1件ずつ返すイテレータ（ページ単位で読み込む）
+        """
+        cursor = None
+        while True:
+            entries, cursor = self.get_history_page(page_size, cursor, filter_type, query)
+            yield from entries
+            if cursor is None:
+                return
+
+    def get_entry(self, entry_id):
+        """
+        IDを指定して履歴エントリを取得する（SQLiteモードのみ。レガシーモードはNone）
+        """
+        if USE_SQLITE and _db_available and entry_id is not None:
+            from . import dictionary_db as db
+            return db.get_history_entry(entry_id)
+        return None
+
+    def delete_entry(self, entry):
+        """
+        履歴エントリを削除する
+
+        Parameters:
+        entry (dict): 削除するエントリ（SQLiteモードでは 'id'、未書き込みのエントリはキーで特定）
+        """
+        if USE_SQLITE and _db_available:
+            from . import dictionary_db as db
+            if entry.get('id') is not None:
+                return db.delete_history_entry(entry['id'])
+            # 未書き込みのエントリは書き込んでからキーで削除
+            self.flush()
+            cached = db.find_cached_translation(entry['original_text'], entry['source_lang'],
+                                                entry['translation_type'])
+            return db.delete_history_entry(cached['id']) if cached else False
+
+        # レガシーモード
+        key = _entry_key(entry)
+        self.history = [e for e in self.history if _entry_key(e) != key]
+        self.save_history()
+        return True
+
+    def get_history_count(self):
+        """翻訳履歴の件数（未書き込みのエントリを含む）"""
+        if USE_SQLITE and _db_available:
+            from . import dictionary_db as db
+            return db.get_history_count() + len(self._write_queue.pending_entries())
+        return len(self.history)
+
+    def get_changes(self, since_version):
+        """
+        指定したバージョン以降の変更を取得する（検索インデックスの差分更新用）
+
+        Parameters:
+        since_version: 前回取得したバージョン（Noneで差分なし）
+
+        Returns:
+        tuple: (現在のバージョン, [(履歴ID, エントリ。削除済みはNone), ...])。
+               差分を取れない場合（初回・レガシーモードでの変更）はリストの代わりにNone
+        """
+        if USE_SQLITE and _db_available:
+            from . import dictionary_db as db
+            self.flush()
+            return db.get_history_changes(since_version)
+
+        # レガシーモードは変更フィードがないため、状態が変わったら全件を学習し直す
+        latest = self.history[0]['timestamp'] if self.history else ''
+        version = f"json:{len(self.history)}:{latest}"
+        return version, ([] if version == since_version else None)
+
     def search_history(self, query):
         """
         翻訳履歴を検索する
@@ -184,7 +476,7 @@ class TranslationHistory:
         # SQLiteモード
         if USE_SQLITE and _db_available:
             from . import dictionary_db as db
-            return db.search_history(query)
+            return self._merge_pending(self._matching_pending(query=query), db.search_history(query))
 
         # レガシーモード
         query = query.lower()
@@ -207,6 +499,14 @@ class TranslationHistory:
         # SQLiteモード
         if USE_SQLITE and _db_available:
             from . import dictionary_db as db
+            if translation_type is not None:
+                pending = self._write_queue.find((original_text, source_lang, translation_type))
+                if pending:
+                    return pending
+            else:
+                for entry in self._write_queue.pending_entries():
+                    if entry['original_text'] == original_text and entry['source_lang'] == source_lang:
+                        return entry
             return db.find_cached_translation(original_text, source_lang, translation_type)
 
         # レガシーモード
@@ -221,9 +521,256 @@ class TranslationHistory:
         # SQLiteモード
         if USE_SQLITE and _db_available:
             from . import dictionary_db as db
-            db.clear_history()
+            self._write_queue.clear(db.clear_history)
             return
 
         # レガシーモード
         self.history = []
         self.save_history()
+
+    def flush(self):
+        """書き込みキューの内容をすぐにデータベースへ書き込む"""
+        if self._write_queue is not None:
+            return self._write_queue.flush()
+        return 0
+
+    def close(self):
+        """終了処理（書き込みキューを書き切る）"""
+        if self._write_queue is not None:
+            self._write_queue.close()
+
+    def _matching_pending(self, filter_type=None, query=None):
+        """条件に一致する未書き込みのエントリ（新しい順）"""
+        lowered = query.lower() if query else None
+        return [entry for entry in self._write_queue.pending_entries()
+                if (not filter_type or entry['translation_type'] == filter_type) and
+                (not lowered or lowered in entry['original_text'].lower() or
+                 lowered in entry['translated_text'].lower())]
+
+    @staticmethod
+    def _merge_pending(pending, stored, max_items=None):
+        """未書き込みのエントリをDBの結果の先頭に重ねる（同じキーはキュー側を優先）"""
+        if not pending:
+            return stored[:max_items] if max_items else stored
+        keys = {_entry_key(entry) for entry in pending}
+        merged = pending + [entry for entry in stored if _entry_key(entry) not in keys]
+        return merged[:max_items] if max_items else merged
+
+
+def _summarize(text, length=SUMMARY_LENGTH):
+    return text[:length] + ('...' if len(text) > length else '')
+
+
+class HistoryPageModel:
+    """
+    履歴ダイアログ用のページ単位のデータモデル
+
+    一覧には最大 max_pages ページ分の行だけを保持する。
+    末尾側へ読み進めると先頭側のページを破棄し、その取得カーソルを覚えておく。
+    先頭側へ戻るときは覚えておいたカーソルでページを再取得する。
+    検索語があるときは関連度順に並べ、一覧には検索語の周辺の抜粋を表示する。
+    行は一覧用の要約だけを持ち、詳細は get_entry でIDから取得する
+    （IDのない未書き込みエントリやレガシーモードのエントリはそのまま保持する）。
+    """
+
+    def __init__(self, history, page_size=HISTORY_DIALOG_PAGE_SIZE, max_pages=HISTORY_WINDOW_PAGES):
+        self.history = history
+        self.page_size = page_size
+        self.max_pages = max(2, max_pages)
+        self.filter_type = None
+        self.query = None
+        self.pages = []     # [{'cursor': 取得に使ったカーソル, 'next': 次ページのカーソル, 'rows': [...]}]
+        self.dropped = []   # 先頭側で破棄したページの取得カーソル（スタック）
+
+    @property
+    def rows(self):
+        """保持している行（新しい順）"""
+        return [row for page in self.pages for row in page['rows']]
+
+    @property
+    def has_older(self):
+        return bool(self.pages) and self.pages[-1]['next'] is not None
+
+    @property
+    def has_newer(self):
+        return bool(self.dropped)
+
+    def _fetch(self, cursor):
+        if self.query:
+            # 検索中は関連度順（抜粋は検索語の周辺）
+            entries, next_cursor = self.history.search_history_page(
+                self.query, self.page_size, cursor, self.filter_type, text_length=SUMMARY_LENGTH + 1
+            )
+        else:
+            entries, next_cursor = self.history.get_history_page(
+                self.page_size, cursor, self.filter_type, text_length=SUMMARY_LENGTH + 1
+            )
+        rows = []
+        for entry in entries:
+            entry_id = entry.get('id')
+            rows.append({
+                'id': entry_id,
+                'timestamp': entry['timestamp'],
+                'original': entry.get('snippet_original') or _summarize(entry['original_text']),
+                'translated': entry.get('snippet_translated') or _summarize(entry['translated_text']),
+                'translation_type': entry['translation_type'],
+                'entry': None if entry_id is not None else entry
+            })
+        return {'cursor': cursor, 'next': next_cursor, 'rows': rows}
+
+    def reset(self, filter_type=None, query=None):
+        """
+        条件を設定して先頭ページを読み込む
+
+        Returns:
+        list: 読み込んだ行
+        """
+        self.filter_type = filter_type
+        self.query = query
+        self.dropped = []
+        self.pages = [self._fetch(None)]
+        return self.pages[0]['rows']
+
+    def load_older(self):
+        """
+        末尾側に次のページを読み込む
+
+        Returns:
+        tuple: (追加した行, 先頭側から破棄した行数)
+        """
+        if not self.has_older:
+            return [], 0
+        page = self._fetch(self.pages[-1]['next'])
+        if not page['rows']:
+            # ちょうどページ境界で終わっていた
+            self.pages[-1]['next'] = None
+            return [], 0
+        self.pages.append(page)
+        removed = 0
+        if len(self.pages) > self.max_pages:
+            dropped_page = self.pages.pop(0)
+            self.dropped.append(dropped_page['cursor'])
+            removed = len(dropped_page['rows'])
+        return page['rows'], removed
+
+    def load_newer(self):
+        """
+        先頭側に破棄済みのページを再読み込みする
+
+        Returns:
+        tuple: (追加した行, 末尾側から破棄した行数)
+        """
+        if not self.has_newer:
+            return [], 0
+        page = self._fetch(self.dropped.pop())
+        self.pages.insert(0, page)
+        removed = 0
+        if len(self.pages) > self.max_pages:
+            removed = len(self.pages.pop()['rows'])
+        return page['rows'], removed
+
+    def get_entry(self, row):
+        """行の詳細（全文）を取得する"""
+        if row['entry'] is not None:
+            return row['entry']
+        return self.history.get_entry(row['id'])
+
+
+class _SearchCancelled(Exception):
+    """取り消された問い合わせが結果を返そうとした"""
+
+
+class HistorySearchRunner:
+    """
+    履歴の問い合わせを1本のワーカースレッドで順に実行する
+
+    search() は新しい世代を始め、実行中・待機中の古い問い合わせを取り消す
+    （SQLiteの progress handler で実行中のクエリも中断する）。
+    submit() は現在の世代の後ろに問い合わせを追加する（スクロールでの追加読み込みなど）。
+    タスクは emit(result) で結果を何回でも返せ、結果は schedule 経由で
+    on_result に渡される（UIスレッドへの受け渡しは schedule が行う）。
+    取り消された世代の結果は on_result に渡されない。
+    """
+
+    def __init__(self, schedule):
+        """
+        Parameters:
+        schedule (callable): schedule(callback) で callback をUIスレッドで実行する関数
+        """
+        self.schedule = schedule
+        self._cond = threading.Condition()
+        self._tasks = deque()
+        self._generation = 0
+        self._cancel = threading.Event()
+        self._thread = None
+        self._closed = False
+
+    def search(self, task, on_result):
+        """古い問い合わせを取り消して task を実行する"""
+        with self._cond:
+            self._cancel.set()
+            self._cancel = threading.Event()
+            self._generation += 1
+            self._tasks.clear()
+            self._enqueue(task, on_result)
+
+    def submit(self, task, on_result):
+        """現在の世代の問い合わせとして task を追加する"""
+        with self._cond:
+            self._enqueue(task, on_result)
+
+    def cancel(self):
+        """実行中・待機中の問い合わせをすべて取り消す"""
+        with self._cond:
+            self._cancel.set()
+            self._cancel = threading.Event()
+            self._generation += 1
+            self._tasks.clear()
+
+    def close(self):
+        """取り消してワーカースレッドを終了する"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.cancel()
+
+    def _enqueue(self, task, on_result):
+        """_cond 内で呼ぶ"""
+        if self._closed:
+            return
+        self._tasks.append((self._generation, self._cancel, task, on_result))
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="history-search", daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def _deliver(self, generation, on_result, result):
+        """UIスレッドで実行: 世代が変わっていなければ結果を渡す"""
+        if generation == self._generation and not self._closed:
+            on_result(result)
+
+    def _run(self):
+        """ワーカーループ"""
+        while True:
+            with self._cond:
+                while not self._closed and not self._tasks:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                generation, cancel_event, task, on_result = self._tasks.popleft()
+
+            def emit(result, generation=generation, cancel_event=cancel_event, on_result=on_result):
+                if cancel_event.is_set():
+                    raise _SearchCancelled()
+                self.schedule(lambda: self._deliver(generation, on_result, result))
+
+            guard = nullcontext()
+            if USE_SQLITE and _db_available:
+                from . import dictionary_db as db
+                guard = db.cancellable_reads(cancel_event)
+            try:
+                with guard:
+                    task(emit)
+            except Exception as e:
+                if not cancel_event.is_set():
+                    print(f"履歴検索エラー: {e}")
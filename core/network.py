@@ -1,12 +1,185 @@
-# ClipboardTranslator v1.00 - Network Utilities
+# ClipboardTranslator v1.20 - Network Utilities
+"""
+インターネット接続の状態
+
+接続の確認（8.8.8.8:53 へのTCP接続）は最大で数秒かかるため、ホットキーのたびには行わない。
+ConnectivityMonitor が状態をキャッシュし、
+- 実際のAPI呼び出しの成否で状態を更新する
+- 状態が古くなったらバックグラウンドで確認する（オフラインの間は間隔を延ばしながら）
+is_connected() は待たずに、最後に分かっている状態を返す（未確認・古いオフラインの状態ならオンラインとみなす）。
+"""
+import time
 import socket
+import threading
 
+PROBE_ADDRESS = ("8.8.8.8", 53)
+PROBE_TIMEOUT = 3
 
-def is_connected():
-    """インターネット接続を確認"""
+# 状態を使い回す秒数（オンライン / オフライン）
+ONLINE_TTL = 30
+OFFLINE_TTL = 5
+# オフラインの間の定期確認の間隔（失敗が続くと倍にしていく）
+BACKOFF_MIN = 5
+BACKOFF_MAX = 300
+
+
+def probe_connection(address=PROBE_ADDRESS, timeout=PROBE_TIMEOUT):
+    """TCP接続できるか確認する（ブロックする）"""
     try:
-        socket.create_connection(("8.8.8.8", 53), timeout=3)
-        return True
+        with socket.create_connection(address, timeout=timeout):
+            return True
     except OSError:
-        pass
-    return False
+        return False
+
+
+class ConnectivityMonitor:
+    """インターネット接続の状態をキャッシュする"""
+
+    def __init__(self, probe=probe_connection, online_ttl=ONLINE_TTL, offline_ttl=OFFLINE_TTL,
+                 backoff_min=BACKOFF_MIN, backoff_max=BACKOFF_MAX):
+        """
+        Parameters:
+        probe (callable): 接続を確認する関数（引数なし、bool を返す）
+        online_ttl (float): オンラインの状態を使い回す秒数
+        offline_ttl (float): オフラインの状態を使い回す秒数
+        backoff_min (float): オフラインの間の定期確認の最初の間隔（秒）
+        backoff_max (float): オフラインの間の定期確認の最大の間隔（秒）
+        """
+        self._probe = probe
+        self.online_ttl = online_ttl
+        self.offline_ttl = offline_ttl
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._online = None       # None: 未確認
+        self._updated_at = 0.0    # time.monotonic()
+        self._source = None       # 'probe' / 'api'
+        self._failures = 0        # 連続したオフライン判定の回数
+        self._probe_thread = None
+        self._loop_thread = None
+        self._stop = threading.Event()
+        self._listeners = []
+
+    def _is_stale(self, now):
+        ttl = self.online_ttl if self._online else self.offline_ttl
+        return self._online is None or now - self._updated_at > ttl
+
+    def is_connected(self):
+        """
+        接続されているか（待たない）
+
+        状態が古ければバックグラウンドで確認を始め、今は最後に分かっている状態を返す。
+        古いオフラインの状態では断らずに True を返す（復帰直後の操作を拒否しない。
+        結果は API 呼び出しの成否で記録される）。
+
+        Returns:
+        bool: 未確認・オンライン・古いオフラインの状態なら True
+        """
+        with self._lock:
+            online = self._online
+            stale = self._is_stale(time.monotonic())
+        if stale:
+            self.refresh()
+        return online is not False or stale
+
+    def refresh(self, wait=False):
+        """
+        バックグラウンドで接続を確認する（確認中なら新しく始めない）
+
+        Parameters:
+        wait (bool): 確認が終わるまで待つ
+        """
+        with self._lock:
+            if self._probe_thread is None or not self._probe_thread.is_alive():
+                self._probe_thread = threading.Thread(target=self._run_probe, name="connectivity-probe",
+                                                      daemon=True)
+                self._probe_thread.start()
+            thread = self._probe_thread
+        if wait:
+            thread.join()
+
+    def _run_probe(self):
+        self._set_state(bool(self._probe()), 'probe')
+
+    def report_success(self):
+        """APIの応答を受け取った（オンライン）"""
+        self._set_state(True, 'api')
+
+    def report_failure(self):
+        """APIに接続できなかった（オフラインとみなす）"""
+        self._set_state(False, 'api')
+
+    def _set_state(self, online, source):
+        with self._lock:
+            changed = online != self._online
+            self._online = online
+            self._updated_at = time.monotonic()
+            self._source = source
+            self._failures = 0 if online else self._failures + 1
+            listeners = list(self._listeners)
+        if changed:
+            print(f"インターネット接続: {'オンライン' if online else 'オフライン'}（{source}）")
+            for listener in listeners:
+                try:
+                    listener(online)
+                except Exception as e:
+                    print(f"接続状態の通知エラー: {e}")
+
+    def add_listener(self, callback):
+        """状態が変わったときに callback(online) を呼ぶ（確認したスレッドから呼ばれる）"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def next_interval(self):
+        """次の定期確認までの秒数（オフラインが続くほど長く）"""
+        with self._lock:
+            if self._online is not False:
+                return self.online_ttl
+            return min(self.backoff_max, self.backoff_min * 2 ** (self._failures - 1))
+
+    def start(self):
+        """定期確認のスレッドを開始する"""
+        with self._lock:
+            if self._loop_thread is not None and self._loop_thread.is_alive():
+                return
+            self._stop.clear()
+            self._loop_thread = threading.Thread(target=self._loop, name="connectivity-monitor", daemon=True)
+            self._loop_thread.start()
+
+    def stop(self):
+        """定期確認のスレッドを止める"""
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                stale = self._is_stale(time.monotonic())
+                offline = self._online is False
+            # オフラインの間は間隔ごとに必ず確認する（API呼び出しがないと状態が更新されないため）
+            if stale or offline:
+                self._run_probe()
+            self._stop.wait(self.next_interval())
+
+    def get_state(self):
+        """
+        接続状態（診断用）
+
+        Returns:
+        dict: {online: True/False/None, age: 最終更新からの秒数, source, failures}
+        """
+        with self._lock:
+            return {
+                'online': self._online,
+                'age': time.monotonic() - self._updated_at if self._online is not None else None,
+                'source': self._source,
+                'failures': self._failures,
+            }
+
+
+# アプリ全体で共有するモニター
+monitor = ConnectivityMonitor()
+
+
+def is_connected():
+    """インターネット接続を確認（キャッシュした状態を返し、待たない）"""
+    return monitor.is_connected()
@@ -0,0 +1,180 @@
+# ClipboardTranslator v1.20 - Sentence Segmentation Module
+"""
+文単位の翻訳
+
+テキストを文に分割し、文ごとに翻訳キャッシュを引いて、キャッシュにない文だけを
+まとめて翻訳APIに送る（DeepLは1回のリクエストで複数の text を受け付ける）。
+段落の一部だけを書き換えたテキストでも、変わっていない文はキャッシュから返る。
+長いテキストは文の塊ごとにリクエストを分けるため、文字数の上限で打ち切らない。
+"""
+import re
+
+# 1回のリクエストに入れる最大の文数（DeepLの上限は50）と文字数
+BATCH_MAX_TEXTS = 50
+BATCH_MAX_CHARS = 5000
+
+# 文の間に空白を入れない言語
+NO_SPACE_LANGS = ('JA', 'ZH', 'ZH-HANS', 'ZH-HANT')
+
+# 和文の文末（空白がなくても区切る）と欧文の文末（後ろに空白か行末）
+_SENTENCE_END = re.compile(r'[。！？]+[」』）】〕]*|[.!?]+["\')\]]*(?=\s|$)')
+_LINE_BREAK = re.compile(r'([ \t　]*\n\s*)')
+# ピリオドで文が終わらない略語（小文字で比較）
+_ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e', 'no', 'inc', 'ltd',
+    'co', 'corp', 'dept', 'fig', 'approx', 'u.s', 'u.k', 'a.m', 'p.m',
+}
+
+
+def _is_abbreviation(line, period_index):
+    """period_index のピリオドが略語・イニシャルの一部か"""
+    word = re.search(r'([A-Za-z.]+)$', line[:period_index])
+    if not word:
+        return False
+    word = word.group(1).lower().strip('.')
+    return word in _ABBREVIATIONS or len(word) == 1
+
+
+def _split_line(line):
+    """1行を [(文, 後ろの空白), ...] に分割する"""
+    segments = []
+    start = 0
+    for match in _SENTENCE_END.finditer(line):
+        end = match.end()
+        if match.group()[0] in '.!?':
+            if match.group()[0] == '.' and len(match.group()) == 1 and _is_abbreviation(line, match.start()):
+                continue
+            rest = line[end:].lstrip()
+            if rest and rest[0].islower():
+                continue  # 小文字で続くなら文の途中
+        whitespace_end = end + len(line[end:]) - len(line[end:].lstrip())
+        if end > start:
+            segments.append((line[start:end], line[end:whitespace_end]))
+        start = whitespace_end
+    if start < len(line):
+        segments.append((line[start:], ''))
+    return segments
+
+
+def split_sentences(text):
+    """
+    テキストを文に分割する（改行・和文の「。！？」・欧文の「.!?」で区切る）
+
+    Parameters:
+    text (str): 入力テキスト
+
+    Returns:
+    tuple: (先頭の空白, [(文, 後ろの空白・改行), ...])。連結すると元のテキストに戻る
+    """
+    body = text.lstrip()
+    prefix = text[:len(text) - len(body)]
+    segments = []
+    parts = _LINE_BREAK.split(body)
+    for i in range(0, len(parts), 2):
+        line = parts[i]
+        separator = parts[i + 1] if i + 1 < len(parts) else ''
+        stripped = line.rstrip()
+        pieces = _split_line(stripped)
+        if not pieces:
+            if segments:
+                sentence, whitespace = segments[-1]
+                segments[-1] = (sentence, whitespace + line + separator)
+            else:
+                prefix += line + separator
+            continue
+        sentence, whitespace = pieces[-1]
+        pieces[-1] = (sentence, whitespace + line[len(stripped):] + separator)
+        segments.extend(pieces)
+    return prefix, segments
+
+
+def join_sentences(prefix, segments, target_lang):
+    """
+    訳した文を連結する
+
+    改行は元のまま残す。文の間の空白は翻訳先の言語に合わせる
+    （日本語・中国語なら詰め、それ以外なら空白1つ）。
+
+    Parameters:
+    prefix (str): 先頭の空白
+    segments (list): [(訳した文, 元の文の後ろの空白), ...]
+    target_lang (str): 翻訳先言語コード
+    """
+    no_space = target_lang.upper() in NO_SPACE_LANGS
+    result = [prefix]
+    for i, (sentence, separator) in enumerate(segments):
+        result.append(sentence)
+        if '\n' not in separator and i < len(segments) - 1:
+            separator = '' if no_space else (separator or ' ')
+        result.append(separator)
+    return ''.join(result)
+
+
+def _batches(texts, max_texts, max_chars):
+    """文を1回のリクエストに入る塊に分ける"""
+    batch, chars = [], 0
+    for text in texts:
+        if batch and (len(batch) >= max_texts or chars + len(text) > max_chars):
+            yield batch
+            batch, chars = [], 0
+        batch.append(text)
+        chars += len(text)
+    if batch:
+        yield batch
+
+
+def translate_segmented(text, source_lang, target_lang, translate_batch, cache=None, provider='deepl',
+                        max_chars=BATCH_MAX_CHARS, max_texts=BATCH_MAX_TEXTS, on_progress=None):
+    """
+    文ごとにキャッシュを引き、キャッシュにない文だけをまとめて翻訳する
+
+    新しく翻訳した文はキャッシュに書き込まずに返す。呼び出し側が訳文を
+    クリップボードへ渡したあとで cache.put_many によりまとめて保存する。
+
+    Parameters:
+    text (str): 翻訳するテキスト
+    source_lang (str): ソース言語
+    target_lang (str): 翻訳先言語
+    translate_batch (callable): (文のリスト, 翻訳先言語) → 訳文のリスト（失敗時は None）
+    cache: TranslationCache（Noneでキャッシュなし）
+    provider (str): キャッシュのプロバイダー名
+    max_chars (int): 1回のリクエストの最大文字数
+    max_texts (int): 1回のリクエストの最大文数
+    on_progress (callable): 塊を翻訳するたびに on_progress(翻訳済みの文数, 翻訳する文数) を呼ぶ
+
+    Returns:
+    tuple: (訳文。失敗時は None, 統計 {segments, cached, translated, requests},
+            新しく翻訳した [(文, 訳文), ...])
+    """
+    prefix, segments = split_sentences(text)
+    translations = {}
+    stats = {'segments': len(segments), 'cached': 0, 'translated': 0, 'requests': 0}
+
+    missing = []
+    new_pairs = []
+    for sentence, _ in segments:
+        if sentence in translations or sentence in missing:
+            continue
+        cached = cache.get(sentence, source_lang, target_lang, provider) if cache else None
+        if cached is not None:
+            translations[sentence] = cached
+            stats['cached'] += 1
+        else:
+            missing.append(sentence)
+
+    done = 0
+    for batch in _batches(missing, max_texts, max_chars):
+        results = translate_batch(batch, target_lang)
+        stats['requests'] += 1
+        if not results or len(results) != len(batch):
+            return None, stats, new_pairs
+        for sentence, translated in zip(batch, results):
+            translations[sentence] = translated
+            new_pairs.append((sentence, translated))
+        done += len(batch)
+        stats['translated'] = done
+        if on_progress:
+            on_progress(done, len(missing))
+
+    return join_sentences(prefix, [(translations[sentence], separator) for sentence, separator in segments],
+                          target_lang), stats, new_pairs
@@ -2,9 +2,10 @@
 import tempfile
 import os
 import time
-import socket
 import threading
 
+from .network import is_connected as network_is_connected
+
 try:
     import pygame
     from gtts import gTTS
@@ -45,12 +46,8 @@ class TextToSpeechHandler:
             self.error_callback(message)
 
     def is_connected(self):
-        """インターネット接続を確認する"""
-        try:
-            socket.create_connection(("8.8.8.8", 53), timeout=3)
-            return True
-        except OSError:
-            return False
+        """インターネット接続を確認する（共有の接続状態を使い、待たない）"""
+        return network_is_connected()
 
     def detect_language(self, text):
         """
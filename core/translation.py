@@ -3,11 +3,199 @@ import requests
 import json
 import sys
 import os
+import time
+import threading
+from requests.adapters import HTTPAdapter
 
 # 親ディレクトリをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.constants import DEEPL_URL, CLAUDE_API_URL, TRANSLATION_LANGUAGES
 from config.settings import config
+from core.network import monitor as connectivity
+
+
+# ========== HTTP接続の共有（プロバイダーごとのセッション） ==========
+
+# プロバイダーごとに保持する接続数（翻訳・辞書・家庭教師の同時リクエスト分）
+# これを超える同時リクエストは接続が空くのを待つ
+HTTP_POOL_SIZE = 4
+# 事前接続のタイムアウト（秒）
+PREWARM_TIMEOUT = 5
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_timing = threading.local()  # このスレッドのリクエストで接続（TCP+TLS）にかかった時間
+_last_timings = {}  # プロバイダー → 直近のリクエストの時間の内訳
+
+try:
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _TimedHTTPConnection(HTTPConnection):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            _timing.connect = getattr(_timing, 'connect', 0.0) + time.perf_counter() - start
+
+    class _TimedHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            _timing.connect = getattr(_timing, 'connect', 0.0) + time.perf_counter() - start
+
+    class _TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = _TimedHTTPConnection
+
+    class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = _TimedHTTPSConnection
+
+    _TIMED_POOL_CLASSES = {'http': _TimedHTTPConnectionPool, 'https': _TimedHTTPSConnectionPool}
+except ImportError:
+    _TIMED_POOL_CLASSES = None
+
+
+class _TimedAdapter(HTTPAdapter):
+    """新しい接続を張るのにかかった時間を計測するアダプター"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if _TIMED_POOL_CLASSES:
+            self.poolmanager.pool_classes_by_scheme = dict(_TIMED_POOL_CLASSES)
+
+
+def get_session(provider):
+    """
+    プロバイダーのHTTPセッション（keep-aliveで接続を再利用する）
+
+    Parameters:
+    provider (str): 'deepl' / 'claude' など
+
+    Returns:
+    requests.Session: セッション
+    """
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            adapter = _TimedAdapter(pool_connections=2, pool_maxsize=HTTP_POOL_SIZE, pool_block=True)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[provider] = session
+        return session
+
+
+def close_sessions():
+    """すべてのセッションの接続を閉じる"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+class RequestTiming:
+    """1回のリクエストの時間の内訳（接続・最初の応答・最初のトークン・合計）"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.start = time.perf_counter()
+        self.connect = 0.0   # 新しい接続（TCP+TLS）にかかった時間。再利用なら0
+        self.ttfb = None     # 応答ヘッダーを受け取るまで
+        self.ttft = None     # ストリーミングで最初のテキストを受け取るまで
+        self.total = None    # 応答本文を読み終えるまで
+        _timing.connect = 0.0
+
+    def response_started(self, response=None):
+        # requests は応答ヘッダーの受信までを elapsed に入れる（本文の読み込み前）
+        self.ttfb = response.elapsed.total_seconds() if response is not None else time.perf_counter() - self.start
+        self.connect = getattr(_timing, 'connect', 0.0)
+
+    def token_received(self):
+        """ストリーミングのテキストを受け取った（最初の1回だけ記録）"""
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.start
+
+    def finish(self, status=None):
+        """計測を終えてログに出す（status は HTTPステータス、Noneで接続エラー）"""
+        self.total = time.perf_counter() - self.start
+        if self.ttfb is None:
+            self.response_started()
+        _last_timings[self.provider] = self.as_dict()
+        if status is None:
+            print(f"[HTTP] {self.provider} 接続エラー: 合計 {self.total * 1000:.0f}ms")
+            return
+        reused = "再利用" if self.connect == 0.0 else f"{self.connect * 1000:.0f}ms"
+        first_token = f" / 最初のトークン {self.ttft * 1000:.0f}ms" if self.ttft is not None else ""
+        print(f"[HTTP] {self.provider} {status}: "
+              f"接続 {reused} / 最初の応答 {self.ttfb * 1000:.0f}ms{first_token} / 合計 {self.total * 1000:.0f}ms")
+
+    def as_dict(self):
+        return {'connect': self.connect, 'ttfb': self.ttfb, 'ttft': self.ttft, 'total': self.total,
+                'reused': self.connect == 0.0}
+
+
+def get_last_timings():
+    """
+    プロバイダーごとの直近のリクエストの時間の内訳（診断用）
+
+    Returns:
+    dict: プロバイダー → {connect, ttfb, ttft, total, reused}
+    """
+    return dict(_last_timings)
+
+
+def prewarm_connections(providers=None):
+    """
+    APIサーバーへの接続（DNS・TCP・TLS）を事前に張っておく（バックグラウンドスレッド）
+
+    Parameters:
+    providers (list): プロバイダーのリスト（Noneで APIキーが設定されているもの）
+
+    Returns:
+    threading.Thread or None: 事前接続のスレッド（対象がなければ None）
+    """
+    if providers is None:
+        providers = [provider for provider, key in (('deepl', 'deepl_api_key'), ('claude', 'claude_api_key'))
+                     if config.get('Settings', key, fallback='')]
+    if not providers:
+        return None
+
+    def prewarm():
+        for provider in providers:
+            try:
+                # 応答の内容は使わない（認証エラーなどでも接続はプールに残る）
+                get_session(provider).head(_provider_url(provider), timeout=PREWARM_TIMEOUT)
+            except requests.exceptions.RequestException as e:
+                print(f"事前接続エラー ({provider}): {e}")
+
+    thread = threading.Thread(target=prewarm, name="http-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def _provider_url(provider):
+    return {'deepl': DEEPL_URL, 'claude': CLAUDE_API_URL}[provider]
+
+
+def _post(provider, url, **kwargs):
+    """
+    プロバイダーのセッションでPOSTする（応答ヘッダーを受け取った時点で返る）
+
+    Returns:
+    tuple: (requests.Response, RequestTiming)。本文を読み終えたら timing.finish(status) を呼ぶ
+    """
+    timing = RequestTiming(provider)
+    try:
+        response = get_session(provider).post(url, **kwargs)
+    except requests.exceptions.RequestException as e:
+        timing.finish()
+        # 接続できなかった場合は接続状態に反映する（応答が遅いだけの場合は除く）
+        if isinstance(e, requests.exceptions.ConnectionError):
+            connectivity.report_failure()
+        raise
+    timing.response_started(response)
+    connectivity.report_success()
+    return response, timing
 
 
 # DeepL API言語コードマッピング（v1.20: 多言語対応）
@@ -29,6 +217,21 @@ def translate_with_deepl(text, target_lang):
     Returns:
         str: 翻訳されたテキスト、エラー時はNone
     """
+    results = translate_with_deepl_batch([text], target_lang)
+    return results[0] if results else None
+
+
+def translate_with_deepl_batch(texts, target_lang):
+    """
+    DeepL APIで複数のテキストを1回のリクエストで翻訳
+
+    Parameters:
+        texts (list): 翻訳するテキストのリスト（DeepLの上限は50件）
+        target_lang (str): 翻訳先言語コード
+
+    Returns:
+        list: 訳文のリスト（texts と同じ順）、エラー時はNone
+    """
     try:
         api_key = config.get('Settings', 'deepl_api_key', fallback='')
         if not api_key:
@@ -43,17 +246,15 @@ def translate_with_deepl(text, target_lang):
             'Content-Type': 'application/x-www-form-urlencoded'
         }
 
-        data = {
-            'text': text,
-            'target_lang': target_lang_code
-        }
+        # text を繰り返して送ると、訳文は同じ順で返る
+        data = [('text', text) for text in texts] + [('target_lang', target_lang_code)]
 
-        response = requests.post(DEEPL_URL, headers=headers, data=data, timeout=10)
+        response, timing = _post('deepl', DEEPL_URL, headers=headers, data=data, timeout=10)
+        timing.finish(response.status_code)
 
         if response.status_code == 200:
             response_data = response.json()
-            translated_text = response_data['translations'][0]['text']
-            return translated_text
+            return [item['text'] for item in response_data['translations']]
         else:
             print(f"DeepL API エラー: ステータスコード {response.status_code}")
             print(f"レスポンス: {response.text}")
@@ -101,7 +302,85 @@ CLAUDE_MODELS = {
 DEFAULT_CLAUDE_MODEL = 'sonnet'
 
 
-def query_claude_api(word, prompt_template, api_key, model_type=None):
+class ClaudeAPIError(Exception):
+    """Claude APIがエラーのステータスを返した"""
+
+    def __init__(self, status_code, body):
+        super().__init__(f"ステータスコード {status_code}")
+        self.status_code = status_code
+        self.body = body
+
+
+def stream_claude_api(word, prompt_template, api_key, model_type=None):
+    """
+    Claude APIの応答テキストを届いた順に返す（ストリーミング）
+
+    Parameters:
+    word (str): 調べたい単語
+    prompt_template (str): プロンプトテンプレート。{word}は実際の単語に置換される
+    api_key (str): Claude API キー
+    model_type (str): モデルタイプ ('sonnet', 'haiku', 'opus')。Noneの場合はデフォルト
+
+    Yields:
+    str: 応答テキストの断片（content_block_delta ごと）
+
+    Raises:
+    ClaudeAPIError: エラーのステータスが返った場合
+    requests.exceptions.RequestException: 通信エラー
+    """
+    prompt = prompt_template.format(word=word)
+
+    # モデル選択
+    if model_type and model_type in CLAUDE_MODELS:
+        model = CLAUDE_MODELS[model_type]
+    else:
+        model = CLAUDE_MODELS[DEFAULT_CLAUDE_MODEL]
+
+    headers = {
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json"
+    }
+
+    data = {
+        "model": model,
+        "max_tokens": 1000,
+        "stream": True,
+        "messages": [
+            {"role": "user", "content": prompt}
+        ]
+    }
+
+    response, timing = _post('claude', CLAUDE_API_URL, headers=headers, json=data, stream=True, timeout=15)
+    with response:
+        if response.status_code != 200:
+            timing.finish(response.status_code)
+            raise ClaudeAPIError(response.status_code, response.text)
+
+        try:
+            # chunk_size=None: 届いた分ごとに読む（512バイトたまるまで待たない）
+            for line in response.iter_lines(chunk_size=None):
+                if not line.startswith(b'data: '):
+                    continue
+                json_str = line[6:].decode('utf-8')
+                if json_str == "[DONE]":
+                    continue
+
+                try:
+                    event = json.loads(json_str)
+                except json.JSONDecodeError:
+                    print(f"JSONパースエラー: {json_str}")
+                    continue
+
+                delta = event.get('delta') or {}
+                if event.get('type') == 'content_block_delta' and 'text' in delta:
+                    timing.token_received()
+                    yield delta['text']
+        finally:
+            timing.finish(response.status_code)
+
+
+def query_claude_api(word, prompt_template, api_key, model_type=None, on_delta=None):
     """
     Claude APIを使用して単語の意味や使い方を取得する（ストリーミングモード）
 
@@ -110,61 +389,23 @@ def query_claude_api(word, prompt_template, api_key, model_type=None):
     prompt_template (str): プロンプトテンプレート。{word}は実際の単語に置換される
     api_key (str): Claude API キー
     model_type (str): モデルタイプ ('sonnet', 'haiku', 'opus')。Noneの場合はデフォルト
+    on_delta (callable): 応答テキストの断片を受け取るたびに on_delta(断片) を呼ぶ（呼び出し元のスレッドで）
 
     Returns:
     str: Claude APIからの応答テキスト、エラーの場合はNone
     """
     try:
-        prompt = prompt_template.format(word=word)
-
-        # モデル選択
-        if model_type and model_type in CLAUDE_MODELS:
-            model = CLAUDE_MODELS[model_type]
-        else:
-            model = CLAUDE_MODELS[DEFAULT_CLAUDE_MODEL]
-
-        headers = {
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01",
-            "content-type": "application/json"
-        }
-
-        data = {
-            "model": model,
-            "max_tokens": 1000,
-            "stream": True,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ]
-        }
-
-        result_text = ""
-        with requests.post(CLAUDE_API_URL, headers=headers, json=data, stream=True, timeout=15) as response:
-            if response.status_code != 200:
-                print(f"Claude API エラー: ステータスコード {response.status_code}")
-                print(f"レスポンス: {response.text}")
-                return None
-
-            for line in response.iter_lines():
-                if line:
-                    line_text = line.decode('utf-8')
-
-                    if line_text.startswith('data: '):
-                        json_str = line_text[6:]
-
-                        if json_str == "[DONE]":
-                            continue
-
-                        try:
-                            data = json.loads(json_str)
-
-                            if data.get('type') == 'content_block_delta' and 'delta' in data and 'text' in data['delta']:
-                                result_text += data['delta']['text']
-                        except json.JSONDecodeError:
-                            print(f"JSONパースエラー: {json_str}")
-
-            return result_text
-
+        parts = []
+        for delta in stream_claude_api(word, prompt_template, api_key, model_type):
+            parts.append(delta)
+            if on_delta:
+                on_delta(delta)
+        return ''.join(parts)
+
+    except ClaudeAPIError as e:
+        print(f"Claude API エラー: ステータスコード {e.status_code}")
+        print(f"レスポンス: {e.body}")
+        return None
     except requests.exceptions.RequestException as e:
         print(f"Claude API リクエストエラー: {e}")
         return None
@@ -0,0 +1,281 @@
+# ClipboardTranslator v1.20 - Translation Cache Module
+"""
+翻訳結果のキャッシュ
+
+キーは (原文, ソース言語, 翻訳先言語, プロバイダー, プロンプト版)。
+表示用の翻訳履歴とは独立しており、TTL と件数上限（最終ヒットが古い順に削除）を持つ。
+メモリ上のLRUを前段に置き、SQLiteの translation_cache テーブルを後段に使う。
+保存はメモリに置いた時点で戻り、SQLiteへはバックグラウンドスレッドがまとめて書き込む
+（write-behind）。期限切れ・上限超過の削除は、件数の見込みが上限を超えたときと
+EXPIRE_INTERVAL ごとにだけ行う。SQLiteが使えない場合はメモリのみで動作する。
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# 既定値（設定 translation_cache_* で上書き）
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MEMORY_ENTRIES = 256
+
+# ヒット情報をDBへ反映するまでにためる件数
+TOUCH_FLUSH_THRESHOLD = 32
+
+# 保存をDBへ書き込む間隔（ミリ秒）と、間隔を待たずに書き込む件数
+CACHE_FLUSH_INTERVAL_MS = 500
+CACHE_FLUSH_MAX_ENTRIES = 32
+
+# 期限切れエントリを削除する間隔（秒）
+EXPIRE_INTERVAL = 3600
+
+
+def prompt_version(prompt_template):
+    """プロンプトテンプレートの版（内容のハッシュ）。テンプレートを変えると別キーになる"""
+    if not prompt_template:
+        return ''
+    return hashlib.sha256(prompt_template.encode('utf-8')).hexdigest()[:16]
+
+
+class TranslationCache:
+    """翻訳キャッシュ（メモリLRU + SQLite）"""
+
+    def __init__(self, ttl_days=DEFAULT_TTL_DAYS, max_entries=DEFAULT_MAX_ENTRIES,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES):
+        """
+        Parameters:
+        ttl_days (float): 有効期間（日）。0以下で無期限
+        max_entries (int): SQLiteに保持する最大件数。0以下で無制限
+        memory_entries (int): メモリに保持する最大件数
+        """
+        self.ttl_seconds = ttl_days * 86400 if ttl_days > 0 else 0
+        self.max_entries = max(0, int(max_entries))
+        self.memory_entries = max(0, int(memory_entries))
+        self._memory = OrderedDict()  # cache_key → (原文, 訳文, 作成時刻)
+        self._pending = OrderedDict()  # cache_key → DBへ未書き込みの行
+        self._touches = {}  # cache_key → (最終ヒット時刻, ヒット数)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        self._db_entries = None  # DBの件数の見込み（最初の書き込み時に数える）
+        self._last_expire = 0.0
+        self.flush_interval = CACHE_FLUSH_INTERVAL_MS / 1000
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'puts': 0, 'evictions': 0}
+
+    @staticmethod
+    def _db():
+        """SQLiteが初期化済みならdictionary_dbモジュールを返す"""
+        from . import dictionary_db as db
+        return db if db.DB_PATH is not None else None
+
+    def _min_created_at(self, now):
+        return now - self.ttl_seconds if self.ttl_seconds else 0.0
+
+    def _remember(self, key, original_text, translated_text, created_at):
+        """メモリLRUに追加（_lock 内で呼ぶ）"""
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = (original_text, translated_text, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, original_text, source_lang, target_lang, provider, prompt_version=''):
+        """
+        キャッシュを検索する
+
+        Returns:
+        str or None: キャッシュされた訳文
+        """
+        from . import dictionary_db as db_module
+        key = db_module.translation_cache_key(original_text, source_lang, target_lang,
+                                              provider, prompt_version)
+        now = time.time()
+        min_created_at = self._min_created_at(now)
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                if cached[0] == original_text and cached[2] >= min_created_at:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    self._touch(key, now)
+                    return cached[1]
+                del self._memory[key]
+            row = self._pending.get(key)
+            if row is not None and row[1] == original_text and row[7] >= min_created_at:
+                self.stats['memory_hits'] += 1
+                self._remember(key, original_text, row[6], row[7])
+                self._touch(key, now)
+                return row[6]
+
+        db = self._db()
+        row = db.get_cached_translation(key, original_text, min_created_at) if db else None
+        with self._lock:
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['db_hits'] += 1
+            self._remember(key, original_text, row['translated_text'], row['created_at'])
+            self._touch(key, now)
+        return row['translated_text']
+
+    def put(self, original_text, source_lang, target_lang, provider, translated_text,
+            prompt_version=''):
+        """訳文をキャッシュに保存する（DBへはバックグラウンドで書き込む）"""
+        self.put_many([(original_text, translated_text)], source_lang, target_lang, provider,
+                      prompt_version)
+
+    def put_many(self, pairs, source_lang, target_lang, provider, prompt_version=''):
+        """
+        複数の訳文をまとめてキャッシュに保存する
+
+        Parameters:
+        pairs (list): [(原文, 訳文), ...]
+        """
+        from . import dictionary_db as db_module
+        now = time.time()
+        rows = [(db_module.translation_cache_key(original_text, source_lang, target_lang,
+                                                 provider, prompt_version),
+                 original_text, source_lang, target_lang, provider, prompt_version,
+                 translated_text, now)
+                for original_text, translated_text in pairs]
+        if not rows:
+            return
+
+        with self._wakeup:
+            for row in rows:
+                self._remember(row[0], row[1], row[6], now)
+                self.stats['puts'] += 1
+            if self._db() is None:
+                return
+            if not self._closed:
+                for row in rows:
+                    self._pending.pop(row[0], None)
+                    self._pending[row[0]] = row
+                self._start_writer()
+                return
+
+        # 終了後に保存されたエントリは直接書き込む
+        self._write(rows)
+
+    def _start_writer(self):
+        """書き込みスレッドを起動・起床する（_lock 内で呼ぶ）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="translation-cache-writer",
+                                            daemon=True)
+            self._thread.start()
+        pending = len(self._pending) + len(self._touches)
+        if pending == 1 or len(self._pending) >= CACHE_FLUSH_MAX_ENTRIES or \
+                len(self._touches) >= TOUCH_FLUSH_THRESHOLD:
+            self._wakeup.notify()
+
+    def _touch(self, key, now):
+        """ヒットを記録（_lock 内で呼ぶ）。一定件数たまったらDBへ反映"""
+        _, count = self._touches.get(key, (now, 0))
+        self._touches[key] = (now, count + 1)
+        if len(self._touches) >= TOUCH_FLUSH_THRESHOLD and not self._closed:
+            self._start_writer()
+
+    def _write(self, rows):
+        """
+        行をDBへ書き込み、件数の見込みが上限を超えたか EXPIRE_INTERVAL が過ぎたら削除する
+
+        Returns:
+        bool: 書き込みに成功したか
+        """
+        db = self._db()
+        if db is None:
+            return True
+        added = db.put_cached_translations(rows)
+        if added < 0:
+            return False
+
+        now = time.time()
+        with self._lock:
+            if self._db_entries is not None:
+                self._db_entries += added
+            over = self._db_entries is None or 0 < self.max_entries < self._db_entries
+            expire = bool(self.ttl_seconds) and now - self._last_expire >= EXPIRE_INTERVAL
+        if over or expire:
+            evicted, entries = db.evict_cached_translations(
+                self.max_entries, self._min_created_at(now))
+            with self._lock:
+                self.stats['evictions'] += evicted
+                self._db_entries = entries if entries >= 0 else None
+                self._last_expire = now
+        return True
+
+    def flush(self):
+        """未書き込みの保存とヒット情報（最終ヒット時刻・ヒット数）をDBへ反映する"""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._pending.values())
+            if rows and self._write(rows):
+                with self._lock:
+                    # 書き込み中に置き換えられた行は残す
+                    for row in rows:
+                        if self._pending.get(row[0]) is row:
+                            del self._pending[row[0]]
+            with self._lock:
+                touches, self._touches = self._touches, {}
+            db = self._db()
+            if db and touches:
+                db.touch_cached_translations(touches)
+
+    def _run(self):
+        """バックグラウンドの書き込みループ"""
+        while True:
+            with self._wakeup:
+                while not self._closed and not self._pending and not self._touches:
+                    self._wakeup.wait()
+                if not self._closed and len(self._pending) < CACHE_FLUSH_MAX_ENTRIES and \
+                        len(self._touches) < TOUCH_FLUSH_THRESHOLD:
+                    self._wakeup.wait(self.flush_interval)
+                closed = self._closed
+            if closed:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"翻訳キャッシュ書き込みエラー: {e}")
+
+    def clear(self):
+        """キャッシュをすべて削除する"""
+        with self._flush_lock:
+            with self._lock:
+                self._memory.clear()
+                self._pending.clear()
+                self._touches = {}
+                self._db_entries = 0
+            db = self._db()
+            if db:
+                db.clear_translation_cache()
+
+    def get_stats(self):
+        """
+        キャッシュ統計
+
+        Returns:
+        dict: {memory_hits, db_hits, misses, puts, evictions, hit_rate, memory_size, pending, db_entries}
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_size'] = len(self._memory)
+            stats['pending'] = len(self._pending)
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['db_hits']) / lookups if lookups else 0.0
+        db = self._db()
+        stats['db_entries'] = db.get_translation_cache_stats()['entries'] if db else 0
+        return stats
+
+    def close(self):
+        """終了処理（スレッドを停止し、未書き込みの保存とヒット情報をDBへ反映）"""
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
@@ -0,0 +1,375 @@
+# ClipboardTranslator v1.20 - Translation Memory Module
+"""
+翻訳メモリ（履歴からのあいまい一致）
+
+空白・句読点・数字・一、二語だけが違うテキストを、翻訳履歴の訳文で返す。
+- 正規化（NFKC・大文字小文字・空白の統一、数字は「0」にまとめ、「?」とアポストロフィ以外の
+  句読点を除く）した文字3-gramの MinHash を LSH のバケットに入れ、候補を全件走査せずに引く
+- 候補を編集距離の類似度（1 - 距離 / 長い方の長さ）で採点する。空白で区切る言語は単語単位、
+  区切らない言語（日本語・中国語）は文字単位
+- 否定（not・can't・un-・ない・不 など）の有無が違う候補は、スコアによらず採用しない
+- 数字だけが違う場合は、訳文の中の数字を置き換えられるときに限り一致とみなす
+翻訳メモリで返した訳文は履歴に 'memory' として記録され、索引には入らない（'normal' だけを索引する）。
+履歴の変更は SmartHistorySearcher と同じく変更フィードから差分で取り込む。
+"""
+import re
+import zlib
+import random
+import difflib
+import threading
+import unicodedata
+from collections import Counter
+
+# 既定のしきい値（設定 translation_memory_threshold で上書き）
+# 9語の文で1語違うと約0.89。高くしておき、書式・数字の違い程度だけを採用する
+DEFAULT_THRESHOLD = 0.95
+REPORT_MIN_SCORE = 0.7        # これ未満の候補は返さない（編集距離の計算もここで打ち切る）
+
+NGRAM = 3
+NUM_PERM = 32
+BANDS = 16                    # 1バンド 2行。Jaccard 0.5 で候補になる確率は約99%
+MIN_CHARS = 8                 # これより短いテキストはあいまい一致しない（一語の違いが大きすぎる）
+MAX_CHARS = 500               # これより長いテキストは索引しない（編集距離が重い）
+MAX_CANDIDATES = 10           # 編集距離を計算する候補数（一致したバンドが多い順）
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, 1 << 32), _rng.randrange(0, 1 << 32)) for _ in range(NUM_PERM)]
+_ROWS = NUM_PERM // BANDS
+
+_NUMBER = re.compile(r'\d+(?:[.,]\d+)*')
+_WHITESPACE = re.compile(r'\s+')
+_APOSTROPHES = str.maketrans({'\u2019': "'", '\u2018': "'", '\u02bc': "'"})
+
+# 否定の語（空白で区切る言語）。語尾の n't も否定とみなす
+NEGATION_WORDS = {
+    'not', 'no', 'never', 'none', 'nobody', 'nothing', 'nowhere', 'neither', 'nor', 'cannot', 'without',
+    'ne', 'pas', 'jamais', 'nicht', 'kein', 'keine', 'keinen', 'keiner', 'nie', 'niemals',
+    'nunca', 'nada', 'ningún', 'ninguna', 'não', 'нет', 'не', 'ни', 'никогда',
+}
+# 否定の接頭辞（available / unavailable のように、接頭辞だけが違う語）
+NEGATION_PREFIXES = ('un', 'in', 'im', 'il', 'ir', 'dis', 'non', 'mis', 'a')
+# 否定の文字列（日本語・中国語・韓国語。語の一部として数える）
+NEGATION_MARKERS = ('ない', 'なかっ', 'ません', 'ず', 'ぬ', '不', '非', '未', '無', '没', '沒', '别', '別',
+                    '안', '않', '못', '없')
+
+# NumPy（あればMinHashをまとめて計算する）
+_numpy = None
+_numpy_available = None
+
+
+def _check_numpy():
+    """NumPyが利用可能かチェック"""
+    global _numpy, _numpy_available
+    if _numpy_available is None:
+        try:
+            import numpy
+            _numpy = numpy
+            _numpy_available = True
+        except ImportError:
+            _numpy_available = False
+    return _numpy_available
+
+
+def normalize_text(text):
+    """
+    比較用に正規化する（NFKC・小文字・連続する空白を1つに・前後の空白を除く）
+
+    Parameters:
+    text (str): テキスト
+
+    Returns:
+    str: 正規化したテキスト
+    """
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text).casefold()).strip()
+
+
+def _match_form(normalized):
+    """
+    数字を「0」にまとめ、句読点を除いた形と、元の数字のリスト
+
+    疑問符とアポストロフィは残す（can't を can と同じにしない）。
+    """
+    numbers = _NUMBER.findall(normalized)
+    form = ''.join(char for char in _NUMBER.sub('0', normalized.translate(_APOSTROPHES))
+                   if char in "?'" or not unicodedata.category(char).startswith('P'))
+    return _WHITESPACE.sub(' ', form).strip(), numbers
+
+
+def _units(form):
+    """採点の単位（空白で区切る言語は単語、区切らない言語は文字）"""
+    return form.split(' ') if ' ' in form else form
+
+
+def _negations(form):
+    """否定の語・文字列の出現回数"""
+    counts = Counter(word for word in form.split(' ') if word in NEGATION_WORDS or word.endswith("n't"))
+    for marker in NEGATION_MARKERS:
+        count = form.count(marker)
+        if count:
+            counts[marker] = count
+    return counts
+
+
+def negation_differs(a, b):
+    """
+    2つのテキスト（_match_form の形）で否定の有無が違うか
+
+    否定の語・文字列の出現回数が違う場合と、置き換わった語が否定の接頭辞だけ違う場合
+    （available / unavailable）に True。
+    """
+    if _negations(a) != _negations(b):
+        return True
+    words_a, words_b = a.split(' '), b.split(' ')
+    matcher = difflib.SequenceMatcher(None, words_a, words_b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'replace':
+            continue
+        for word_a in words_a[i1:i2]:
+            for word_b in words_b[j1:j2]:
+                shorter, longer = sorted((word_a, word_b), key=len)
+                if any(longer == prefix + shorter for prefix in NEGATION_PREFIXES):
+                    return True
+    return False
+
+
+def _shingle_hashes(form):
+    """文字 n-gram のハッシュ値（32ビット）"""
+    if len(form) <= NGRAM:
+        return {zlib.crc32(form.encode('utf-8'))}
+    return {zlib.crc32(form[i:i + NGRAM].encode('utf-8')) for i in range(len(form) - NGRAM + 1)}
+
+
+def minhash_signature(form):
+    """
+    MinHash 署名（NUM_PERM 個のハッシュ関数 (a*x + b) mod p の最小値）
+
+    Parameters:
+    form (str): 正規化したテキスト
+
+    Returns:
+    tuple: 署名
+    """
+    hashes = _shingle_hashes(form)
+    if _check_numpy():
+        np = _numpy
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        a = np.array([p[0] for p in _PERMUTATIONS], dtype=np.uint64)[:, None]
+        b = np.array([p[1] for p in _PERMUTATIONS], dtype=np.uint64)[:, None]
+        # a, x < 2^32 なので a*x + b は uint64 に収まる
+        return tuple(int(v) for v in ((a * values + b) % np.uint64(_PRIME)).min(axis=1))
+    return tuple(min((a * x + b) % _PRIME for x in hashes) for a, b in _PERMUTATIONS)
+
+
+def edit_similarity(a, b, min_score=0.0):
+    """
+    編集距離の類似度（1 - レーベンシュタイン距離 / 長い方の長さ）
+
+    距離が (1 - min_score) * 長さ 以下になる範囲（対角線の帯）だけを計算する。
+
+    Parameters:
+    a, b (str or list): 比較するテキスト（文字列なら文字単位、リストなら要素単位）
+    min_score (float): これを下回る場合は計算を打ち切って 0.0 を返す
+
+    Returns:
+    float: 0.0〜1.0
+    """
+    if a == b:
+        return 1.0
+    if len(a) < len(b):
+        a, b = b, a
+    longest = len(a)
+    max_distance = int((1.0 - min_score) * longest + 1e-9)
+    if longest - len(b) > max_distance:
+        return 0.0
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i in range(1, longest + 1):
+        low, high = max(1, i - max_distance), min(len(b), i + max_distance)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= max_distance else over
+        char_a = a[i - 1]
+        for j in range(low, high + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char_a != b[j - 1]))
+        if min(current[low - 1:high + 1]) > max_distance:
+            return 0.0
+        previous = current
+    distance = previous[-1]
+    return 0.0 if distance > max_distance else 1.0 - distance / longest
+
+
+def _transfer_numbers(old_numbers, new_numbers, translation):
+    """
+    訳文の中の数字を新しい原文の数字に置き換える
+
+    原文の数字の個数が同じで、置き換える数字が訳文に原文と同じ回数だけ現れる場合のみ。
+
+    Returns:
+    str or None: 置き換えた訳文。置き換えられない場合はNone
+    """
+    if len(old_numbers) != len(new_numbers):
+        return None
+    mapping = {}
+    for old, new in zip(old_numbers, new_numbers):
+        if mapping.setdefault(old, new) != new:
+            return None
+    found = Counter(_NUMBER.findall(translation))
+    expected = Counter(old_numbers)
+    for old, new in mapping.items():
+        if old != new and found[old] != expected[old]:
+            return None
+    return _NUMBER.sub(lambda m: mapping.get(m.group(), m.group()), translation)
+
+
+class TranslationMemory:
+    """翻訳履歴（通常翻訳）のあいまい一致検索"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        """
+        Parameters:
+        threshold (float): 訳文をそのまま使う類似度の下限（0.0〜1.0）
+        """
+        self.threshold = threshold
+        self.version = None  # 反映済みの履歴のバージョン
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._entries = {}   # キー → (言語ペア, 数字をまとめた形, 正規化した原文, 数字, 訳文, 原文, 署名)
+        self._buckets = {}   # (言語ペア, バンド番号, バンドの値) → {キー, ...}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _bands(self, signature):
+        return [(band, signature[band * _ROWS:(band + 1) * _ROWS]) for band in range(BANDS)]
+
+    def add(self, key, original_text, translated_text, source_lang, target_lang):
+        """
+        原文と訳文を登録する（同じキーは置き換え）
+
+        Returns:
+        bool: 登録したかどうか（短すぎる・長すぎるテキストは登録しない）
+        """
+        self.remove(key)
+        normalized = normalize_text(original_text)
+        if not MIN_CHARS <= len(normalized) <= MAX_CHARS or not translated_text:
+            return False
+        form, numbers = _match_form(normalized)
+        signature = minhash_signature(form)
+        pair = (source_lang, target_lang)
+        with self._lock:
+            self._entries[key] = (pair, form, normalized, numbers, translated_text, original_text, signature)
+            for band in self._bands(signature):
+                self._buckets.setdefault((pair, *band), set()).add(key)
+        return True
+
+    def remove(self, key):
+        """登録を削除する"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            pair, signature = entry[0], entry[6]
+            for band in self._bands(signature):
+                bucket = self._buckets.get((pair, *band))
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[(pair, *band)]
+
+    def clear(self):
+        """すべての登録を削除する"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+        self.version = None
+
+    def _add_entry(self, key, entry):
+        if entry.get('translation_type', 'normal') != 'normal':
+            self.remove(key)
+            return
+        self.add(key, entry['original_text'], entry['translated_text'],
+                 entry['source_lang'], entry.get('target_lang'))
+
+    def sync(self, history_manager, wait=True):
+        """
+        翻訳履歴の変更を取り込む（初回・差分を取れない場合は全件を登録し直す）
+
+        Parameters:
+        history_manager: TranslationHistoryインスタンス
+        wait (bool): 別のスレッドが取り込み中なら終わるまで待つ（False なら待たずに 'busy'）
+
+        Returns:
+        str: 'unchanged' / 'incremental' / 'rebuilt' / 'busy'
+        """
+        if not self._sync_lock.acquire(blocking=wait):
+            return 'busy'
+        try:
+            version, changes = history_manager.get_changes(self.version)
+            if changes is None:
+                self.clear()
+                for index, entry in enumerate(history_manager.iter_history(filter_type='normal')):
+                    key = entry.get('id')
+                    self._add_entry(('json', index) if key is None else key, entry)
+                self.version = version
+                return 'rebuilt'
+            for history_id, entry in changes:
+                if entry is None:
+                    self.remove(history_id)
+                else:
+                    self._add_entry(history_id, entry)
+            self.version = version
+            return 'incremental' if changes else 'unchanged'
+        finally:
+            self._sync_lock.release()
+
+    def lookup(self, text, source_lang, target_lang):
+        """
+        最も近い登録を探す
+
+        Parameters:
+        text (str): 原文
+        source_lang (str): ソース言語
+        target_lang (str): 翻訳先言語
+
+        Returns:
+        dict or None: {score, translated_text, original_text, numbers_replaced, accepted}。
+                      accepted はスコアがしきい値以上か。REPORT_MIN_SCORE 以上の候補がなければNone
+                      （否定の有無が違う候補は候補にしない）
+        """
+        normalized = normalize_text(text)
+        if not MIN_CHARS <= len(normalized) <= MAX_CHARS:
+            return None
+        form, numbers = _match_form(normalized)
+        pair = (source_lang, target_lang)
+        signature = minhash_signature(form)
+
+        with self._lock:
+            votes = Counter()
+            for band in self._bands(signature):
+                votes.update(self._buckets.get((pair, *band), ()))
+            candidates = [self._entries[key] for key, _ in votes.most_common(MAX_CANDIDATES)]
+
+        best = None
+        for _, cand_form, cand_normalized, cand_numbers, translated, original, _ in candidates:
+            if negation_differs(form, cand_form):
+                continue  # 意味が逆になる（can / can't など）
+            floor = best['score'] if best else REPORT_MIN_SCORE
+            score = edit_similarity(_units(form), _units(cand_form), floor)
+            if score < floor or (best and score == floor):
+                continue
+            replaced = False
+            if numbers != cand_numbers:
+                adapted = _transfer_numbers(cand_numbers, numbers, translated)
+                if adapted is None:
+                    # 訳文の数字を置き換えられない: 数字の違いも減点する
+                    score = edit_similarity(_units(normalized), _units(cand_normalized), floor)
+                    if score < floor or (best and score == floor):
+                        continue
+                else:
+                    translated, replaced = adapted, True
+            best = {'score': score, 'translated_text': translated, 'original_text': original,
+                    'numbers_replaced': replaced}
+        if best:
+            best['accepted'] = best['score'] >= self.threshold
+        return best
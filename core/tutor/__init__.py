@@ -5,9 +5,12 @@ from .state import TutorState, ApplicationState
 from .trigger import TriggerDetector
 from .session import TutorSession
 from .chat_handler import TutorChatHandler
-from .search import SmartHistorySearcher, BM25Ranker, extract_keywords
+from .search import (
+    SmartHistorySearcher, BM25Ranker, extract_keywords, start_tokenizer_warmup, get_tokenizer_status
+)
 
 __all__ = [
     'TutorState', 'ApplicationState', 'TriggerDetector', 'TutorSession',
-    'TutorChatHandler', 'SmartHistorySearcher', 'BM25Ranker', 'extract_keywords'
+    'TutorChatHandler', 'SmartHistorySearcher', 'BM25Ranker', 'extract_keywords',
+    'start_tokenizer_warmup', 'get_tokenizer_status'
 ]
@@ -27,7 +27,6 @@ class TutorChatHandler:
         self.topics = []  # 過去の話題キーワード
         self.history_manager = history_manager
         self.searcher = SmartHistorySearcher(recency_weight=0.3, decay_days=30)
-        self._last_history_count = 0  # 履歴の変更検知用
 
     def extract_topics_from_message(self, message):
         """
@@ -42,19 +41,13 @@ class TutorChatHandler:
         return extract_keywords(message, max_keywords=5)
 
     def _refresh_searcher_if_needed(self):
-        """履歴が更新されていればSearcherを再学習"""
+        """履歴の変更をSearcherに反映"""
         if not self.history_manager:
             return
 
         try:
-            # 全履歴を取得
-            all_history = self.history_manager.get_history()
-            current_count = len(all_history) if all_history else 0
-
-            # 履歴が変更されていれば再学習
-            if current_count != self._last_history_count:
-                self.searcher.fit(all_history)
-                self._last_history_count = current_count
+            # 変更フィードの差分だけを反映（初回は保存済みのインデックスを読み込む）
+            self.searcher.sync(self.history_manager)
         except Exception as e:
             print(f"Searcher更新エラー: {e}")
 
@@ -177,7 +170,7 @@ class TutorChatHandler:
         if len(self.topics) > 30:
             self.topics = self.topics[-30:]
 
-    def process_message(self, message, on_success=None, on_error=None, on_search_info=None):
+    def process_message(self, message, on_success=None, on_error=None, on_search_info=None, on_delta=None):
         """
         家庭教師モードのメッセージを処理
 
@@ -187,6 +180,7 @@ class TutorChatHandler:
         on_error (callable): エラー時のコールバック(error_message)
         on_search_info (callable): 検索情報コールバック(metadata)
                                    metadata: {'count': int, 'dates': list[str]}
+        on_delta (callable): 応答の断片を受け取るたびのコールバック(delta)。on_success は最後に応答全体で呼ばれる
 
         Returns:
         str or None: 応答テキスト、エラーの場合はNone
@@ -248,7 +242,8 @@ class TutorChatHandler:
             tutor_model = config.get('Settings', 'tutor_model', fallback='sonnet')
 
             # 家庭教師モードで応答を取得
-            response = query_claude_api(message, tutor_prompt, claude_api_key, model_type=tutor_model)
+            response = query_claude_api(message, tutor_prompt, claude_api_key, model_type=tutor_model,
+                                        on_delta=on_delta)
 
             if response:
                 # 応答を履歴に追加
@@ -5,36 +5,145 @@
 - 形態素解析によるキーワード抽出
 - 時間的重み付け
 """
+import os
 import re
 import math
+import time
+import heapq
+import threading
 from datetime import datetime
-from collections import Counter
+from collections import Counter, OrderedDict
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 # 形態素解析ライブラリの遅延読み込み
+# start_tokenizer_warmup でバックグラウンド読み込みを始めた場合、読み込み中は簡易トークナイザを使う
 _janome_available = None
 _tokenizer = None
+_janome_lock = threading.Lock()         # 読み込み中は保持される
+_janome_start_lock = threading.Lock()   # 読み込みスレッドの開始用
+_janome_ready = threading.Event()
+_janome_warmup_thread = None
+_janome_warmup_seconds = None
+
+# NumPy（BM25のベクトル化スコア計算用、任意）の遅延読み込み
+_numpy = None
+_numpy_available = None
+
+# トークン化の処理を変えたら上げる（保存済みの検索インデックス・トークンキャッシュを無効にする）
+TOKENIZER_VERSION = 1
+
+# クエリ・チャットメッセージのトークン化をメモリに保持する件数
+TOKEN_MEMORY_CACHE_SIZE = 512
+# 未キャッシュの文書がこの数以上ならプロセスプールで並列にトークン化する
+PARALLEL_TOKENIZE_MIN = 2000
+# プロセスプールに1回で渡す文書数
+TOKENIZE_CHUNK_SIZE = 256
+
+_token_memory = OrderedDict()  # (Janomeを使うか, テキスト) → トークンのタプル
+_token_lock = threading.Lock()
+_token_stats = {'memory_hits': 0, 'db_hits': 0, 'tokenized': 0, 'parallel_chunks': 0}
+
+
+def _load_janome():
+    """Janome（辞書の読み込みに数秒かかる）を初期化し、利用可能かを返す"""
+    global _janome_available, _tokenizer, _janome_warmup_seconds
+    with _janome_lock:
+        if _janome_available is None:
+            start = time.perf_counter()
+            try:
+                from janome.tokenizer import Tokenizer
+                _tokenizer = Tokenizer()
+                _janome_available = True
+            except ImportError:
+                _janome_available = False
+                print("Janome未インストール: 簡易トークナイザを使用します")
+            _janome_warmup_seconds = time.perf_counter() - start
+            _janome_ready.set()
+    return _janome_available
 
 
 def _check_janome():
-    """Janomeが利用可能かチェック"""
-    global _janome_available, _tokenizer
-    if _janome_available is None:
+    """
+    Janomeが利用可能かチェック
+
+    バックグラウンドで読み込み中なら待たずに False（簡易トークナイザを使う）。
+    読み込みを始めていなければ、ここで読み込む。
+    """
+    if _janome_ready.is_set():
+        return _janome_available
+    if _janome_warmup_thread is not None:
+        return False
+    return _load_janome()
+
+
+def start_tokenizer_warmup():
+    """
+    Janomeの読み込みをバックグラウンドで開始する（ウィンドウ表示後に呼ぶ）
+
+    Returns:
+    threading.Thread or None: 読み込みスレッド（開始済み・読み込み済みなら None）
+    """
+    global _janome_warmup_thread
+
+    def warmup():
+        if _load_janome():
+            _tokenizer.tokenize("ウォームアップ")  # 初回のトークン化の遅延もここで済ませる
+        print(f"形態素解析の準備完了: {_janome_warmup_seconds:.2f}秒"
+              f"（{'Janome' if _janome_available else '簡易トークナイザ'}）")
+
+    with _janome_start_lock:
+        if _janome_ready.is_set() or _janome_warmup_thread is not None:
+            return None
+        _janome_warmup_thread = threading.Thread(target=warmup, name="janome-warmup", daemon=True)
+    _janome_warmup_thread.start()
+    return _janome_warmup_thread
+
+
+def get_tokenizer_status():
+    """
+    トークナイザーの状態（診断用）
+
+    Returns:
+    dict: {ready: 読み込み済みか, janome: Janomeを使うか, warmup_seconds: 読み込み時間（秒）, version}
+    """
+    ready = _janome_ready.is_set()
+    return {
+        'ready': ready,
+        'janome': bool(ready and _janome_available),
+        'warmup_seconds': _janome_warmup_seconds,
+        'version': tokenizer_version(),
+    }
+
+
+def _check_numpy():
+    """NumPyが利用可能かチェック"""
+    global _numpy, _numpy_available
+    if _numpy_available is None:
         try:
-            from janome.tokenizer import Tokenizer
-            _tokenizer = Tokenizer()
-            _janome_available = True
+            import numpy
+            _numpy = numpy
+            _numpy_available = True
         except ImportError:
-            _janome_available = False
-            print("Janome未インストール: 簡易トークナイザを使用します")
-    return _janome_available
+            _numpy_available = False
+    return _numpy_available
+
 
+def tokenizer_version(use_janome=None):
+    """現在のトークナイザーの版（Janomeの有無・バージョンを含む。use_janome で指定も可）"""
+    if _check_janome() if use_janome is None else use_janome:
+        import janome
+        return f"janome-{getattr(janome, '__version__', '')}-{TOKENIZER_VERSION}"
+    return f"simple-{TOKENIZER_VERSION}"
 
-def tokenize_japanese(text):
+
+def tokenize_japanese(text, use_janome=None):
     """
     日本語テキストをトークン化（名詞・動詞・形容詞を抽出）
 
     Parameters:
     text (str): 入力テキスト
+    use_janome (bool): Janomeを使うか（Noneで _check_janome に従う）
 
     Returns:
     list: トークンのリスト
@@ -42,7 +151,7 @@ def tokenize_japanese(text):
     # 先に英単語を抽出（Janomeの有無に関わらず、日本語に隣接していてもOK）
     english_words = re.findall(r'[a-zA-Z]{3,}', text.lower())
 
-    if _check_janome():
+    if _check_janome() if use_janome is None else (use_janome and _load_janome()):
         tokens = list(english_words)  # 英単語を先に追加
         for token in _tokenizer.tokenize(text):
             # 名詞、動詞、形容詞のみ抽出
@@ -90,6 +199,175 @@ def simple_tokenize(text):
     return tokens
 
 
+def tokenize_cached(text):
+    """
+    トークン化（メモリのLRUキャッシュ付き。繰り返し来るクエリ・メッセージ用）
+
+    Returns:
+    list: トークンのリスト
+    """
+    use_janome = _check_janome()
+    key = (use_janome, text)
+    with _token_lock:
+        tokens = _token_memory.get(key)
+        if tokens is not None:
+            _token_memory.move_to_end(key)
+            _token_stats['memory_hits'] += 1
+            return list(tokens)
+
+    tokens = tokenize_japanese(text, use_janome)
+    with _token_lock:
+        _token_stats['tokenized'] += 1
+        _token_memory[key] = tuple(tokens)
+        while len(_token_memory) > TOKEN_MEMORY_CACHE_SIZE:
+            _token_memory.popitem(last=False)
+    return tokens
+
+
+def _tokenize_chunk(texts, use_janome=None):
+    """文書をまとめてトークン化（プロセスプールのワーカーでも使う）"""
+    return [tokenize_japanese(text, use_janome) for text in texts]
+
+
+def _tokenize_texts(texts, workers, parallel_min, use_janome=None):
+    """文書をトークン化（多数なら文書の塊ごとにプロセスプールで並列）"""
+    workers = workers or os.cpu_count() or 1
+    if len(texts) >= parallel_min and workers > 1:
+        chunks = [texts[i:i + TOKENIZE_CHUNK_SIZE] for i in range(0, len(texts), TOKENIZE_CHUNK_SIZE)]
+        try:
+            import multiprocessing
+            # fork はDB接続やUIのスレッドを引き継ぐため spawn を使う
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                results = []
+                # ワーカーは呼び出し元と同じトークナイザーを使う（Janomeの読み込み中なら簡易トークナイザ）
+                for tokens_list in pool.map(partial(_tokenize_chunk, use_janome=use_janome), chunks):
+                    results.extend(tokens_list)
+            with _token_lock:
+                _token_stats['parallel_chunks'] += len(chunks)
+            return results
+        except Exception as e:
+            print(f"並列トークン化エラー（逐次処理に切り替えます）: {e}")
+    return _tokenize_chunk(texts, use_janome)
+
+
+def tokenize_many(texts, workers=None, parallel_min=PARALLEL_TOKENIZE_MIN):
+    """
+    複数の文書をトークン化
+
+    SQLiteが初期化済みなら、トークンキャッシュ（テキストのハッシュとトークナイザーの版がキー）を使い、
+    未キャッシュの文書だけをトークン化して保存する。
+
+    Parameters:
+    texts (list): テキストのリスト
+    workers (int): プロセスプールのワーカー数（Noneで CPU数）
+    parallel_min (int): 並列化する未キャッシュ文書数の下限
+
+    Returns:
+    list: 各テキストのトークンのリスト（texts と同じ順）
+    """
+    from core import dictionary_db as db
+    texts = list(texts)
+    if not texts:
+        return []
+    persistent = db.DB_PATH is not None
+    use_janome = _check_janome()
+    version = tokenizer_version(use_janome)
+    keys = [db.token_cache_key(text) for text in texts]
+    cached = db.get_cached_tokens(list(set(keys)), version) if persistent else {}
+
+    missing = {}  # キー → テキスト（同じテキストは1回だけトークン化）
+    for key, text in zip(keys, texts):
+        if key not in cached:
+            missing.setdefault(key, text)
+    if missing:
+        token_lists = _tokenize_texts(list(missing.values()), workers, parallel_min, use_janome)
+        tokenized = dict(zip(missing, token_lists))
+        if persistent:
+            db.put_cached_tokens(list(tokenized.items()), version)
+        cached.update(tokenized)
+
+    with _token_lock:
+        _token_stats['db_hits'] += len(texts) - sum(1 for key in keys if key in missing)
+        _token_stats['tokenized'] += len(missing)
+    return [list(cached[key]) for key in keys]
+
+
+def get_tokenize_stats():
+    """
+    トークン化のキャッシュ統計
+
+    Returns:
+    dict: {memory_hits, db_hits, tokenized, parallel_chunks, memory_size}
+    """
+    with _token_lock:
+        stats = dict(_token_stats)
+        stats['memory_size'] = len(_token_memory)
+    return stats
+
+
+def _document_text(doc):
+    return f"{doc.get('original_text', '')} {doc.get('translated_text', '')}"
+
+
+def _timestamp_epoch(timestamp_str):
+    """タイムスタンプ文字列 (YYYY-MM-DD HH:MM:SS) をエポック秒に変換（パースできなければ NaN）"""
+    try:
+        return datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S').timestamp()
+    except (ValueError, TypeError):
+        return math.nan
+
+
+def _recency_factor(days_ago, recency_weight, decay_days):
+    """
+    経過日数に対するスコアの係数 (1 - recency_weight) + recency_weight * 時間的重み
+    時間的重みは calculate_recency_weight と同じ（ただし未来の日時は1.0で頭打ち、days_ago が NaN なら0.5）
+    """
+    if days_ago != days_ago:
+        recency = 0.5
+    else:
+        recency = min(1.0, max(0.1, math.exp(-days_ago / decay_days)))
+    return 1 - recency_weight + recency_weight * recency
+
+
+class _CSRIndex:
+    """
+    転置インデックスのCSR表現（NumPyバックエンド用）
+
+    単語 i のポスティングは doc_indices[indptr[i]:indptr[i + 1]] と tfs の同じ範囲。
+    作成後に削除された文書は alive で除外し、追加された文書（インデックスが n_docs 以上）は
+    BM25Ranker 側で Python のまま計算する。
+    """
+
+    def __init__(self, ranker):
+        np = _numpy
+        terms = list(ranker.postings)
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(ranker.postings[term]) for term in terms], out=self.indptr[1:])
+        self.doc_indices = np.empty(self.indptr[-1], dtype=np.int64)
+        self.tfs = np.empty(self.indptr[-1], dtype=np.float64)
+        for i, term in enumerate(terms):
+            docs = ranker.postings[term]
+            start, end = self.indptr[i], self.indptr[i + 1]
+            self.doc_indices[start:end] = np.fromiter(docs.keys(), dtype=np.int64, count=len(docs))
+            self.tfs[start:end] = np.fromiter(docs.values(), dtype=np.float64, count=len(docs))
+        self.n_docs = len(ranker.documents)
+        self.doc_lengths = np.array(ranker.doc_lengths, dtype=np.float64)
+        self.doc_times = np.array(ranker.doc_times, dtype=np.float64)
+        self.alive = np.array([doc is not None for doc in ranker.documents], dtype=bool)
+        self._norms = None
+        self._norms_key = None
+
+    def norms(self, k1, b, avg_doc_length):
+        """文書ごとの長さ正規化 k1 * (1 - b + b * dl / avgdl)（平均文書長が変わるまで再利用）"""
+        key = (k1, b, avg_doc_length)
+        if self._norms_key != key:
+            self._norms = k1 * (1 - b + b * self.doc_lengths / avg_doc_length)
+            self._norms_key = key
+        return self._norms
+
+
 class BM25Ranker:
     """
     BM25アルゴリズムによる文書ランキング
@@ -99,59 +377,224 @@ class BM25Ranker:
     - 逆文書頻度（IDF）
     - 文書の長さの正規化
     を考慮してスコアを計算します。
+
+    転置インデックス（単語 → {文書インデックス: 出現回数}）を持ち、
+    検索ではクエリの単語を含む文書だけをスコア計算する。
+    文書は個別に追加・削除でき、IDFは検索時に必要な単語だけ再計算する。
+    削除した文書の位置は None になり、空きが増えると詰め直す。
     """
 
-    def __init__(self, k1=1.5, b=0.75):
+    # 削除済みの位置がこの数を超え、かつ有効な文書数より多くなったら詰め直す
+    COMPACT_MIN_DELETED = 64
+    # backend='auto' でNumPyを使う文書数の下限
+    NUMPY_MIN_DOCS = 5000
+    # CSR作成後に追加された文書がこの数を超えたら作り直す
+    NUMPY_MAX_PENDING = 512
+
+    def __init__(self, k1=1.5, b=0.75, backend='auto'):
         """
         初期化
 
         Parameters:
         k1 (float): TFの飽和パラメータ（1.2-2.0が一般的）
         b (float): 文書長正規化パラメータ（0.75が標準）
+        backend (str): スコア計算 'python' / 'numpy'（CSR配列でベクトル化）/
+                       'auto'（NumPyがあり文書数が多い場合にNumPy）。NumPyがなければ 'python'
         """
         self.k1 = k1
         self.b = b
-        self.documents = []
+        self.generation = 0  # インデックスを変更するたびに増える（検索結果キャッシュ用）
+        if backend not in ('auto', 'python', 'numpy'):
+            raise ValueError(f"不明なバックエンド: {backend}")
+        if backend != 'python' and not _check_numpy():
+            if backend == 'numpy':
+                print("NumPy未インストール: BM25はPythonで計算します")
+            backend = 'python'
+        self.backend = backend
+        self._reset()
+
+    def _reset(self):
+        self.documents = []      # 文書（削除済みは None）
         self.doc_lengths = []
-        self.avg_doc_length = 0
-        self.doc_freqs = Counter()  # 各単語が出現する文書数
-        self.idf = {}
-        self.doc_token_counts = []  # 各文書のトークン頻度
-
-    def fit(self, documents):
+        self.doc_terms = []      # 各文書の単語（削除時にポスティングから外すため）
+        self.doc_times = []      # 各文書のタイムスタンプ（エポック秒、なければ NaN）
+        self.postings = {}       # 単語 → {文書インデックス: 出現回数}
+        self.doc_keys = {}       # 文書キー（履歴IDなど） → 文書インデックス
+        self.n_docs = 0
+        self.total_length = 0
+        self._idf_cache = {}
+        self._csr = None         # NumPyバックエンドのCSR（必要になったときに作成）
+        self.generation += 1
+        # 単語ごとのスコアの上限の計算用。削除では更新しない（上限としては有効なまま）
+        self.max_tf = {}         # 単語 → 最大の出現回数
+        self.min_length = 0      # 最短の文書長
+        self.max_time = -math.inf   # 最新のタイムスタンプ
+        self.has_untimed = False    # タイムスタンプのない文書があるか
+
+    @property
+    def avg_doc_length(self):
+        return self.total_length / self.n_docs if self.n_docs and self.total_length else 1
+
+    def fit(self, documents, key=None):
         """
         文書コーパスでBM25を学習
 
         Parameters:
-        documents (list): 文書リスト（各要素は辞書でoriginal_text, translated_textを含む）
+        documents (iterable): 文書のイテラブル（各要素は辞書でoriginal_text, translated_textを含む）
+        key (callable): 文書から文書キーを取り出す関数（Noneでキーを登録しない）
         """
-        self.documents = documents
-        self.doc_token_counts = []
-        self.doc_lengths = []
+        self._reset()
+        documents = list(documents)
+        # トークン化はまとめて行う（キャッシュ参照・並列化）
+        for doc, tokens in zip(documents, tokenize_many(_document_text(doc) for doc in documents)):
+            self.add_document(doc, key(doc) if key else None, tokens)
 
-        # 各文書をトークン化
-        for doc in documents:
-            text = f"{doc.get('original_text', '')} {doc.get('translated_text', '')}"
-            tokens = tokenize_japanese(text)
-            token_counts = Counter(tokens)
-            self.doc_token_counts.append(token_counts)
-            self.doc_lengths.append(len(tokens))
-
-            # 文書頻度を更新
-            for token in set(tokens):
-                self.doc_freqs[token] += 1
-
-        # 平均文書長を計算
-        if self.doc_lengths:
-            self.avg_doc_length = sum(self.doc_lengths) / len(self.doc_lengths)
-        else:
-            self.avg_doc_length = 1
+    def add_document(self, doc, key=None, tokens=None):
+        """
+        文書を1件追加する
+
+        Parameters:
+        doc (dict): original_text, translated_text を含む文書
+        key: 文書キー（update_document / remove_document で使用。Noneで登録しない）
+        tokens (list): トークン化済みの場合はそのトークン
+
+        Returns:
+        int: 文書インデックス
+        """
+        if key is not None and key in self.doc_keys:
+            self.remove_document(key)
+
+        if tokens is None:
+            tokens = tokenize_many([_document_text(doc)])[0]
+        return self._append(doc, key, len(tokens), Counter(tokens))
+
+    def _append(self, doc, key, length, token_counts):
+        doc_index = len(self.documents)
+        self.documents.append(doc)
+        self.doc_lengths.append(length)
+        self.doc_terms.append(tuple(token_counts))
+        self.doc_times.append(_timestamp_epoch(doc.get('timestamp')))
+        for term, tf in token_counts.items():
+            self.postings.setdefault(term, {})[doc_index] = tf
+            if tf > self.max_tf.get(term, 0):
+                self.max_tf[term] = tf
+        if length < self.min_length or self.n_docs == 0:
+            self.min_length = length
+        self._update_time_bounds(self.doc_times[-1])
+        if key is not None:
+            self.doc_keys[key] = doc_index
+        self.n_docs += 1
+        self.total_length += length
+        self._idf_cache.clear()
+        self.generation += 1
+        return doc_index
+
+    def _update_time_bounds(self, doc_time):
+        if doc_time != doc_time:
+            self.has_untimed = True
+        elif doc_time > self.max_time:
+            self.max_time = doc_time
+
+    def update_document(self, key, doc):
+        """キーの文書を置き換える（未登録なら追加）"""
+        return self.add_document(doc, key)
+
+    def remove_document(self, key):
+        """
+        キーの文書を削除する
+
+        Returns:
+        bool: 削除したかどうか
+        """
+        doc_index = self.doc_keys.pop(key, None)
+        if doc_index is None:
+            return False
+        for term in self.doc_terms[doc_index]:
+            docs = self.postings[term]
+            del docs[doc_index]
+            if not docs:
+                del self.postings[term]
+        self.n_docs -= 1
+        self.total_length -= self.doc_lengths[doc_index]
+        self.documents[doc_index] = None
+        self.doc_lengths[doc_index] = 0
+        self.doc_terms[doc_index] = ()
+        self._idf_cache.clear()
+        self.generation += 1
+        if self._csr is not None and doc_index < self._csr.n_docs:
+            self._csr.alive[doc_index] = False
+
+        deleted = len(self.documents) - self.n_docs
+        if deleted > self.COMPACT_MIN_DELETED and deleted > self.n_docs:
+            self._compact()
+        return True
+
+    def _compact(self):
+        """削除済みの位置を詰める（文書の順序は保つ）"""
+        remap = {}
+        documents, doc_lengths, doc_terms, doc_times = [], [], [], []
+        for old_index, doc in enumerate(self.documents):
+            if doc is None:
+                continue
+            remap[old_index] = len(documents)
+            documents.append(doc)
+            doc_lengths.append(self.doc_lengths[old_index])
+            doc_terms.append(self.doc_terms[old_index])
+            doc_times.append(self.doc_times[old_index])
+        self.documents, self.doc_lengths, self.doc_terms = documents, doc_lengths, doc_terms
+        self.doc_times = doc_times
+        self.postings = {term: {remap[i]: tf for i, tf in docs.items()}
+                         for term, docs in self.postings.items()}
+        self.doc_keys = {key: remap[i] for key, i in self.doc_keys.items()}
+        self._csr = None
+
+    def load_index(self, documents, doc_lengths, postings, keys=None):
+        """
+        保存済みの転置インデックスを読み込む（トークン化しない）
 
-        # IDFを計算
-        n_docs = len(documents)
-        for term, df in self.doc_freqs.items():
+        Parameters:
+        documents (list): 文書のリスト
+        doc_lengths (list): 各文書のトークン数（documents と同じ順）
+        postings (dict): 単語 → {文書インデックス: 出現回数}
+        keys (list): 各文書のキー（Noneで登録しない）
+        """
+        self._reset()
+        self.documents = list(documents)
+        self.doc_lengths = list(doc_lengths)
+        self.postings = postings
+        doc_terms = [[] for _ in self.documents]
+        for term, docs in postings.items():
+            for doc_index in docs:
+                doc_terms[doc_index].append(term)
+        self.doc_terms = [tuple(terms) for terms in doc_terms]
+        self.doc_times = [_timestamp_epoch(doc.get('timestamp')) for doc in self.documents]
+        for doc_time in self.doc_times:
+            self._update_time_bounds(doc_time)
+        if keys is not None:
+            self.doc_keys = {key: i for i, key in enumerate(keys)}
+        self.n_docs = len(self.documents)
+        self.total_length = sum(self.doc_lengths)
+        self.max_tf = {term: max(docs.values()) for term, docs in postings.items()}
+        self.min_length = min(self.doc_lengths, default=0)
+
+    def get_idf(self, term):
+        """単語のIDF（文書の追加・削除後は必要になった単語だけ再計算）"""
+        idf = self._idf_cache.get(term)
+        if idf is None:
+            docs = self.postings.get(term)
+            if not docs:
+                return None
+            df = len(docs)
             # IDF = log((N - df + 0.5) / (df + 0.5) + 1)
-            self.idf[term] = math.log((n_docs - df + 0.5) / (df + 0.5) + 1)
+            idf = math.log((self.n_docs - df + 0.5) / (df + 0.5) + 1)
+            self._idf_cache[term] = idf
+        return idf
+
+    def _term_score(self, idf, tf, doc_length, avg_doc_length):
+        # score = IDF * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * dl / avgdl))
+        numerator = tf * (self.k1 + 1)
+        denominator = tf + self.k1 * (1 - self.b + self.b * doc_length / avg_doc_length)
+        return idf * (numerator / denominator) if denominator > 0 else 0.0
 
     def score(self, query_tokens, doc_index):
         """
@@ -164,56 +607,164 @@ class BM25Ranker:
         Returns:
         float: BM25スコア
         """
-        if doc_index >= len(self.doc_token_counts):
+        if doc_index >= len(self.documents) or self.documents[doc_index] is None:
             return 0.0
 
         score = 0.0
         doc_length = self.doc_lengths[doc_index]
-        token_counts = self.doc_token_counts[doc_index]
-
+        avg_doc_length = self.avg_doc_length
         for term in query_tokens:
-            if term not in self.idf:
+            idf = self.get_idf(term)
+            if idf is None:
                 continue
+            tf = self.postings[term].get(doc_index, 0)
+            score += self._term_score(idf, tf, doc_length, avg_doc_length)
 
-            tf = token_counts.get(term, 0)
-            idf = self.idf[term]
+        return score
 
-            # BM25スコア計算
-            # score = IDF * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * dl / avgdl))
-            numerator = tf * (self.k1 + 1)
-            denominator = tf + self.k1 * (1 - self.b + self.b * doc_length / self.avg_doc_length)
+    def _upper_bound(self, term, idf, avg_doc_length):
+        """単語1つが文書に与えうるスコアの上限（最大の出現回数・最短の文書長で計算）"""
+        return self._term_score(idf, self.max_tf[term], self.min_length, avg_doc_length)
 
-            if denominator > 0:
-                score += idf * (numerator / denominator)
+    def _recency_factors(self, recency_weight, decay_days, now):
+        """文書インデックス → 時間的重みの係数 を返す関数（係数は経過日数ごとに1回だけ計算）"""
+        by_days = {}
 
-        return score
+        def factor(doc_index):
+            days_ago = math.floor((now - self.doc_times[doc_index]) / 86400) \
+                if self.doc_times[doc_index] == self.doc_times[doc_index] else math.nan
+            value = by_days.get(days_ago)
+            if value is None:
+                value = by_days[days_ago] = _recency_factor(days_ago, recency_weight, decay_days)
+            return value
+        return factor
 
-    def search(self, query, top_k=5):
+    def search(self, query, top_k=5, recency_weight=0.0, decay_days=30, now=None):
         """
         クエリに最も関連する文書を検索
 
+        時間的重みを付ける場合は スコア = BM25 * ((1 - recency_weight) + recency_weight * 時間的重み)
+        で順位を付ける（時間的重みは作成日時から計算し、索引時にエポック秒にしてある）。
+
         Parameters:
         query (str): 検索クエリ
         top_k (int): 返す文書数
+        recency_weight (float): 時間的重みの影響度（0.0-1.0、0で時間的重みなし）
+        decay_days (int): 時間的重みの減衰の日数
+        now (float): 現在時刻（エポック秒、Noneで現在）
 
         Returns:
         list: (スコア, 文書インデックス, 文書)のタプルリスト
         """
-        query_tokens = tokenize_japanese(query)
-        if not query_tokens:
+        query_tokens = tokenize_cached(query)
+        if not query_tokens or top_k <= 0:
             return []
+        now = time.time() if now is None else now
+        if self.backend == 'numpy' or (self.backend == 'auto' and self.n_docs >= self.NUMPY_MIN_DOCS):
+            return self._search_numpy(query_tokens, top_k, recency_weight, decay_days, now)
+
+        factor = self._recency_factors(recency_weight, decay_days, now) if recency_weight else None
+        # 係数の上限（最新の文書・タイムスタンプのない文書の係数）
+        max_factor = 1.0
+        if factor:
+            max_factor = max(_recency_factor(math.floor((now - self.max_time) / 86400), recency_weight, decay_days)
+                             if self.max_time > -math.inf else 0.0,
+                             _recency_factor(math.nan, recency_weight, decay_days) if self.has_untimed else 0.0)
+        avg_doc_length = self.avg_doc_length
+        terms = []
+        for term in query_tokens:
+            idf = self.get_idf(term)
+            if idf is not None:
+                terms.append((self._upper_bound(term, idf, avg_doc_length), term, idf))
+        # 上限の大きい（まれな）単語から集計する
+        terms.sort(key=lambda item: -item[0])
+        remaining = sum(bound for bound, _, _ in terms)
+
+        # MaxScore: 残りの単語の上限の合計 × 係数の上限が現在のk番目のスコアに届かなければ、
+        # 新しい文書は上位k件に入れないので、残りの単語は既存の候補だけを加算する
+        # （候補のスコアは増える一方なので、候補のスコア × 係数 をk番目の下限に使う）
+        scores = {}
+        for bound, term, idf in terms:
+            docs = self.postings[term]
+            candidates_only = False
+            if len(scores) >= top_k:
+                weighted = (score * factor(i) for i, score in scores.items()) if factor else scores.values()
+                candidates_only = remaining * max_factor < heapq.nlargest(top_k, weighted)[-1]
+            if candidates_only:
+                if len(docs) < len(scores):
+                    matches = [(i, tf) for i, tf in docs.items() if i in scores]
+                else:
+                    matches = [(i, docs[i]) for i in scores if i in docs]
+            else:
+                matches = docs.items()
+            for doc_index, tf in matches:
+                scores[doc_index] = scores.get(doc_index, 0.0) + \
+                    self._term_score(idf, tf, self.doc_lengths[doc_index], avg_doc_length)
+            remaining -= bound
+
+        # 上位k件をヒープで選択（同点は文書インデックス順）
+        if factor:
+            weighted = ((-score * factor(i), i) for i, score in scores.items() if score > 0)
+        else:
+            weighted = ((-score, i) for i, score in scores.items() if score > 0)
+        top = heapq.nsmallest(top_k, weighted)
+        # 単語の順序を変えて加算したので、スコアはクエリの順に計算し直す（score / NumPy版と同じ値）
+        results = [(self.score(query_tokens, i) * (factor(i) if factor else 1.0), i) for _, i in top]
+        results.sort(key=lambda item: (-item[0], item[1]))
+        return [(score, i, self.documents[i]) for score, i in results]
+
+    def _search_numpy(self, query_tokens, top_k, recency_weight, decay_days, now):
+        """
+        search のNumPy版（結果は同じ）
 
-        # 全文書のスコアを計算
-        scores = []
-        for i in range(len(self.documents)):
-            score = self.score(query_tokens, i)
-            if score > 0:
-                scores.append((score, i, self.documents[i]))
-
-        # スコアでソート（降順）
-        scores.sort(key=lambda x: x[0], reverse=True)
+        単語ごとにCSRの範囲を取り出してスコアを配列に加算し、argpartition で上位k件を選ぶ。
+        """
+        np = _numpy
+        csr = self._csr
+        if csr is None or len(self.documents) - csr.n_docs > self.NUMPY_MAX_PENDING:
+            csr = self._csr = _CSRIndex(self)
+        avg_doc_length = self.avg_doc_length
+        norms = csr.norms(self.k1, self.b, avg_doc_length)
+        scores = np.zeros(len(self.documents), dtype=np.float64)
+        pending = range(csr.n_docs, len(self.documents))
 
-        return scores[:top_k]
+        for term in query_tokens:
+            idf = self.get_idf(term)
+            if idf is None:
+                continue
+            term_id = csr.term_ids.get(term)
+            if term_id is not None:
+                start, end = csr.indptr[term_id], csr.indptr[term_id + 1]
+                docs = csr.doc_indices[start:end]
+                tfs = csr.tfs[start:end]
+                scores[docs] += idf * (tfs * (self.k1 + 1) / (tfs + norms[docs]))
+            # CSR作成後に追加された文書
+            if pending:
+                docs = self.postings[term]
+                for doc_index in pending:
+                    tf = docs.get(doc_index)
+                    if tf is not None:
+                        scores[doc_index] += self._term_score(idf, tf, self.doc_lengths[doc_index],
+                                                              avg_doc_length)
+
+        scores[:csr.n_docs][~csr.alive] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+        if recency_weight:
+            # 係数は経過日数ごとに1回だけ計算する（Python版と同じ値）
+            doc_times = np.concatenate([csr.doc_times, np.array(self.doc_times[csr.n_docs:], dtype=np.float64)])
+            days_ago, inverse = np.unique(np.floor((now - doc_times[candidates]) / 86400), return_inverse=True)
+            factors = np.array([_recency_factor(float(days), recency_weight, decay_days) for days in days_ago])
+            scores[candidates] *= factors[inverse]
+        if len(candidates) > top_k:
+            # k番目のスコアより大きいものと、同点のうち文書インデックスが小さいもの
+            kth = np.partition(scores[candidates], len(candidates) - top_k)[len(candidates) - top_k]
+            above = candidates[scores[candidates] > kth]
+            tied = candidates[scores[candidates] == kth][:top_k - len(above)]
+            candidates = np.concatenate([above, tied])
+        order = np.lexsort((candidates, -scores[candidates]))
+        return [(float(scores[i]), int(i), self.documents[i]) for i in candidates[order]]
 
 
 def calculate_recency_weight(timestamp_str, decay_days=30):
@@ -242,35 +793,176 @@ def calculate_recency_weight(timestamp_str, decay_days=30):
 class SmartHistorySearcher:
     """
     高精度な履歴検索クラス
-    BM25 + 時間的重み付けを組み合わせた検索
+    BM25 + 時間的重み付けを組み合わせた検索（時間的重みはBM25の順位付けの中で掛ける）
+
+    検索結果は (クエリのトークン, 件数, インデックスの世代) をキーにキャッシュする。
+    インデックスが変わると世代が変わるため、古い結果は使われない。
     """
 
-    def __init__(self, recency_weight=0.3, decay_days=30):
+    # 検索結果キャッシュの件数と有効期間（秒。時間的重みは時刻とともに変わるため）
+    SEARCH_CACHE_SIZE = 64
+    SEARCH_CACHE_TTL = 600
+
+    def __init__(self, recency_weight=0.3, decay_days=30, backend='auto'):
         """
         初期化
 
         Parameters:
         recency_weight (float): 時間的重みの影響度（0.0-1.0）
         decay_days (int): 重みが半減するまでの日数
+        backend (str): BM25のスコア計算（BM25Ranker を参照）
         """
-        self.bm25 = BM25Ranker()
+        self.bm25 = BM25Ranker(backend=backend)
         self.recency_weight = recency_weight
         self.decay_days = decay_days
         self.is_fitted = False
+        self.version = None  # 反映済みの履歴のバージョン
+        self.tokenizer = None  # インデックスを作ったトークナイザーの版
+        self._search_cache = OrderedDict()  # キー → (保存時刻, 結果)
+        self._search_cache_generation = None
+        self.cache_stats = {'hits': 0, 'misses': 0}
 
     def fit(self, history_entries):
         """
-        履歴データで検索エンジンを学習
+        履歴データで検索エンジンを学習（文書キーは履歴ID）
 
         Parameters:
-        history_entries (list): 履歴エントリのリスト
+        history_entries (iterable): 履歴エントリのリストまたはイテレータ
         """
-        if not history_entries:
+        if history_entries is None:
             self.is_fitted = False
             return
 
-        self.bm25.fit(history_entries)
-        self.is_fitted = True
+        self.tokenizer = tokenizer_version()
+        self.bm25.fit(history_entries, key=lambda entry: entry.get('id'))
+        self.is_fitted = self.bm25.n_docs > 0
+
+    def apply_changes(self, changes):
+        """
+        履歴の変更をインデックスに反映する（変更された文書だけをトークン化）
+
+        Parameters:
+        changes (list): [(履歴ID, エントリ。削除された場合はNone), ...]
+
+        Returns:
+        tuple: (削除した (履歴ID, 単語) のリスト, 追加した (履歴ID, トークン数) のリスト,
+                追加したポスティング (単語, 履歴ID, 出現回数) のリスト)
+        """
+        bm25 = self.bm25
+        removed, added, postings = [], [], []
+        # 追加・更新された文書はまとめてトークン化する（changes と同じ順）
+        token_lists = iter(tokenize_many(_document_text(entry) for _, entry in changes if entry is not None))
+        for history_id, entry in changes:
+            doc_index = bm25.doc_keys.get(history_id)
+            if doc_index is not None:
+                removed.append((history_id, bm25.doc_terms[doc_index]))
+                bm25.remove_document(history_id)
+            if entry is None:
+                continue
+            doc_index = bm25.add_document(entry, history_id, next(token_lists))
+            added.append((history_id, bm25.doc_lengths[doc_index]))
+            postings.extend((term, history_id, bm25.postings[term][doc_index])
+                            for term in bm25.doc_terms[doc_index])
+        self.is_fitted = bm25.n_docs > 0
+        return removed, added, postings
+
+    def sync(self, history_manager):
+        """
+        翻訳履歴の変更を取り込む
+
+        初回は保存済みのインデックスを読み込み、その後は変更フィードの差分だけを反映する。
+        差分を取れない場合（保存済みインデックスがない・古すぎる）は全件を学習し直す。
+        SQLiteモードではインデックスをDBに保存・差分更新する。
+
+        Parameters:
+        history_manager: TranslationHistoryインスタンス
+
+        Returns:
+        str: 'unchanged' / 'incremental' / 'loaded' / 'rebuilt'
+        """
+        mode = 'unchanged'
+        if self.tokenizer is not None and self.tokenizer != tokenizer_version():
+            # Janomeの読み込みが終わった: Janomeのインデックスを読み込むか学習し直す
+            self.version = None
+        if self.version is None and self._load_saved_index(history_manager):
+            mode = 'loaded'
+
+        version, changes = history_manager.get_changes(self.version)
+        if changes is None:
+            self.fit(history_manager.iter_history())
+            self.version = version
+            self._save_index()
+            return 'rebuilt'
+
+        if changes:
+            removed, added, postings = self.apply_changes(changes)
+            if self._persistent(version):
+                from core import dictionary_db as db
+                db.update_search_index(self.tokenizer, version, removed, added, postings)
+            if mode == 'unchanged':
+                mode = 'incremental'
+        self.version = version
+        return mode
+
+    @staticmethod
+    def _persistent(version):
+        """
+        SQLiteの変更フィードに基づくバージョンなら保存できる
+
+        Janomeの読み込み中（簡易トークナイザで代用中）は保存しない。
+        保存済みのJanomeのインデックスを上書きすると、読み込み後に作り直しになるため。
+        """
+        from core import dictionary_db as db
+        warming_up = _janome_warmup_thread is not None and not _janome_ready.is_set()
+        return isinstance(version, int) and db.DB_PATH is not None and not warming_up
+
+    def _save_index(self):
+        """転置インデックス全体をSQLiteに保存する（すべての文書に履歴IDがある場合のみ）"""
+        if not self._persistent(self.version):
+            return False
+        from core import dictionary_db as db
+        bm25 = self.bm25
+        documents = [(doc['id'], bm25.doc_lengths[i]) for i, doc in enumerate(bm25.documents)
+                     if doc is not None]
+        if any(history_id is None for history_id, _ in documents):
+            return False
+        ids = [doc['id'] if doc is not None else None for doc in bm25.documents]
+        postings = ((term, ids[doc_index], tf)
+                    for term, docs in bm25.postings.items() for doc_index, tf in docs.items())
+        return db.save_search_index(self.tokenizer, self.version, documents, postings)
+
+    def _load_saved_index(self, history_manager):
+        """
+        保存済みの転置インデックスを読み込む（トークン化しない）
+        読み込み後の差分は sync が変更フィードから反映する
+
+        Returns:
+        bool: 読み込んだかどうか
+        """
+        from core import dictionary_db as db
+        if db.DB_PATH is None:
+            return False
+        tokenizer = tokenizer_version()
+        stored = db.load_search_index(tokenizer)
+        if stored is None:
+            return False
+
+        version, documents, posting_rows = stored
+        entries_by_id = {entry.get('id'): entry for entry in history_manager.iter_history()}
+        # 保存後に削除された文書は除く（変更フィードの削除は何もしない）
+        documents = [(history_id, length) for history_id, length in documents if history_id in entries_by_id]
+        positions = {history_id: i for i, (history_id, _) in enumerate(documents)}
+        postings = {}
+        for term, history_id, tf in posting_rows:
+            if history_id in positions:
+                postings.setdefault(term, {})[positions[history_id]] = tf
+        self.bm25.load_index([entries_by_id[history_id] for history_id, _ in documents],
+                             [length for _, length in documents], postings,
+                             keys=[history_id for history_id, _ in documents])
+        self.is_fitted = self.bm25.n_docs > 0
+        self.version = version
+        self.tokenizer = tokenizer
+        return True
 
     def search(self, query, top_k=3):
         """
@@ -286,28 +978,43 @@ class SmartHistorySearcher:
         if not self.is_fitted:
             return []
 
-        # BM25で検索
-        bm25_results = self.bm25.search(query, top_k=top_k * 2)  # 多めに取得
-
-        if not bm25_results:
-            return []
-
-        # 時間的重み付けを適用
-        weighted_results = []
-        for bm25_score, idx, doc in bm25_results:
-            timestamp = doc.get('timestamp', '')
-            recency = calculate_recency_weight(timestamp, self.decay_days)
-
-            # 最終スコア = BM25スコア * (1 - recency_weight) + 時間スコア * recency_weight
-            final_score = bm25_score * (1 - self.recency_weight) + recency * self.recency_weight * bm25_score
-
-            weighted_results.append((final_score, doc))
-
-        # スコアでソート
-        weighted_results.sort(key=lambda x: x[0], reverse=True)
+        # インデックスが変わっていたらキャッシュを捨てる
+        if self._search_cache_generation != self.bm25.generation:
+            self._search_cache.clear()
+            self._search_cache_generation = self.bm25.generation
+
+        # 語順・表記の違うクエリも同じトークンなら同じキー（スコアはトークンの重複を含めた集合で決まる）
+        key = (tuple(sorted(tokenize_cached(query))), top_k, self.recency_weight, self.decay_days)
+        now = time.time()
+        cached = self._search_cache.get(key)
+        if cached is not None and now - cached[0] < self.SEARCH_CACHE_TTL:
+            self._search_cache.move_to_end(key)
+            self.cache_stats['hits'] += 1
+            return list(cached[1])
+
+        # BM25 × 時間的重みで上位k件を選ぶ
+        results = self.bm25.search(query, top_k=top_k, recency_weight=self.recency_weight,
+                                   decay_days=self.decay_days, now=now)
+        docs = [doc for _, _, doc in results]
+        self.cache_stats['misses'] += 1
+        self._search_cache[key] = (now, docs)
+        self._search_cache.move_to_end(key)
+        while len(self._search_cache) > self.SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        return list(docs)
+
+    def get_cache_stats(self):
+        """
+        検索結果キャッシュの統計
 
-        # 上位k件を返す
-        return [doc for _, doc in weighted_results[:top_k]]
+        Returns:
+        dict: {hits, misses, hit_rate, size}
+        """
+        stats = dict(self.cache_stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['size'] = len(self._search_cache)
+        return stats
 
 
 def extract_keywords(text, max_keywords=10):
@@ -321,7 +1028,7 @@ def extract_keywords(text, max_keywords=10):
     Returns:
     list: キーワードのリスト
     """
-    tokens = tokenize_japanese(text)
+    tokens = tokenize_cached(text)
 
     # 頻度でソート
     token_counts = Counter(tokens)
@@ -110,4 +110,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # 履歴検索のトークン化で使うプロセスプール（spawn）をexe化した環境でも動かす
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
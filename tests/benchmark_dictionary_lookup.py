@@ -0,0 +1,114 @@
+# ClipboardTranslator v1.20 - Dictionary Lookup Benchmark
+# 辞書検索のベンチマーク（JOIN + ORDER BY と resolved_dictionary の主キー検索を比較）
+#
+# 使い方:
+#     python tests/benchmark_dictionary_lookup.py [--data-dir DIR] [--lookups N]
+#
+# data_dir に ejdict-hand-utf8.txt があれば全件を使用し、
+# ない場合は同程度の規模（約47,000語）の合成データで計測する。
+
+import os
+import sys
+import io
+import time
+import random
+import argparse
+import tempfile
+
+# Windows環境でのUnicodeサポート
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from core import dictionary_db as db
+
+SYNTHETIC_WORDS = 47000
+
+JOIN_LOOKUP_SQL = '''
+    SELECT d.meaning FROM dictionary d
+    JOIN dictionary_sources s ON d.source = s.name
+    WHERE d.word = ? AND s.enabled = 1
+    ORDER BY d.priority DESC, s.priority DESC
+    LIMIT 1
+'''
+
+RESOLVED_LOOKUP_SQL = 'SELECT meaning FROM resolved_dictionary WHERE word = ?'
+
+
+def load_corpus(data_dir):
+    """ejdict を読み込む（ない場合は合成データ）"""
+    ejdict_path = os.path.join(data_dir, 'ejdict-hand-utf8.txt')
+    if os.path.exists(ejdict_path):
+        return list(db.iter_ejdict(ejdict_path)), 'ejdict'
+
+    rng = random.Random(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < SYNTHETIC_WORDS:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(3, 12))))
+    return [(w, f"{w}の意味") for w in sorted(words)], 'synthetic'
+
+
+def time_lookups(conn, sql, words):
+    """1検索あたりの平均時間（マイクロ秒）"""
+    start = time.perf_counter()
+    for word in words:
+        conn.execute(sql, (word,)).fetchone()
+    return (time.perf_counter() - start) / len(words) * 1_000_000
+
+
+def run_benchmark(data_dir, lookups):
+    rows, corpus_name = load_corpus(data_dir)
+    print(f"コーパス: {corpus_name} ({len(rows)}語)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db.init_database(tmp_dir)
+        db.register_source("ejdict", "EJDict", priority=40)
+        db.register_source("ngsl", "NGSL", priority=50)
+        db.bulk_import(rows, "ejdict", priority=40)
+        # 一部の単語を上位ソースに重複させて優先順位の解決を発生させる
+        db.bulk_import(rows[::20], "ngsl", priority=50)
+
+        conn = db.get_connection()
+        rng = random.Random(1)
+        corpus_words = [word for word, _ in rows]
+        hit_words = [rng.choice(corpus_words) for _ in range(lookups)]
+        miss_words = [f"zz{rng.random()}" for _ in range(lookups)]
+
+        # ウォームアップ
+        time_lookups(conn, JOIN_LOOKUP_SQL, hit_words[:1000])
+        time_lookups(conn, RESOLVED_LOOKUP_SQL, hit_words[:1000])
+
+        results = [
+            ("JOIN + ORDER BY (ヒット)", time_lookups(conn, JOIN_LOOKUP_SQL, hit_words)),
+            ("resolved_dictionary (ヒット)", time_lookups(conn, RESOLVED_LOOKUP_SQL, hit_words)),
+            ("JOIN + ORDER BY (未登録語)", time_lookups(conn, JOIN_LOOKUP_SQL, miss_words)),
+            ("resolved_dictionary (未登録語)", time_lookups(conn, RESOLVED_LOOKUP_SQL, miss_words)),
+        ]
+
+        start = time.perf_counter()
+        db.enable_source("ngsl", False)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        db.close_database()
+
+    print(f"\n  {lookups}回の検索（1回あたり平均）")
+    for name, micros in results:
+        print(f"    {name:<32} {micros:8.2f} µs")
+    print(f"\n  ソース無効化時の一括再構築: {rebuild_ms:.0f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="辞書検索のベンチマーク")
+    parser.add_argument('--data-dir', default=os.path.join(project_root, 'data'))
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args(argv)
+    run_benchmark(args.data_dir, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
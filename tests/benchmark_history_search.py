@@ -0,0 +1,129 @@
+# ClipboardTranslator v1.20 - History Search Benchmark
+# 翻訳履歴の検索のベンチマーク（LIKE '%q%' の全件走査と FTS5 trigram インデックスを比較）
+#
+# 使い方:
+#     python tests/benchmark_history_search.py [--sizes 10000,100000,1000000] [--repeat N]
+#
+# 件数ごとに合成した履歴で一時DBを作成し、検索1回あたりの時間を計測する。
+
+import os
+import sys
+import io
+import time
+import random
+import argparse
+import tempfile
+
+# Windows環境でのUnicodeサポート
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from core import dictionary_db as db
+
+INSERT_BATCH = 10000
+
+EN_WORDS = [
+    'the', 'weather', 'report', 'meeting', 'schedule', 'budget', 'customer', 'release', 'server',
+    'update', 'review', 'document', 'network', 'project', 'deadline', 'contract', 'invoice',
+    'travel', 'hotel', 'flight', 'ticket', 'problem', 'solution', 'request', 'answer', 'question',
+]
+JA_WORDS = [
+    '天気', '報告', '会議', '予定', '予算', '顧客', '公開', 'サーバー', '更新', '確認', '文書',
+    'ネットワーク', '計画', '締め切り', '契約', '請求書', '出張', 'ホテル', '航空券', '問題', '解決',
+]
+
+# (説明, 検索語)。「まれ」な語は一部の行にだけ含まれる
+QUERIES = [
+    ("英語・頻出", "meeting"),
+    ("英語・まれ", "zephyrine"),
+    ("日本語・頻出", "締め切り"),
+    ("日本語・まれ", "紫陽花"),
+]
+RARE_EVERY = 1000
+
+
+def synthetic_rows(count, rng):
+    """合成した履歴の行 (entry_key, 原文, 訳文, ソース言語, 作成日時)"""
+    for i in range(count):
+        original = ' '.join(rng.choice(EN_WORDS) for _ in range(rng.randint(5, 15))) + f" #{i}"
+        translated = ''.join(rng.choice(JA_WORDS) for _ in range(rng.randint(4, 10))) + f"（{i}）"
+        if i % RARE_EVERY == 0:
+            original += " zephyrine"
+            translated += "紫陽花"
+        timestamp = f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:{i % 59:02d}"
+        yield (db.history_entry_key(original, 'EN', 'normal'), original, translated, 'EN', timestamp)
+
+
+def populate(count):
+    """履歴を一括で書き込み、所要時間（秒）を返す"""
+    rng = random.Random(count)
+    start = time.perf_counter()
+    rows = synthetic_rows(count, rng)
+    while True:
+        batch = [row for _, row in zip(range(INSERT_BATCH), rows)]
+        if not batch:
+            break
+        with db.write_transaction() as conn:
+            conn.executemany('''
+                INSERT INTO translation_history
+                (entry_key, original_text, translated_text, source_lang, target_lang,
+                 translation_type, created_at)
+                VALUES (?, ?, ?, ?, 'JA', 'normal', ?)
+            ''', batch)
+    return time.perf_counter() - start
+
+
+def time_call(func, repeat):
+    """1回あたりの平均時間（ミリ秒）"""
+    func()  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run_size(count, repeat):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db.init_database(tmp_dir)
+        insert_seconds = populate(count)
+        size_mb = os.path.getsize(db.DB_PATH) / (1024 * 1024)
+        print(f"\n{count:,}件（書き込み {insert_seconds:.1f}秒, {size_mb:.0f}MB）")
+        print(f"    {'検索語':<16}{'LIKE':>12}{'FTS5':>12}{'FTS5 関連度順':>16}")
+
+        for label, query in QUERIES:
+            fts_available = db.history_fts_available()
+            db._history_fts_available = False
+            like_ms = time_call(lambda: db.get_history_page(200, query=query), repeat)
+            db._history_fts_available = fts_available
+            if fts_available:
+                fts_ms = time_call(lambda: db.get_history_page(200, query=query), repeat)
+                ranked_ms = time_call(lambda: db.search_history_ranked(query, limit=20), repeat)
+                print(f"    {label:<16}{like_ms:10.2f}ms{fts_ms:10.2f}ms{ranked_ms:14.2f}ms")
+            else:
+                print(f"    {label:<16}{like_ms:10.2f}ms{'-':>12}{'-':>16}")
+
+        db.close_database()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="翻訳履歴の検索のベンチマーク")
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help="履歴の件数（カンマ区切り）")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for count in (int(size) for size in args.sizes.split(',')):
+        run_size(count, args.repeat)
+    print("\n  LIKE: 先頭ワイルドカードのため全件走査"
+          f"\n  FTS5: 直近{db.HISTORY_RECENT_SCAN_ROWS}行で1ページ（200件, 新しい順）に満たなければ trigram インデックス"
+          "\n  関連度順: bm25 の上位20件と抜粋"
+          f"\n  {db.HISTORY_FTS_MIN_QUERY}文字未満の検索語は trigram が使えないため LIKE で検索する")
+
+
+if __name__ == "__main__":
+    main()
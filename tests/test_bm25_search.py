@@ -319,6 +319,420 @@ def test_janome_availability():
         return False
 
 
+def test_inverted_index_persistence():
+    """転置インデックスと永続化のテスト（一時DBを使用）"""
+    print_header("8. 転置インデックス・永続化・差分更新テスト")
+
+    import tempfile
+    from core import dictionary_db as db
+    from core import history as history_module
+    from core.tutor.search import SmartHistorySearcher, tokenize_japanese
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            words = ['alleviate', 'mitigate', 'exacerbate', 'ameliorate', 'aggravate']
+            db.add_history_entries([
+                {'original_text': f"{words[i % 5]} example {i}", 'translated_text': f"軽減する 例文{i}",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'}
+                for i in range(60)
+            ])
+            history = history_module.TranslationHistory(
+                history_file_path=os.path.join(tmp_dir, 'translation_history.json'))
+
+            searcher = SmartHistorySearcher()
+            searcher.fit(history.iter_history())
+            bm25 = searcher.bm25
+
+            # 転置インデックスの検索結果が全文書のスコア計算と一致する
+            query = "mitigate 軽減する"
+            tokens = tokenize_japanese(query)
+            brute = sorted(((bm25.score(tokens, i), i) for i in range(len(bm25.documents))),
+                           key=lambda x: x[0], reverse=True)
+            brute = [(score, i) for score, i in brute if score > 0][:5]
+            indexed = [(score, i) for score, i, _ in bm25.search(query, top_k=5)]
+            passed1 = indexed == brute
+            print_result("転置インデックスの検索結果", passed1, f"{indexed[:2]}")
+
+            def scores_by_id(target, query):
+                return {doc['id']: round(score, 9) for score, _, doc in target.bm25.search(query, top_k=100)}
+
+            searcher = SmartHistorySearcher()
+            mode1 = searcher.sync(history)
+            restored = SmartHistorySearcher()
+            mode2 = restored.sync(history)
+            passed2 = (mode1 == 'rebuilt' and mode2 == 'loaded' and
+                       restored.bm25.postings == searcher.bm25.postings and
+                       restored.bm25.search(query, top_k=5) == searcher.bm25.search(query, top_k=5))
+            print_result("保存と読み込み", passed2, f"{mode1} → {mode2}, {len(searcher.bm25.postings)}語")
+
+            # 件数が変わらないUPSERT・追加・削除を差分で反映
+            history.add_entry("mitigate example 1", "緩和する", "EN", "JA", "normal")
+            history.add_entry("ameliorate", "改善する", "EN", "JA", "normal")
+            history.flush()
+            deleted = db.find_cached_translation("alleviate example 0", "EN", "normal")
+            db.delete_history_entry(deleted['id'])
+            mode3 = searcher.sync(history)
+            mode4 = searcher.sync(history)
+            refit = SmartHistorySearcher()
+            refit.fit(history.iter_history())
+            passed3 = (mode3 == 'incremental' and mode4 == 'unchanged' and
+                       searcher.bm25.n_docs == refit.bm25.n_docs == 60 and
+                       all(scores_by_id(searcher, q) == scores_by_id(refit, q)
+                           for q in ("mitigate 軽減する", "緩和する", "ameliorate", "alleviate")))
+            print_result("差分更新（全件再学習と同じスコア）", passed3, f"{mode3} → {mode4}")
+
+            # 差分更新した保存済みインデックスを読み込める
+            reloaded = SmartHistorySearcher()
+            mode5 = reloaded.sync(history)
+            passed4 = (mode5 == 'loaded' and scores_by_id(reloaded, "緩和する") == scores_by_id(refit, "緩和する"))
+            print_result("差分更新後の読み込み", passed4, mode5)
+
+            # 変更フィードの保持期間を超えたら全件を学習し直す
+            history.add_entry("aggravate", "悪化させる", "EN", "JA", "normal")
+            history.add_entry("exacerbate", "悪化させる", "EN", "JA", "normal")
+            history.flush()
+            db.prune_history_changes(keep=1)
+            passed5 = reloaded.sync(history) == 'rebuilt' and reloaded.bm25.n_docs == 62
+            print_result("変更フィードの欠落で再学習", passed5)
+            history.close()
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4 and passed5
+
+    except Exception as e:
+        print_result("転置インデックス・永続化", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+        else:
+            db.DB_PATH = None
+
+
+def test_token_cache():
+    """トークンキャッシュと並列トークン化のテスト（一時DBを使用）"""
+    print_header("9. トークンキャッシュ・並列トークン化テスト")
+
+    import tempfile
+    from core import dictionary_db as db
+    from core.tutor import search
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            texts = [f"mitigate the risk {i} リスクを軽減する{i % 7}" for i in range(40)] + ["", "重複 duplicate"] * 2
+            expected = [search.tokenize_japanese(text) for text in texts]
+
+            # 並列（下限0で強制）と逐次の結果が同じ
+            parallel = search._tokenize_texts(texts, workers=2, parallel_min=0)
+            passed1 = parallel == expected
+            print_result("並列トークン化", passed1, f"{len(parallel)}件")
+
+            # 1回目はトークン化してDBに保存、2回目はすべてキャッシュから
+            before = search.get_tokenize_stats()
+            first = search.tokenize_many(texts)
+            middle = search.get_tokenize_stats()
+            second = search.tokenize_many(texts)
+            after = search.get_tokenize_stats()
+            tokenized = middle['tokenized'] - before['tokenized']
+            passed2 = (first == second == expected and tokenized == len(set(texts)) and
+                       after['tokenized'] == middle['tokenized'] and
+                       after['db_hits'] - middle['db_hits'] == len(texts))
+            print_result("DBキャッシュ", passed2,
+                         f"トークン化 {tokenized}件, 2回目のヒット {after['db_hits'] - middle['db_hits']}件")
+
+            # 件数上限で古いものから削除
+            removed = db.prune_token_cache(max_entries=10)
+            passed3 = removed == len(set(texts)) - 10 and len(db.get_cached_tokens(
+                [db.token_cache_key(text) for text in texts], search.tokenizer_version())) == 10
+            print_result("キャッシュの件数上限", passed3, f"削除 {removed}件")
+
+            # クエリはメモリのキャッシュ
+            search.tokenize_cached("軽減する方法")
+            hits = search.get_tokenize_stats()['memory_hits']
+            passed4 = (search.tokenize_cached("軽減する方法") == search.tokenize_japanese("軽減する方法") and
+                       search.get_tokenize_stats()['memory_hits'] == hits + 1)
+            print_result("クエリのメモリキャッシュ", passed4)
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4
+
+    except Exception as e:
+        print_result("トークンキャッシュ", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+        else:
+            db.DB_PATH = None
+
+
+def test_numpy_backend():
+    """NumPyバックエンドのテスト（Pythonと同じスコア・順位）"""
+    print_header("10. NumPyバックエンドテスト")
+
+    try:
+        import random
+        from core.tutor.search import BM25Ranker, _check_numpy
+
+        if not _check_numpy():
+            print_result("NumPy", True, "未インストール（Pythonで計算）")
+            return BM25Ranker(backend='numpy').backend == 'python'
+
+        fixtures = [
+            {'original_text': 'alleviate', 'translated_text': '和らげる、軽減する'},
+            {'original_text': 'exacerbate', 'translated_text': '悪化させる'},
+            {'original_text': 'mitigate', 'translated_text': '緩和する、軽減する'},
+            {'original_text': 'aggravate', 'translated_text': '悪化させる、怒らせる'},
+            {'original_text': 'ameliorate', 'translated_text': '改善する'},
+        ]
+        rng = random.Random(17)
+        words = ['alleviate', 'mitigate', 'exacerbate', 'ameliorate', 'aggravate', 'weather', 'report']
+        documents = fixtures + [
+            {'id': i, 'original_text': ' '.join(rng.choice(words) for _ in range(rng.randint(1, 6))),
+             'translated_text': rng.choice(['軽減する', '悪化させる', '改善する', '天気予報'])}
+            for i in range(300)
+        ]
+        queries = ["alleviate", "軽減する", "悪化させる", "mitigate weather 改善する", "mitigate mitigate", "unknown"]
+
+        python_ranker = BM25Ranker(backend='python')
+        numpy_ranker = BM25Ranker(backend='numpy')
+        python_ranker.fit(documents, key=lambda doc: doc.get('id'))
+        numpy_ranker.fit(documents, key=lambda doc: doc.get('id'))
+
+        def same_results():
+            return all(python_ranker.search(q, top_k=k) == numpy_ranker.search(q, top_k=k)
+                       for q in queries for k in (1, 3, 10, 1000))
+
+        passed1 = numpy_ranker.backend == 'numpy' and same_results()
+        print_result("学習直後のスコア・順位", passed1,
+                     f"{numpy_ranker.search('軽減する', top_k=2)[0][:2]}")
+
+        # CSR作成後の追加・削除（CSRを作り直さずに反映）
+        for ranker in (python_ranker, numpy_ranker):
+            for i in range(0, 300, 7):
+                ranker.remove_document(i)
+            for i in range(300, 340):
+                ranker.add_document({'id': i, 'original_text': 'mitigate report', 'translated_text': '改善する'}, i)
+        passed2 = same_results()
+        print_result("追加・削除後のスコア・順位", passed2)
+
+        return passed1 and passed2
+
+    except Exception as e:
+        print_result("NumPyバックエンド", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_recency_in_ranker():
+    """時間的重みを掛けた上位k件のテスト（全文書のスコア計算と一致）"""
+    print_header("11. 時間的重み付きの上位k件テスト")
+
+    try:
+        import random
+        import time
+        from datetime import timedelta
+        from core.tutor.search import BM25Ranker, _check_numpy, _recency_factor, tokenize_cached
+
+        rng = random.Random(18)
+        words = ['alleviate', 'mitigate', 'exacerbate', 'ameliorate', 'aggravate', 'weather', 'report',
+                 'schedule', 'budget', 'meeting']
+        now = time.time()
+        base = datetime.fromtimestamp(now)
+        documents = [
+            {'id': i, 'original_text': ' '.join(rng.choice(words) for _ in range(rng.randint(1, 8))),
+             'translated_text': rng.choice(['軽減する', '悪化させる', '改善する', '天気予報', '会議']),
+             'timestamp': (base - timedelta(days=rng.randint(0, 400), hours=rng.randint(0, 23))
+                           ).strftime('%Y-%m-%d %H:%M:%S') if i % 17 else 'unknown'}
+            for i in range(2000)
+        ]
+        queries = ["alleviate", "mitigate weather 改善する", "budget meeting report schedule", "aggravate aggravate"]
+
+        def brute(ranker, query, top_k, weight):
+            tokens = tokenize_cached(query)
+            results = []
+            for i, doc in enumerate(ranker.documents):
+                score = ranker.score(tokens, i)
+                if score > 0:
+                    if weight:
+                        days = (now - ranker.doc_times[i]) // 86400 if doc['timestamp'] != 'unknown' else float('nan')
+                        score *= _recency_factor(days, weight, 30)
+                    results.append((score, i))
+            results.sort(key=lambda item: (-item[0], item[1]))
+            return results[:top_k]
+
+        backends = ['python'] + (['numpy'] if _check_numpy() else [])
+        passed1 = True
+        for backend in backends:
+            ranker = BM25Ranker(backend=backend)
+            ranker.fit(documents)
+            for query in queries:
+                for top_k in (1, 3, 10):
+                    for weight in (0.0, 0.3, 1.0):
+                        got = [(score, i) for score, i, _ in
+                               ranker.search(query, top_k=top_k, recency_weight=weight, now=now)]
+                        if got != brute(ranker, query, top_k, weight):
+                            passed1 = False
+        print_result("全文書のスコア計算と一致", passed1, f"バックエンド: {backends}")
+
+        # 古いが関連度の高い文書も時間的重みで落とされずに残る
+        ranker = BM25Ranker(backend='python')
+        old = (base - timedelta(days=200)).strftime('%Y-%m-%d %H:%M:%S')
+        recent = base.strftime('%Y-%m-%d %H:%M:%S')
+        ranker.fit([{'original_text': 'alleviate alleviate alleviate', 'translated_text': '', 'timestamp': old}] +
+                   [{'original_text': f'alleviate weather report {i}', 'translated_text': '天気予報',
+                     'timestamp': recent} for i in range(10)])
+        top = ranker.search("alleviate", top_k=1, recency_weight=0.3, now=now)
+        passed2 = top[0][1] == 0
+        print_result("関連度の高い古い文書", passed2, f"1位: {top[0][1]}")
+
+        return passed1 and passed2
+
+    except Exception as e:
+        print_result("時間的重み付きの上位k件", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_tokenizer_warmup():
+    """形態素解析のバックグラウンド読み込みのテスト"""
+    print_header("12. 形態素解析のバックグラウンド読み込みテスト")
+
+    import time
+    import tempfile
+    from core import dictionary_db as db
+    from core.tutor import search
+
+    saved = (search._janome_available, search._tokenizer, search._janome_ready.is_set(),
+             search._janome_warmup_thread, search._janome_warmup_seconds)
+
+    class History:
+        def get_changes(self, since_version):
+            return 1, (None if since_version is None else [])
+
+        def iter_history(self):
+            return iter([{'id': 1, 'original_text': 'alleviate', 'translated_text': '軽減する'}])
+
+    try:
+        # 未読み込みの状態に戻し、読み込みが終わらないようにロックを持っておく
+        search._janome_available = None
+        search._janome_ready.clear()
+        search._janome_warmup_thread = None
+        search._janome_lock.acquire()
+        try:
+            thread = search.start_tokenizer_warmup()
+            start = time.perf_counter()
+            tokens = search.tokenize_japanese("英語の勉強は大切です")
+            elapsed = time.perf_counter() - start
+            status = search.get_tokenizer_status()
+            passed1 = (thread is not None and not status['ready'] and
+                       tokens == search.simple_tokenize("英語の勉強は大切です") and
+                       status['version'] == search.tokenizer_version(False) and elapsed < 0.5)
+            print_result("読み込み中は簡易トークナイザ（待たない）", passed1, f"{elapsed * 1000:.1f}ms")
+
+            # 読み込み中の学習結果は、保存済みのJanomeのインデックスを上書きしない
+            previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+            try:
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    db.init_database(tmp_dir)
+                    db.save_search_index('janome-test', 1, [(1, 1)], [('alleviate', 1, 1)])
+                    mode = search.SmartHistorySearcher().sync(History())
+                    passed4 = mode == 'rebuilt' and db.load_search_index('janome-test') is not None
+                    print_result("読み込み中はインデックスを保存しない", passed4, mode)
+                    db.close_database()
+            finally:
+                if previous_dir:
+                    db.init_database(previous_dir)
+                else:
+                    db.DB_PATH = None
+        finally:
+            search._janome_lock.release()
+
+        thread.join(timeout=30)
+        status = search.get_tokenizer_status()
+        passed2 = (status['ready'] and status['warmup_seconds'] is not None and
+                   search.start_tokenizer_warmup() is None)
+        print_result("読み込み完了", passed2, f"{status}")
+
+        # トークナイザーが変わったらインデックスを作り直す
+        searcher = search.SmartHistorySearcher()
+        mode1 = searcher.sync(History())
+        searcher.tokenizer = 'simple-0'
+        mode2 = searcher.sync(History())
+        passed3 = (mode1 == 'rebuilt' and mode2 == 'rebuilt' and
+                   searcher.tokenizer == search.tokenizer_version())
+        print_result("トークナイザーの変更で再学習", passed3, f"{mode1} → {mode2}")
+
+        return passed1 and passed2 and passed3 and passed4
+
+    except Exception as e:
+        print_result("形態素解析の読み込み", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        (search._janome_available, search._tokenizer, ready,
+         search._janome_warmup_thread, search._janome_warmup_seconds) = saved
+        if ready:
+            search._janome_ready.set()
+        else:
+            search._janome_ready.clear()
+
+
+def test_search_cache():
+    """検索結果キャッシュのテスト"""
+    print_header("13. 検索結果キャッシュテスト")
+
+    try:
+        from core.tutor.search import SmartHistorySearcher
+
+        entries = [
+            {'id': 1, 'original_text': 'alleviate', 'translated_text': '軽減する', 'timestamp': ''},
+            {'id': 2, 'original_text': 'mitigate', 'translated_text': '緩和する、軽減する', 'timestamp': ''},
+            {'id': 3, 'original_text': 'exacerbate', 'translated_text': '悪化させる', 'timestamp': ''},
+        ]
+        searcher = SmartHistorySearcher()
+        searcher.fit(entries)
+
+        first = searcher.search("mitigate 軽減する", top_k=2)
+        second = searcher.search("軽減する mitigate", top_k=2)  # 語順が違っても同じキー
+        stats = searcher.get_cache_stats()
+        passed1 = first == second and stats['hits'] == 1 and stats['misses'] == 1 and stats['hit_rate'] == 0.5
+        print_result("同じトークンのクエリはキャッシュ", passed1, f"{stats}")
+
+        searcher.search("mitigate 軽減する", top_k=3)  # 件数が違えば別キー
+        passed2 = searcher.get_cache_stats()['misses'] == 2
+        print_result("件数が違えば別キー", passed2)
+
+        # インデックスが変わったら結果を作り直す
+        searcher.apply_changes([(4, {'id': 4, 'original_text': 'mitigate mitigate',
+                                     'translated_text': '軽減する', 'timestamp': ''})])
+        third = searcher.search("mitigate 軽減する", top_k=2)
+        stats = searcher.get_cache_stats()
+        passed3 = third[0]['id'] == 4 and stats['misses'] == 3
+        print_result("インデックスの変更で無効化", passed3, f"1位: {third[0]['original_text']}")
+
+        return passed1 and passed2 and passed3
+
+    except Exception as e:
+        print_result("検索結果キャッシュ", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def run_all_tests():
     """全テストを実行"""
     print("\n" + "=" * 60)
@@ -336,6 +750,12 @@ def run_all_tests():
     results.append(("SmartHistorySearcher", test_smart_history_searcher()))
     results.append(("TutorChatHandler統合", test_tutor_chat_handler_integration()))
     results.append(("Janome形態素解析", test_janome_availability()))
+    results.append(("転置インデックス・永続化", test_inverted_index_persistence()))
+    results.append(("トークンキャッシュ・並列化", test_token_cache()))
+    results.append(("NumPyバックエンド", test_numpy_backend()))
+    results.append(("時間的重み付きの上位k件", test_recency_in_ranker()))
+    results.append(("形態素解析のバックグラウンド読み込み", test_tokenizer_warmup()))
+    results.append(("検索結果キャッシュ", test_search_cache()))
 
     # 結果サマリー
     print_header("テスト結果サマリー")
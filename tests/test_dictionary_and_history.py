@@ -4,6 +4,7 @@
 import os
 import sys
 import io
+import time
 
 # Windows環境でのUnicodeサポート
 if sys.platform == 'win32':
@@ -254,6 +255,7 @@ def test_history_class():
         cached = history.find_cached("Integration test", "EN")
         print_result("find_cached", cached is not None)
 
+        history.close()
         return True
 
     except Exception as e:
@@ -263,6 +265,915 @@ def test_history_class():
         return False
 
 
+def test_bulk_import():
+    """一括インポートテスト（一時DBを使用）"""
+    print_header("7. 一括インポートテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ejdict_path = os.path.join(tmp_dir, 'ejdict-hand-utf8.txt')
+            with open(ejdict_path, 'w', encoding='utf-8') as f:
+                f.write("Apple\tりんご\n")
+                f.write("invalid line\n")
+                f.write("banana\tバナナ\n")
+                f.write("apple\t林檎\n")  # 重複語（後勝ち）
+                for i in range(12000):
+                    f.write(f"word{i}\t意味{i}\n")
+
+            db.init_database(tmp_dir)
+            count = db.import_from_ejdict(ejdict_path, source="ejdict", priority=40)
+            passed1 = count == 12002
+            print_result("インポート件数", passed1, f"{count}件 (期待: 12002)")
+
+            passed2 = db.lookup_word("apple") == "林檎"
+            print_result("重複語は後勝ち", passed2, f"apple → {db.lookup_word('apple')}")
+
+            indexes = {row[0] for row in db.get_connection().execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'dictionary'")}
+            passed3 = {'idx_word', 'idx_word_source'} <= indexes
+            print_result("インデックス再作成", passed3, f"{sorted(indexes)}")
+
+            # 辞書データのインポートは既存データにマージし、ファイル全体の再インポートは置き換える
+            count2 = db.import_dictionary_data({"cherry": "さくらんぼ", "banana": "芭蕉"}, "ejdict", 40)
+            merged = (count2 == 2 and db.lookup_word("apple") == "林檎" and
+                      db.lookup_word("banana") == "芭蕉" and
+                      db.get_source_info("ejdict")['word_count'] == 12003)
+            count3 = db.import_from_ejdict(ejdict_path, source="ejdict", priority=40)
+            passed4 = (merged and count3 == 12002 and db.lookup_word("cherry") is None and
+                       db.lookup_word("banana") == "バナナ" and
+                       db.get_source_info("ejdict")['word_count'] == 12002)
+            print_result("マージと置き換え", passed4, f"マージ {count2}件, 置き換え {count3}件")
+
+            stats = db.get_import_stats().get('ejdict', {})
+            passed5 = stats.get('rows_per_sec', 0) > 0
+            print_result("rows/sec計測", passed5, f"{stats.get('rows_per_sec', 0):,.0f} rows/sec")
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4 and passed5
+
+    except Exception as e:
+        print_result("一括インポート", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_background_import():
+    """バックグラウンドインポート・再開テスト（一時DBを使用）"""
+    print_header("8. バックグラウンドインポートテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+    from core import dictionary
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, 'ngsl-1.2-ja.csv'), 'w', encoding='utf-8') as f:
+                f.write("entry,meaning\nthe,その\nbe,～である\n")
+            with open(os.path.join(tmp_dir, 'ejdict-hand-utf8.txt'), 'w', encoding='utf-8') as f:
+                f.write("abandon\t捨てる\nability\t能力\nthe\t《冠詞》\n")
+
+            dictionary.init_dictionaries(tmp_dir, use_sqlite=True, defer_import=True)
+            passed1 = dictionary.needs_dictionary_import(tmp_dir)
+            print_result("インポート保留", passed1)
+
+            # 中断を再現: NGSLのみ完了した状態でチェックポイントを残す
+            db.set_meta(dictionary.INITIAL_IMPORT_KEY, 'running')
+            ngsl_path = os.path.join(tmp_dir, 'ngsl-1.2-ja.csv')
+            db.import_from_csv_ngsl(ngsl_path)
+            db.set_source_hash('ngsl', dictionary._input_hash(ngsl_path))
+
+            events = []
+            thread = dictionary.start_background_import(tmp_dir, on_progress=events.append)
+            thread.join(timeout=30)
+
+            states = {(e['source'], e['state']) for e in events}
+            passed2 = ('ngsl', 'skipped') in states and ('ejdict', 'done') in states
+            print_result("完了済みソースのスキップ", passed2, f"イベント: {sorted(states)}")
+
+            passed3 = (dictionary.check_dictionary("the", "EN") == "その" and
+                       dictionary.check_dictionary("abandon", "EN") == "捨てる")
+            print_result("インポート後の検索", passed3)
+
+            passed4 = not dictionary.needs_dictionary_import(tmp_dir)
+            print_result("チェックポイント完了", passed4)
+
+            # 入力ファイルのハッシュはサイズ・更新時刻とともにメモし、変わるまで再計算しない
+            meta_key = dictionary.INPUT_HASH_KEY_PREFIX + 'ngsl-1.2-ja.csv'
+            stat = os.stat(ngsl_path)
+            memo = db.get_meta(meta_key)
+            dictionary._input_hash_cache.clear()
+            db.set_meta(meta_key, f"{stat.st_size} {stat.st_mtime_ns} memo-hash")
+            memo_used = dictionary._input_hash(ngsl_path) == 'memo-hash'
+            dictionary._input_hash_cache.clear()
+            os.utime(ngsl_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            rehashed = dictionary._input_hash(ngsl_path) == db.compute_file_hash(ngsl_path)
+            passed5 = (memo == f"{stat.st_size} {stat.st_mtime_ns} {db.compute_file_hash(ngsl_path)}" and
+                       memo_used and rehashed)
+            print_result("入力ハッシュのメモ", passed5)
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4 and passed5
+
+    except Exception as e:
+        print_result("バックグラウンドインポート", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_prebuilt_database():
+    """配布用辞書DBテスト（一時ディレクトリを使用）"""
+    print_header("9. 配布用辞書DBテスト")
+
+    import shutil
+    import tempfile
+    from core import dictionary_db as db
+    from core import dictionary
+    from core.dictionary_build import build_prebuilt_database
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as build_dir, tempfile.TemporaryDirectory() as app_dir:
+            with open(os.path.join(build_dir, 'ngsl-1.2-ja.csv'), 'w', encoding='utf-8') as f:
+                f.write("entry,meaning\nthe,その\nbe,～である\n")
+            with open(os.path.join(build_dir, 'ejdict-hand-utf8.txt'), 'w', encoding='utf-8') as f:
+                f.write("abandon\t捨てる\nability\t能力\n")
+
+            result = build_prebuilt_database(build_dir)
+            passed1 = result is not None and result['words'] == 4
+            print_result("ビルド", passed1, f"{result}")
+
+            # 入力ファイルのない配布環境: DBファイルをコピーして即利用
+            shutil.copyfile(result['path'], os.path.join(app_dir, dictionary.PREBUILT_DB_NAME))
+            dictionary.init_dictionaries(app_dir, use_sqlite=True, defer_import=True)
+            passed2 = (dictionary.check_dictionary("abandon", "EN") == "捨てる" and
+                       not dictionary.needs_dictionary_import(app_dir))
+            print_result("初回起動でコピー", passed2)
+
+            # 入力ファイルが変更された場合はそのソースだけ再構築が必要
+            db.close_database()
+            dictionary.init_dictionaries(build_dir, use_sqlite=True, defer_import=True)
+            passed3 = not dictionary.needs_dictionary_import(build_dir)
+            with open(os.path.join(build_dir, 'ejdict-hand-utf8.txt'), 'a', encoding='utf-8') as f:
+                f.write("able\tできる\n")
+            stale = dictionary._find_stale_sources(dictionary._build_import_plan(build_dir))
+            passed3 = passed3 and stale == ['ejdict']
+            print_result("入力変更の検出", passed3, f"再構築対象: {stale}")
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3
+
+    except Exception as e:
+        print_result("配布用辞書DB", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_lookup_cache():
+    """辞書検索キャッシュテスト（一時DBを使用）"""
+    print_header("10. 辞書検索キャッシュテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            db.register_source("base", "テスト辞書", priority=10)
+            db.import_from_dict({"apple": "りんご", "orange": "オレンジ"}, source="base", priority=10)
+            db.reset_lookup_cache_stats()
+
+            db.lookup_word("Apple")
+            db.lookup_word("apple ")
+            db.lookup_word("banana")
+            db.lookup_word("banana")
+            stats = db.get_lookup_cache_stats()
+            passed1 = stats['hits'] == 2 and stats['misses'] == 2 and stats['size'] == 2
+            print_result("ヒット/ミス計測（未登録語もキャッシュ）", passed1, f"{stats}")
+
+            db.add_word("banana", "バナナ")
+            db.add_word("apple", "林檎")
+            passed2 = db.lookup_word("banana") == "バナナ" and db.lookup_word("apple") == "林檎"
+            db.remove_word("apple", source="user")
+            passed2 = passed2 and db.lookup_word("apple") == "りんご"
+            print_result("add_word / remove_word で無効化", passed2)
+
+            db.lookup_word("orange")
+            db.enable_source("base", False)
+            passed3 = (db.lookup_word("orange") is None and
+                       db.lookup_word("banana") == "バナナ")
+            db.enable_source("base", True)
+            passed3 = passed3 and db.lookup_word("orange") == "オレンジ"
+            db.import_from_dict({"orange": "だいだい"}, source="base", priority=10)
+            passed3 = passed3 and db.lookup_word("orange") == "だいだい"
+            db.delete_source("base")
+            passed3 = passed3 and db.lookup_word("orange") is None
+            print_result("ソース切り替え・削除・インポートで無効化", passed3)
+
+            db.set_lookup_cache_size(1)
+            db.lookup_word("apple")
+            db.lookup_word("banana")
+            passed4 = db.get_lookup_cache_stats()['size'] == 1
+            print_result("サイズ上限", passed4)
+
+            db.set_lookup_cache_size(1024)
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4
+
+    except Exception as e:
+        print_result("辞書検索キャッシュ", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_resolved_dictionary():
+    """実体化テーブル（resolved_dictionary）テスト（一時DBを使用）"""
+    print_header("11. 実体化テーブルテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+
+    def join_lookup(word):
+        row = db.get_connection().execute('''
+            SELECT d.meaning FROM dictionary d
+            JOIN dictionary_sources s ON d.source = s.name
+            WHERE d.word = ? AND s.enabled = 1
+            ORDER BY d.priority DESC, s.priority DESC
+            LIMIT 1
+        ''', (word,)).fetchone()
+        return row['meaning'] if row else None
+
+    def matches_join(words):
+        db.clear_lookup_cache()
+        return all(db.lookup_word(w) == join_lookup(w) for w in words)
+
+    words = ["apple", "orange", "grape", "melon"]
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            db.register_source("low", "低優先", priority=10)
+            db.register_source("high", "高優先", priority=50)
+            db.import_from_dict({"apple": "りんご(低)", "orange": "オレンジ(低)", "grape": "ぶどう"},
+                                source="low", priority=10)
+            db.import_from_dict({"apple": "りんご(高)", "melon": "メロン"}, source="high", priority=50)
+
+            passed1 = db.lookup_word("apple") == "りんご(高)" and matches_join(words)
+            print_result("インポート後の解決", passed1)
+
+            db.add_word("grape", "葡萄")
+            passed2 = db.lookup_word("grape") == "葡萄"
+            db.remove_word("grape", source="user")
+            passed2 = passed2 and db.lookup_word("grape") == "ぶどう" and matches_join(words)
+            print_result("単語の追加・削除（差分更新）", passed2)
+
+            db.enable_source("high", False)
+            passed3 = db.lookup_word("apple") == "りんご(低)" and matches_join(words)
+            db.enable_source("high", True)
+            db.delete_source("low")
+            passed3 = passed3 and db.lookup_word("orange") is None and matches_join(words)
+            print_result("ソース切り替え・削除（一括再構築）", passed3)
+
+            # 実体化テーブルのない既存DBは初期化時に構築される
+            with db.write_transaction() as conn:
+                conn.execute('DROP TABLE resolved_dictionary')
+            db.init_database(tmp_dir)
+            passed4 = matches_join(words) and db.lookup_word("melon") == "メロン"
+            print_result("既存DBのマイグレーション", passed4)
+
+            # ソースの再登録は優先度が変わった場合のみ再構築する
+            rebuilds = []
+            rebuild = db.rebuild_resolved_dictionary
+            db.rebuild_resolved_dictionary = lambda conn=None: rebuilds.append(1) or rebuild(conn)
+            try:
+                db.register_source("high", "高優先", priority=50)
+                db.register_source("high", "高優先", priority=60)
+            finally:
+                db.rebuild_resolved_dictionary = rebuild
+            passed5 = len(rebuilds) == 1 and matches_join(words)
+            print_result("ソース再登録（優先度の変更時のみ再構築）", passed5, f"再構築 {len(rebuilds)}回")
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4 and passed5
+
+    except Exception as e:
+        print_result("実体化テーブル", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_connection_pool():
+    """スレッドごとの接続とWALのテスト（一時DBを使用）"""
+    print_header("12. 接続プールテスト")
+
+    import tempfile
+    import threading
+    from core import dictionary_db as db
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            stats = db.get_pool_stats()
+            passed1 = stats['journal_mode'] == 'wal'
+            print_result("WALモード", passed1, f"journal_mode: {stats['journal_mode']}")
+
+            main_conn = db.get_connection()
+            thread_conns = []
+            errors = []
+
+            def reader():
+                try:
+                    thread_conns.append(db.get_connection())
+                    for _ in range(50):
+                        db.get_history(max_items=5)
+                        db.lookup_word("apple")
+                except Exception as e:
+                    errors.append(e)
+
+            def writer(n):
+                try:
+                    for i in range(25):
+                        db.add_history_entry(f"text {n}-{i}", f"訳 {n}-{i}", "EN", "JA")
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=reader) for _ in range(4)]
+            threads += [threading.Thread(target=writer, args=(n,)) for n in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(timeout=30)
+
+            passed2 = (not errors and len({id(c) for c in thread_conns}) == 4 and
+                       all(c is not main_conn for c in thread_conns))
+            print_result("スレッドごとの読み取り接続", passed2, f"エラー: {errors}")
+
+            passed3 = db.get_history_count() == 50
+            stats = db.get_pool_stats()
+            passed3 = passed3 and stats['writes'] >= 50 and stats['open_readers'] == 1
+            print_result("書き込みの直列化・終了スレッドの接続回収", passed3, f"{stats}")
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3
+
+    except Exception as e:
+        print_result("接続プール", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_history_write_queue():
+    """履歴の書き込みキューテスト（一時DBを使用）"""
+    print_header("13. 履歴書き込みキューテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+    from core import history as history_module
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            history = history_module.TranslationHistory(
+                history_file_path=os.path.join(tmp_dir, 'translation_history.json'))
+            # 自動フラッシュが起きないよう間隔と件数を大きくする
+            history._write_queue = history_module.HistoryWriteQueue(
+                flush_interval_ms=60000, max_entries=1000)
+
+            history.add_entry("queued one", "キュー1", "EN", "JA", "normal")
+            history.add_entry("queued two", "キュー2", "EN", "JA", "dictionary")
+            history.add_entry("queued one", "キュー1(更新)", "EN", "JA", "normal")
+
+            passed1 = (db.get_history_count() == 0 and
+                       len(history.get_history()) == 2 and
+                       history.find_cached("queued one", "EN", "normal")['translated_text'] == "キュー1(更新)" and
+                       len(history.search_history("QUEUED")) == 2 and
+                       len(history.get_history(filter_type="dictionary")) == 1)
+            print_result("未書き込みエントリの読み取り", passed1)
+
+            written = history.flush()
+            passed2 = written == 2 and db.get_history_count() == 2 and len(history.get_history()) == 2
+            print_result("1トランザクションで書き込み", passed2, f"{written}件")
+
+            history.add_entry("queued three", "キュー3", "EN", "JA", "normal")
+            history.close()
+            passed3 = (db.get_history_count() == 3 and
+                       db.find_cached_translation("queued three", "EN") is not None)
+            print_result("終了時に書き切る", passed3)
+
+            # 件数しきい値による自動フラッシュ
+            queue = history_module.HistoryWriteQueue(flush_interval_ms=60000, max_entries=2)
+            queue.put({'timestamp': None, 'original_text': 'a', 'translated_text': 'A',
+                       'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'})
+            queue.put({'timestamp': None, 'original_text': 'b', 'translated_text': 'B',
+                       'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'})
+            deadline = time.time() + 5
+            while queue.pending_entries() and time.time() < deadline:
+                time.sleep(0.01)
+            passed4 = not queue.pending_entries() and db.get_history_count() == 5
+            queue.close()
+            print_result("件数しきい値でフラッシュ", passed4)
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4
+
+    except Exception as e:
+        print_result("履歴書き込みキュー", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_history_upsert():
+    """履歴の一意キー・UPSERT・マイグレーションテスト（一時DBを使用）"""
+    print_header("14. 履歴UPSERTテスト")
+
+    import sqlite3
+    import tempfile
+    from core import dictionary_db as db
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # entry_key 列のない旧スキーマのDB（重複を含む）を用意
+            legacy = sqlite3.connect(db.get_db_path(tmp_dir))
+            legacy.execute('''
+                CREATE TABLE translation_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    original_text TEXT NOT NULL,
+                    translated_text TEXT NOT NULL,
+                    source_lang TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    translation_type TEXT DEFAULT 'normal',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            legacy.execute('CREATE INDEX idx_history_original ON translation_history(original_text)')
+            rows = [(f"text {i}", f"訳 {i}", "EN", "JA", "normal") for i in range(25)]
+            rows.append(("text 3", "訳 3 (新)", "EN", "JA", "normal"))
+            legacy.executemany('''
+                INSERT INTO translation_history
+                (original_text, translated_text, source_lang, target_lang, translation_type)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            legacy.commit()
+            legacy.close()
+
+            db.HISTORY_KEY_MIGRATION_BATCH, batch = 10, db.HISTORY_KEY_MIGRATION_BATCH
+            try:
+                db.init_database(tmp_dir)
+            finally:
+                db.HISTORY_KEY_MIGRATION_BATCH = batch
+            conn = db.get_connection()
+            indexes = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+            nulls = conn.execute(
+                'SELECT COUNT(*) FROM translation_history WHERE entry_key IS NULL').fetchone()[0]
+            passed1 = ('idx_history_entry_key' in indexes and 'idx_history_original' not in indexes and
+                       nulls == 0 and db.get_history_count() == 25 and
+                       db.find_cached_translation("text 3", "EN", "normal")['translated_text'] == "訳 3 (新)")
+            print_result("既存DBのマイグレーション", passed1, f"件数: {db.get_history_count()}")
+
+            db.add_history_entry("text 5", "訳 5 (更新)", "EN", "JA", "normal")
+            db.add_history_entry("text 5", "text 5 dict", "EN", "JA", "dictionary")
+            passed2 = (db.get_history_count() == 26 and
+                       db.find_cached_translation("text 5", "EN", "normal")['translated_text'] == "訳 5 (更新)" and
+                       db.find_cached_translation("text 5", "EN") is not None and
+                       db.find_cached_translation("text 5", "JA") is None)
+            print_result("UPSERT", passed2)
+
+            key = db.history_entry_key("text 5", "EN", "normal")
+            plan = ' '.join(row[3] for row in conn.execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM translation_history WHERE entry_key IN (?) '
+                'AND original_text = ?', (key, "text 5")))
+            passed3 = 'idx_history_entry_key' in plan
+            print_result("ハッシュキーで検索", passed3, plan)
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3
+
+    except Exception as e:
+        print_result("履歴UPSERT", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_translation_cache():
+    """翻訳キャッシュテスト（一時DBを使用）"""
+    print_header("15. 翻訳キャッシュテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+    from core.translation_cache import TranslationCache, prompt_version
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            cache = TranslationCache(ttl_days=30, max_entries=3, memory_entries=2)
+
+            cache.put("Hello", "EN", "JA", "deepl", "こんにちは")
+            passed1 = (cache.get("Hello", "EN", "JA", "deepl") == "こんにちは" and
+                       cache.get("Hello", "EN", "ZH", "deepl") is None and
+                       cache.get("Hello", "EN", "JA", "google") is None)
+            print_result("翻訳先言語・プロバイダーごとのキー", passed1)
+
+            v1, v2 = prompt_version("単語:{word}"), prompt_version("word:{word}")
+            cache.put("cat", "EN", "JA", "claude:haiku", "猫", v1)
+            passed2 = (v1 != v2 and cache.get("cat", "EN", "JA", "claude:haiku", v1) == "猫" and
+                       cache.get("cat", "EN", "JA", "claude:haiku", v2) is None)
+            print_result("プロンプト版ごとのキー", passed2)
+
+            # 保存はメモリに置いて戻り、DBへの書き込みは flush（またはバックグラウンド）で行う
+            cache.flush()
+
+            # メモリを経由しない新しいインスタンスでもDBからヒット
+            fresh = TranslationCache(ttl_days=30, max_entries=3)
+            passed3 = fresh.get("Hello", "EN", "JA", "deepl") == "こんにちは"
+            stats = fresh.get_stats()
+            passed3 = passed3 and stats['db_hits'] == 1 and fresh.get("Hello", "EN", "JA", "deepl")
+            passed3 = passed3 and fresh.get_stats()['memory_hits'] == 1
+            print_result("メモリ/DBの2段構成", passed3, f"{fresh.get_stats()}")
+
+            # 件数上限: 最終ヒットが最も古いエントリから削除
+            cache.put("one", "EN", "JA", "deepl", "1")
+            cache.get("Hello", "EN", "JA", "deepl")
+            cache.flush()
+            time.sleep(0.01)
+            cache.put("two", "EN", "JA", "deepl", "2")
+            cache.flush()
+            passed4 = (db.get_translation_cache_stats()['entries'] == 3 and
+                       TranslationCache().get("cat", "EN", "JA", "claude:haiku", v1) is None and
+                       TranslationCache().get("Hello", "EN", "JA", "deepl") == "こんにちは")
+            print_result("件数上限（LRU）", passed4, f"{db.get_translation_cache_stats()}")
+
+            # TTL: 期限切れはミス
+            expired = TranslationCache(ttl_days=1)
+            with db.write_transaction() as conn:
+                conn.execute('UPDATE translation_cache SET created_at = created_at - 2 * 86400')
+            passed5 = expired.get("two", "EN", "JA", "deepl") is None
+            print_result("TTL", passed5)
+
+            # 書き込み待ちの行へのヒットもヒット数・最終ヒット時刻に反映する
+            queued = TranslationCache(memory_entries=0)
+            queued.put("queued", "EN", "JA", "deepl", "待機")
+            hit = queued.get("queued", "EN", "JA", "deepl")
+            queued.flush()
+            row = db.get_connection().execute(
+                "SELECT hit_count FROM translation_cache WHERE original_text = 'queued'").fetchone()
+            passed6 = hit == "待機" and row is not None and row['hit_count'] == 1
+            print_result("書き込み待ちのヒット", passed6)
+            queued.close()
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4 and passed5 and passed6
+
+    except Exception as e:
+        print_result("翻訳キャッシュ", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_history_pagination():
+    """履歴のキーセットページネーションテスト（一時DBを使用）"""
+    print_header("16. 履歴ページネーションテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+    from core import history as history_module
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            # 同じ時刻のエントリを含めて (created_at, id) で順序が決まることを確認
+            db.add_history_entries([
+                {'original_text': f"word {i}", 'translated_text': f"単語 {i}",
+                 'source_lang': 'EN', 'target_lang': 'JA',
+                 'translation_type': 'dictionary' if i % 3 == 0 else 'normal',
+                 'timestamp': f"2024-01-{1 + i // 100:02d} 00:00:00"}
+                for i in range(450)
+            ])
+
+            pages = []
+            cursor = None
+            while True:
+                entries, cursor = db.get_history_page(200, cursor)
+                pages.append(entries)
+                if cursor is None:
+                    break
+            ids = [e['id'] for page in pages for e in page]
+            passed1 = ([len(p) for p in pages] == [200, 200, 50] and len(set(ids)) == 450 and
+                       ids == [e['id'] for e in db.get_history()])
+            print_result("ページ分割（重複・欠落なし）", passed1, f"ページ: {[len(p) for p in pages]}")
+
+            dict_count = sum(1 for _ in db.iter_history(filter_type='dictionary', page_size=40))
+            search_count = sum(1 for _ in db.iter_history(query='word 1', page_size=7))
+            passed2 = dict_count == 150 and search_count == len(db.search_history('word 1'))
+            print_result("フィルタ・検索のイテレータ", passed2, f"辞書: {dict_count}, 検索: {search_count}")
+
+            plan = ' '.join(row[3] for row in db.get_connection().execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM translation_history '
+                'WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 200',
+                ('2024-01-03 00:00:00', 300)))
+            passed3 = 'idx_history_created_id' in plan and 'TEMP B-TREE' not in plan
+            print_result("インデックスでシーク", passed3, plan)
+
+            history = history_module.TranslationHistory(
+                history_file_path=os.path.join(tmp_dir, 'translation_history.json'))
+            history._write_queue = history_module.HistoryWriteQueue(flush_interval_ms=60000)
+            history.add_entry("word 5", "単語 5 (更新)", "EN", "JA", "normal")
+            first, cursor = history.get_history_page(10)
+            rest = list(history.iter_history(page_size=100))
+            passed4 = (first[0]['translated_text'] == "単語 5 (更新)" and cursor is not None and
+                       len(rest) == 450 and history.get_history_count() == 451)
+            print_result("TranslationHistoryのページ取得（未書き込み分を先頭に）", passed4)
+            history.close()
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4
+
+    except Exception as e:
+        print_result("履歴ページネーション", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_history_page_model():
+    """履歴ダイアログのページモデルテスト（一時DBを使用）"""
+    print_header("17. 履歴ダイアログのページモデルテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+    from core import history as history_module
+    from core.history import HistoryPageModel
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            db.add_history_entries([
+                {'original_text': f"sentence number {i} " + "x" * 100, 'translated_text': f"文 {i}",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal',
+                 'timestamp': f"2024-01-01 00:{i // 60:02d}:{i % 60:02d}"}
+                for i in range(500)
+            ])
+            history = history_module.TranslationHistory(
+                history_file_path=os.path.join(tmp_dir, 'translation_history.json'))
+
+            model = HistoryPageModel(history, page_size=100, max_pages=2)
+            first_rows = model.reset()
+            row = first_rows[0]
+            entry = model.get_entry(row)
+            passed1 = (len(first_rows) == 100 and row['entry'] is None and
+                       row['original'].endswith('...') and len(row['original']) == 33 and
+                       entry['original_text'] == "sentence number 499 " + "x" * 100)
+            print_result("要約行とIDによる詳細取得", passed1, row['original'])
+
+            sizes = []
+            while model.has_older:
+                rows, removed = model.load_older()
+                sizes.append((len(rows), removed, len(model.rows)))
+            bottom_ids = [r['id'] for r in model.rows]
+            passed2 = sizes[-1][2] == 200 and all(total <= 200 for _, _, total in sizes)
+            print_result("保持する行はウィンドウ分のみ", passed2, f"{sizes}")
+
+            while model.has_newer:
+                model.load_newer()
+            passed3 = ([r['id'] for r in model.rows][:100] == [r['id'] for r in first_rows] and
+                       len(model.rows) == 200 and bottom_ids[-1] == min(bottom_ids))
+            print_result("先頭側のページの再読み込み", passed3)
+
+            history.delete_entry(entry)
+            model.reset()
+            passed4 = model.rows[0]['id'] != row['id'] and history.get_history_count() == 499
+            print_result("IDによる削除", passed4)
+            history.close()
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4
+
+    except Exception as e:
+        print_result("履歴ダイアログのページモデル", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_history_search_runner():
+    """履歴検索の取り消しテスト（一時DBを使用）"""
+    print_header("18. 履歴検索の取り消しテスト")
+
+    import tempfile
+    import threading
+    from core import dictionary_db as db
+    from core import history as history_module
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            db.add_history_entries([
+                {'original_text': f"entry {i}", 'translated_text': f"項目 {i}",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'}
+                for i in range(5000)
+            ])
+
+            cancel_event = threading.Event()
+            cancel_event.set()
+            try:
+                with db.cancellable_reads(cancel_event):
+                    db.get_history_page(200, query='not found')
+                passed1 = False
+            except db.QueryCancelled:
+                passed1 = True
+            entries, _ = db.get_history_page(200, query='entry 4999')
+            passed1 = passed1 and len(entries) == 1
+            print_result("progress handlerによる中断", passed1)
+
+            scheduled = []
+            runner = history_module.HistorySearchRunner(scheduled.append)
+            results = []
+            started = threading.Event()
+            release = threading.Event()
+            finished = threading.Event()
+
+            def slow_task(emit):
+                started.set()
+                release.wait(5)
+                emit('old')
+
+            def new_task(emit):
+                emit(db.get_history_page(10, query='entry 42')[0][0]['original_text'])
+                finished.set()
+
+            runner.search(slow_task, results.append)
+            started.wait(5)
+            runner.search(new_task, results.append)
+            release.set()
+            finished.wait(5)
+            for callback in scheduled:
+                callback()
+            passed2 = results == ['entry 4299']
+            print_result("古い検索の結果は捨てられる", passed2, f"{results}")
+            runner.close()
+
+            db.close_database()
+
+        return passed1 and passed2
+
+    except Exception as e:
+        print_result("履歴検索の取り消し", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
+def test_history_fts():
+    """履歴の全文検索テスト（一時DBを使用）"""
+    print_header("19. 履歴の全文検索テスト")
+
+    import tempfile
+    from core import dictionary_db as db
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            if not db.history_fts_available():
+                print_result("FTS5 trigram が使えないためスキップ", True)
+                db.close_database()
+                return True
+
+            db.add_history_entries([
+                {'original_text': "The weather is nice today.", 'translated_text': "今日は天気が良いです。",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'},
+                {'original_text': "weather forecast", 'translated_text': "天気予報",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'},
+                {'original_text': "明日の天気予報を確認します", 'translated_text': "I will check tomorrow's forecast",
+                 'source_lang': 'JA', 'target_lang': 'EN', 'translation_type': 'normal'},
+            ] + [
+                {'original_text': f"filler sentence {i}", 'translated_text': f"埋め草 {i}",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'}
+                for i in range(200)
+            ])
+
+            # 分かち書きのない日本語の部分一致
+            japanese = [e['translated_text'] for e in db.search_history("天気予報")]
+            passed1 = sorted(japanese) == sorted(["天気予報", "I will check tomorrow's forecast"])
+            print_result("日本語の部分一致（trigram）", passed1, f"{japanese}")
+
+            ranked = db.search_history_ranked("weather", limit=10)
+            passed2 = (len(ranked) == 2 and ranked[0]['original_text'] == "weather forecast" and
+                       "[weather]" in ranked[0]['snippet_original'] and ranked[0]['score'] < 0)
+            print_result("関連度順・抜粋の強調", passed2,
+                         f"{[(e['snippet_original'], round(e['score'], 3)) for e in ranked]}")
+
+            # トリガーでの同期（UPSERTによる更新・削除）
+            db.add_history_entry("weather forecast", "天候の見通し", "EN", "JA", "normal")
+            updated = db.search_history("天候")
+            entry = db.find_cached_translation("The weather is nice today.", "EN", "normal")
+            db.delete_history_entry(entry['id'])
+            passed3 = (len(updated) == 1 and db.search_history("天気予報") == db.search_history("明日の天気") and
+                       db.search_history("nice today") == [])
+            print_result("トリガーによる同期", passed3)
+
+            plan = ' '.join(row[3] for row in db.get_connection().execute(
+                'EXPLAIN QUERY PLAN SELECT rowid FROM translation_history_fts '
+                'WHERE translation_history_fts MATCH ?', ('"forecast"',)))
+            short = db.search_history("天候")  # 2文字は LIKE で検索
+            db._history_fts_available = False
+            fallback = db.search_history_ranked("forecast")
+            db._history_fts_available = True
+            passed4 = ('VIRTUAL TABLE' in plan and len(short) == 1 and len(fallback) == 2 and
+                       fallback[0]['score'] is None and
+                       all("[forecast]" in e['snippet_original'] + e['snippet_translated'] for e in fallback))
+            print_result("短い検索語・FTS5なしのフォールバック", passed4, plan)
+
+            # トリガーのない既存DBはインデックスを再構築
+            with db.write_transaction() as conn:
+                conn.execute('DROP TRIGGER trg_history_fts_insert')
+                conn.execute("INSERT INTO translation_history_fts(translation_history_fts) VALUES ('delete-all')")
+            db.init_database(tmp_dir)
+            passed5 = len(db.search_history("filler sentence 19")) == 11
+            print_result("既存DBのインデックス再構築", passed5)
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4 and passed5
+
+    except Exception as e:
+        print_result("履歴の全文検索", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+
+
 def run_all_tests():
     """全テストを実行"""
     print("\n" + "=" * 60)
@@ -279,6 +1190,19 @@ def run_all_tests():
     results.append(("履歴操作", test_history_operations()))
     results.append(("辞書モジュール統合", test_legacy_fallback()))
     results.append(("TranslationHistoryクラス", test_history_class()))
+    results.append(("一括インポート", test_bulk_import()))
+    results.append(("バックグラウンドインポート", test_background_import()))
+    results.append(("配布用辞書DB", test_prebuilt_database()))
+    results.append(("辞書検索キャッシュ", test_lookup_cache()))
+    results.append(("実体化テーブル", test_resolved_dictionary()))
+    results.append(("接続プール", test_connection_pool()))
+    results.append(("履歴書き込みキュー", test_history_write_queue()))
+    results.append(("履歴UPSERT", test_history_upsert()))
+    results.append(("翻訳キャッシュ", test_translation_cache()))
+    results.append(("履歴ページネーション", test_history_pagination()))
+    results.append(("履歴ダイアログのページモデル", test_history_page_model()))
+    results.append(("履歴検索の取り消し", test_history_search_runner()))
+    results.append(("履歴の全文検索", test_history_fts()))
 
     # 結果サマリー
     print_header("テスト結果サマリー")
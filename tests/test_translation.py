@@ -0,0 +1,545 @@
+# ClipboardTranslator v1.20 - Translation Transport Test Script
+# 翻訳APIの通信（セッションの共有・接続の再利用・時間の内訳）・文単位の翻訳・翻訳メモリ・Claudeのストリーミングのテストスクリプト
+# DeepL・Claude の代わりにローカルのHTTPサーバーを使う
+
+import os
+import sys
+import io
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Windows環境でのUnicodeサポート
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from datetime import datetime
+
+
+def print_header(title):
+    """セクションヘッダーを表示"""
+    print("\n" + "=" * 60)
+    print(f" {title}")
+    print("=" * 60)
+
+
+def print_result(test_name, success, details=""):
+    """テスト結果を表示"""
+    status = "PASS" if success else "FAIL"
+    print(f"  [{status}] {test_name}")
+    if details:
+        print(f"         {details}")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """DeepL・Claude の代わりのハンドラー（keep-alive 対応）"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    connections = 0
+    requests = []
+    stream_interval = 0.05  # ストリーミングのイベントの間隔（秒）
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StandInHandler.lock:
+            StandInHandler.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(405)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with StandInHandler.lock:
+            StandInHandler.requests.append((self.path, body))
+        if self.path == '/v2/translate':
+            from urllib.parse import parse_qs
+            texts = parse_qs(body.decode('utf-8'))['text']
+            result = {'translations': [{'text': f"訳:{text}"} for text in texts]}
+            self._send(200, json.dumps(result, ensure_ascii=False).encode('utf-8'))
+        elif self.path == '/v1/messages':
+            events = [{'type': 'message_start'}] + [
+                {'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': part}}
+                for part in ('意味: ', '和らげる')
+            ] + [{'type': 'message_stop'}]
+            # 実際のAPIと同じく chunked で、イベントごとに少し間をあけて送る
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for event in events:
+                chunk = f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode('utf-8')
+                self.wfile.write(f"{len(chunk):x}\r\n".encode('ascii') + chunk + b"\r\n")
+                self.wfile.flush()
+                time.sleep(StandInHandler.stream_interval)
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._send(404, b'{}')
+
+
+def start_stand_in_server():
+    """ローカルのHTTPサーバーを起動して (サーバー, ベースURL) を返す"""
+    StandInHandler.connections = 0
+    StandInHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_pooled_sessions():
+    """セッションの共有と接続の再利用のテスト"""
+    print_header("1. セッションの共有・接続の再利用テスト")
+
+    from config.settings import config
+    from core import translation
+
+    server, base_url = start_stand_in_server()
+    saved_urls = (translation.DEEPL_URL, translation.CLAUDE_API_URL)
+    had_settings = config.has_section('Settings')
+    saved_key = config.get('Settings', 'deepl_api_key', fallback=None)
+    try:
+        translation.DEEPL_URL = f"{base_url}/v2/translate"
+        translation.CLAUDE_API_URL = f"{base_url}/v1/messages"
+        if not had_settings:
+            config.add_section('Settings')
+        config.set('Settings', 'deepl_api_key', 'test-key')
+        translation.close_sessions()
+
+        # 事前接続した接続をその後の翻訳で再利用する
+        translation.prewarm_connections(['deepl']).join(timeout=10)
+        results = [translation.translate_with_deepl(f"hello {i}", 'JA') for i in range(3)]
+        timing = translation.get_last_timings()['deepl']
+        passed1 = (results == ["訳:hello 0", "訳:hello 1", "訳:hello 2"] and
+                   StandInHandler.connections == 1 and timing['reused'])
+        print_result("事前接続とkeep-alive", passed1,
+                     f"接続 {StandInHandler.connections}回, 合計 {timing['total'] * 1000:.1f}ms")
+
+        # Claude はストリーミングの応答を連結し、DeepLとは別のセッション
+        answer = translation.query_claude_api("alleviate", "{word}", "test-key", model_type='haiku')
+        timing = translation.get_last_timings()['claude']
+        passed2 = (answer == "意味: 和らげる" and StandInHandler.connections == 2 and
+                   not timing['reused'] and timing['ttfb'] <= timing['total'])
+        print_result("Claude（ストリーミング）", passed2,
+                     f"接続 {timing['connect'] * 1000:.1f}ms / 最初の応答 {timing['ttfb'] * 1000:.1f}ms")
+
+        # 同時リクエストでも接続数はプールの大きさまで
+        before = StandInHandler.connections
+        threads = [threading.Thread(target=translation.translate_with_deepl, args=(f"text {i}", 'JA'))
+                   for i in range(translation.HTTP_POOL_SIZE * 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        new_connections = StandInHandler.connections - before
+        passed3 = new_connections <= translation.HTTP_POOL_SIZE
+        print_result("同時リクエスト", passed3, f"新しい接続 {new_connections}回")
+
+        return passed1 and passed2 and passed3
+
+    except Exception as e:
+        print_result("セッションの共有", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        translation.close_sessions()
+        translation.DEEPL_URL, translation.CLAUDE_API_URL = saved_urls
+        if not had_settings:
+            config.remove_section('Settings')
+        elif saved_key is None:
+            config.remove_option('Settings', 'deepl_api_key')
+        else:
+            config.set('Settings', 'deepl_api_key', saved_key)
+        server.shutdown()
+        server.server_close()
+
+
+def test_connectivity_monitor():
+    """接続状態のキャッシュのテスト"""
+    print_header("2. 接続状態のキャッシュテスト")
+
+    import socket
+    from core import translation
+    from core.network import ConnectivityMonitor
+
+    saved_monitor = translation.connectivity
+    try:
+        probe_calls = []
+        probe_result = {'online': False}
+
+        def slow_probe():
+            probe_calls.append(time.monotonic())
+            time.sleep(0.3)
+            return probe_result['online']
+
+        monitor = ConnectivityMonitor(probe=slow_probe, online_ttl=60, offline_ttl=60,
+                                      backoff_min=5, backoff_max=40)
+
+        # 未確認なら待たずにオンラインとみなし、確認はバックグラウンドで行う
+        start = time.perf_counter()
+        first = monitor.is_connected()
+        elapsed = time.perf_counter() - start
+        monitor.refresh(wait=True)
+        passed1 = first and elapsed < 0.1 and not monitor.is_connected() and len(probe_calls) == 1
+        print_result("待たずに状態を返す", passed1, f"{elapsed * 1000:.1f}ms, 確認 {len(probe_calls)}回")
+
+        # 有効期間の間は確認しない・APIの成否で状態が変わる
+        for _ in range(10):
+            monitor.is_connected()
+        monitor.report_success()
+        passed2 = len(probe_calls) == 1 and monitor.is_connected() and monitor.get_state()['source'] == 'api'
+        print_result("キャッシュとAPIの成否", passed2, f"{monitor.get_state()}")
+
+        # オフラインが続くと定期確認の間隔を延ばす
+        intervals = []
+        for _ in range(5):
+            monitor.report_failure()
+            intervals.append(monitor.next_interval())
+        monitor.report_success()
+        passed3 = intervals == [5, 10, 20, 40, 40] and monitor.next_interval() == 60
+        print_result("バックオフ", passed3, f"{intervals}")
+
+        # 接続できなかったAPI呼び出しはオフラインとして記録される
+        translation.connectivity = monitor
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            closed_port = sock.getsockname()[1]
+        try:
+            translation._post('deepl', f"http://127.0.0.1:{closed_port}/v2/translate", data={}, timeout=2)
+            passed4 = False
+        except Exception:
+            passed4 = monitor.is_connected() is False and monitor.get_state()['source'] == 'api'
+        print_result("接続エラーでオフライン", passed4)
+
+        # 有効期間を過ぎたオフラインの状態では拒否せず、確認をバックグラウンドで始める
+        probe_result['online'] = True
+        before = len(probe_calls)
+        monitor.offline_ttl = 0
+        stale = monitor.is_connected()
+        monitor.refresh(wait=True)
+        monitor.offline_ttl = 60
+        passed5 = stale and len(probe_calls) == before + 1 and monitor.is_connected()
+        print_result("古いオフラインの状態では拒否しない", passed5, f"{monitor.get_state()}")
+
+        return passed1 and passed2 and passed3 and passed4 and passed5
+
+    except Exception as e:
+        print_result("接続状態のキャッシュ", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        translation.connectivity = saved_monitor
+        translation.close_sessions()
+
+
+def test_segmented_translation():
+    """文単位の翻訳（分割・文ごとのキャッシュ・まとめて送信）のテスト"""
+    print_header("3. 文単位の翻訳テスト")
+
+    from config.settings import config
+    from core import translation
+    from core import dictionary_db as db
+    from core.segmentation import split_sentences, join_sentences, translate_segmented
+    from core.translation_cache import TranslationCache
+
+    server, base_url = start_stand_in_server()
+    saved_url = translation.DEEPL_URL
+    saved_db_path = db.DB_PATH
+    had_settings = config.has_section('Settings')
+    saved_key = config.get('Settings', 'deepl_api_key', fallback=None)
+    try:
+        # 分割して連結すると元に戻る。略語・小数・和文の句点・改行
+        cases = [
+            ("Mr. Smith paid 3.5 dollars. He left at 5 p.m. today!", 2),
+            ("今日は晴れです。明日は雨でしょう！本当？", 3),
+            ("  First line.\n\nSecond, e.g. this one. Third.\n", 3),
+        ]
+        passed1 = True
+        for text, expected in cases:
+            prefix, segments = split_sentences(text)
+            if len(segments) != expected or prefix + ''.join(a + b for a, b in segments) != text:
+                passed1 = False
+                print(f"         {segments}")
+        joined = join_sentences('', [("一文目。", ' '), ("二文目。", '\n'), ("三文目。", '')], 'JA')
+        passed1 = passed1 and joined == "一文目。二文目。\n三文目。"
+        print_result("文の分割と連結", passed1, joined.replace('\n', '\\n'))
+
+        translation.DEEPL_URL = f"{base_url}/v2/translate"
+        if not had_settings:
+            config.add_section('Settings')
+        config.set('Settings', 'deepl_api_key', 'test-key')
+        translation.close_sessions()
+        db.DB_PATH = None  # メモリだけのキャッシュ
+        cache = TranslationCache()
+
+        # 複数の文を1回のリクエストで送る
+        paragraph = "The cat sat. The dog ran. The bird flew."
+        result, stats, new_pairs = translate_segmented(paragraph, 'EN', 'JA',
+                                                       translation.translate_with_deepl_batch, cache=cache)
+        passed2 = (result == "訳:The cat sat.訳:The dog ran.訳:The bird flew." and
+                   stats['requests'] == 1 and len(StandInHandler.requests) == 1 and
+                   len(new_pairs) == 3 and cache.get_stats()['puts'] == 0)
+        cache.put_many(new_pairs, 'EN', 'JA', 'deepl')
+        print_result("まとめて送信", passed2, f"{stats}")
+
+        # 1文だけ書き換えると、その文だけを翻訳する
+        before = len(StandInHandler.requests)
+        edited = "The cat sat. The dog walked. The bird flew."
+        result, stats, new_pairs = translate_segmented(edited, 'EN', 'JA',
+                                                       translation.translate_with_deepl_batch, cache=cache)
+        sent = StandInHandler.requests[before:]
+        passed3 = (stats['cached'] == 2 and stats['translated'] == 1 and len(sent) == 1 and
+                   new_pairs == [("The dog walked.", "訳:The dog walked.")] and
+                   b'walked' in sent[0][1] and b'cat' not in sent[0][1] and "訳:The dog walked." in result)
+        print_result("文ごとのキャッシュ", passed3, f"{stats}")
+
+        # 文字数の上限を超えるテキストは複数のリクエストに分ける
+        long_text = ' '.join(f"Sentence number {i} is here." for i in range(40))
+        progress = []
+        result, stats, _ = translate_segmented(long_text, 'EN', 'JA', translation.translate_with_deepl_batch,
+                                               max_chars=300, on_progress=lambda done, total: progress.append(done))
+        passed4 = (stats['requests'] > 1 and stats['translated'] == 40 and progress[-1] == 40 and
+                   result.count("訳:") == 40)
+        print_result("長いテキストの分割送信", passed4,
+                     f"{len(long_text)}文字 → リクエスト {stats['requests']}回")
+
+        return passed1 and passed2 and passed3 and passed4
+
+    except Exception as e:
+        print_result("文単位の翻訳", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.DB_PATH = saved_db_path
+        translation.close_sessions()
+        translation.DEEPL_URL = saved_url
+        if not had_settings:
+            config.remove_section('Settings')
+        elif saved_key is None:
+            config.remove_option('Settings', 'deepl_api_key')
+        else:
+            config.set('Settings', 'deepl_api_key', saved_key)
+        server.shutdown()
+        server.server_close()
+
+
+def test_translation_memory():
+    """翻訳メモリ（履歴のあいまい一致）のテスト（一時DBを使用）"""
+    print_header("4. 翻訳メモリテスト")
+
+    import tempfile
+    from core import dictionary_db as db
+    from core import history as history_module
+    from core.translation_memory import TranslationMemory, edit_similarity
+
+    previous_dir = os.path.dirname(db.DB_PATH) if db.DB_PATH else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db.init_database(tmp_dir)
+            words = ['report', 'meeting', 'budget', 'customer', 'release', 'server', 'invoice', 'travel']
+            db.add_history_entries([
+                {'original_text': f"The {words[i % 8]} for team {words[i * 3 % 8]} is item number {i}.",
+                 'translated_text': f"チーム{words[i * 3 % 8]}の{words[i % 8]}は項目{i}です。",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'}
+                for i in range(2000)
+            ] + [
+                {'original_text': "The meeting is scheduled for 3 pm on Friday.",
+                 'translated_text': "会議は金曜日の午後3時に予定されています。",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'normal'},
+                {'original_text': "Please review the attached document by tomorrow.",
+                 'translated_text': "明日までに添付の文書を確認してください。",
+                 'source_lang': 'EN', 'target_lang': 'JA', 'translation_type': 'dictionary'},
+            ])
+            history = history_module.TranslationHistory(
+                history_file_path=os.path.join(tmp_dir, 'translation_history.json'))
+            memory = TranslationMemory(threshold=0.95)
+            mode1 = memory.sync(history)
+
+            # 空白・句読点・大文字小文字の違いはそのまま一致。通常翻訳以外は登録しない
+            match1 = memory.lookup("  the meeting is scheduled for 3 PM on Friday!", 'EN', 'JA')
+            passed1 = (mode1 == 'rebuilt' and len(memory) == 2001 and
+                       match1['accepted'] and match1['score'] == 1.0 and
+                       memory.lookup("Please review the attached document by tomorrow.", 'EN', 'JA') is None)
+            print_result("書式の違い", passed1, f"{mode1}, {len(memory)}件, 類似度 {match1['score']:.2f}")
+
+            # 数字だけの違いは訳文の数字を置き換える
+            match2 = memory.lookup("The meeting is scheduled for 4 pm on Friday.", 'EN', 'JA')
+            match3 = memory.lookup("The budget for team invoice is item number 1234.", 'EN', 'JA')
+            passed2 = (match2['accepted'] and match2['translated_text'] == "会議は金曜日の午後4時に予定されています。" and
+                       match3['accepted'] and match3['translated_text'].endswith("項目1234です。"))
+            print_result("数字の置き換え", passed2, f"{match2['translated_text']} / {match3['translated_text']}")
+
+            # 語が違うとスコアは下がり、しきい値未満は採用しない。別の言語ペアには一致しない
+            match4 = memory.lookup("The meeting is scheduled for 3 pm on Monday.", 'EN', 'JA')
+            passed3 = (match4 is not None and not match4['accepted'] and 0.8 < match4['score'] < 0.95 and
+                       memory.lookup("The meeting is scheduled for 3 pm on Friday.", 'EN', 'ZH') is None and
+                       memory.lookup("Completely unrelated words appear here.", 'EN', 'JA') is None and
+                       abs(edit_similarity("kitten", "sitting") - 4 / 7) < 1e-9)
+            print_result("しきい値と言語ペア", passed3, f"類似度 {match4['score']:.3f}")
+
+            # 履歴の変更を差分で取り込む
+            history.add_entry("The meeting is scheduled for 3 pm on Monday.", "会議は月曜日の午後3時に予定されています。",
+                              "EN", "JA", "normal")
+            history.flush()
+            deleted = db.find_cached_translation("The meeting is scheduled for 3 pm on Friday.", "EN", "normal")
+            db.delete_history_entry(deleted['id'])
+            mode2 = memory.sync(history)
+            match5 = memory.lookup("The meeting is scheduled for 3 pm on Monday!", 'EN', 'JA')
+            match6 = memory.lookup("The meeting is scheduled for 3 pm on Friday.", 'EN', 'JA')
+            passed4 = (mode2 == 'incremental' and memory.sync(history) == 'unchanged' and
+                       match5['translated_text'] == "会議は月曜日の午後3時に予定されています。" and
+                       not match6['accepted'])
+            print_result("差分の取り込み", passed4, mode2)
+
+            # 否定の有無だけが違う文は、スコアが高くても採用しない
+            memory.add('can', "I can attend the meeting on Friday afternoon.", "金曜日の午後の会議に出席できます。", 'EN', 'JA')
+            memory.add('available', "The conference room is available on Monday morning.",
+                       "会議室は月曜日の午前中に利用できます。", 'EN', 'JA')
+            memory.add('ja', "明日の会議に出席できます。", "I can attend tomorrow's meeting.", 'JA', 'EN')
+            negated = [
+                ("I can't attend the meeting on Friday afternoon.", 'EN', 'JA'),
+                ("I can\u2019t attend the meeting on Friday afternoon.", 'EN', 'JA'),
+                ("I cannot attend the meeting on Friday afternoon.", 'EN', 'JA'),
+                ("The conference room is unavailable on Monday morning.", 'EN', 'JA'),
+                ("明日の会議に出席できません。", 'JA', 'EN'),
+            ]
+            rejected = [memory.lookup(*args) for args in negated]
+            same = memory.lookup("i can attend the meeting on friday afternoon", 'EN', 'JA')
+            passed5 = (all(match is None or not match['accepted'] for match in rejected) and
+                       same['accepted'] and same['translated_text'] == "金曜日の午後の会議に出席できます。")
+            print_result("否定の違い", passed5, f"{[match and round(match['score'], 3) for match in rejected]}")
+
+            # 翻訳メモリで返した訳文（'memory'）は索引に入らない
+            history.add_entry("I can't attend the meeting on Friday afternoon.", "金曜日の午後の会議に出席できます。",
+                              "EN", "JA", "memory")
+            history.flush()
+            before = len(memory)
+            memory.sync(history)
+            passed6 = len(memory) == before
+            print_result("'memory' の訳文は索引しない", passed6, f"{before} → {len(memory)}件")
+            history.close()
+
+            db.close_database()
+
+        return passed1 and passed2 and passed3 and passed4 and passed5 and passed6
+
+    except Exception as e:
+        print_result("翻訳メモリ", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if previous_dir:
+            db.init_database(previous_dir)
+        else:
+            db.DB_PATH = None
+
+
+def test_claude_streaming():
+    """Claude の応答のストリーミング（断片を届いた順に返す・最初のトークンまでの時間）のテスト"""
+    print_header("5. Claude ストリーミングテスト")
+
+    from core import translation
+
+    server, base_url = start_stand_in_server()
+    saved_url = translation.CLAUDE_API_URL
+    try:
+        translation.CLAUDE_API_URL = f"{base_url}/v1/messages"
+        translation.close_sessions()
+
+        # 断片は応答全体を待たずに届く
+        start = time.perf_counter()
+        arrivals = [(delta, time.perf_counter() - start)
+                    for delta in translation.stream_claude_api("alleviate", "{word}", "test-key", 'haiku')]
+        total = time.perf_counter() - start
+        timing = translation.get_last_timings()['claude']
+        passed1 = ([delta for delta, _ in arrivals] == ['意味: ', '和らげる'] and
+                   total - arrivals[0][1] >= StandInHandler.stream_interval * 2 and
+                   timing['ttfb'] <= timing['ttft'] < timing['total'])
+        print_result("断片を届いた順に返す", passed1,
+                     f"最初の断片 {arrivals[0][1] * 1000:.0f}ms / 合計 {total * 1000:.0f}ms")
+
+        # コールバック版も同じ断片を受け取り、応答全体を返す
+        deltas = []
+        answer = translation.query_claude_api("alleviate", "{word}", "test-key", model_type='haiku',
+                                              on_delta=deltas.append)
+        passed2 = answer == "意味: 和らげる" and deltas == ['意味: ', '和らげる']
+        print_result("コールバック", passed2, f"{deltas}")
+
+        # エラーのステータスは例外（コールバック版は None）
+        translation.CLAUDE_API_URL = f"{base_url}/v1/missing"
+        try:
+            list(translation.stream_claude_api("alleviate", "{word}", "test-key"))
+            raised = False
+        except translation.ClaudeAPIError as e:
+            raised = e.status_code == 404
+        deltas = []
+        passed3 = (raised and deltas == [] and
+                   translation.query_claude_api("alleviate", "{word}", "test-key", on_delta=deltas.append) is None)
+        print_result("エラーのステータス", passed3)
+
+        return passed1 and passed2 and passed3
+
+    except Exception as e:
+        print_result("Claude ストリーミング", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        translation.close_sessions()
+        translation.CLAUDE_API_URL = saved_url
+        server.shutdown()
+        server.server_close()
+
+
+def run_all_tests():
+    """全テストを実行"""
+    print("\n" + "=" * 60)
+    print(" ClipboardTranslator v1.20 - 翻訳API通信テスト")
+    print(f" 実行日時: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    results = []
+    results.append(("セッションの共有・接続の再利用", test_pooled_sessions()))
+    results.append(("接続状態のキャッシュ", test_connectivity_monitor()))
+    results.append(("文単位の翻訳", test_segmented_translation()))
+    results.append(("翻訳メモリ", test_translation_memory()))
+    results.append(("Claude ストリーミング", test_claude_streaming()))
+
+    # 結果サマリー
+    print_header("テスト結果サマリー")
+    passed = sum(1 for _, r in results if r)
+    total = len(results)
+
+    for name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"  [{status}] {name}")
+
+    print(f"\n  合計: {passed}/{total} テスト成功")
+
+    return passed == total
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -5,6 +5,8 @@
 import tkinter as tk
 import tkinter.font as tkfont
 import re
+import itertools
+import threading
 from typing import Callable, Optional
 from config.constants import MESSAGES, get_message
 from config.settings import config
@@ -13,6 +15,9 @@ from config.settings import config
 class TextDisplay(tk.Text):
     """テキスト表示エリアコンポーネント（Markdown対応）"""
 
+    # ストリーミング表示で断片をまとめて描画する間隔（ミリ秒、約30fps）
+    STREAM_FRAME_MS = 33
+
     # タグ定義
     TAGS = {
         'input_tag': '#9597f7',
@@ -67,6 +72,13 @@ class TextDisplay(tk.Text):
         self._on_font_size_change = on_font_size_change
         self._last_font_change_time = 0
 
+        # ストリーミング表示（断片は別スレッドから届くため、ロックしてためて Tk スレッドで描画する）
+        # ストリームごとに未描画の断片と範囲のマーク（stream_start_<id>〜stream_end_<id>）を持つ
+        self._stream_lock = threading.Lock()
+        self._streams = {}  # ストリームID → 未描画の断片のリスト
+        self._stream_ids = itertools.count(1)
+        self._stream_scheduled = False
+
         # タグを設定
         for tag_name, color in self.TAGS.items():
             self.tag_configure(tag_name, foreground=color)
@@ -122,8 +134,8 @@ class TextDisplay(tk.Text):
         self.tag_configure('md_table_cell', foreground='#ffffff')
         self.tag_configure('md_table_border', foreground='#666666')
 
-    def _render_markdown(self, text: str) -> None:
-        """Markdown形式のテキストをレンダリングして表示"""
+    def _render_markdown(self, text: str, index: str = tk.END) -> None:
+        """Markdown形式のテキストをレンダリングして表示（index: 挿入位置）"""
         lines = text.split('\n')
         in_code_block = False
         code_block_content = []
@@ -137,7 +149,7 @@ class TextDisplay(tk.Text):
                     # コードブロック終了
                     code_text = '\n'.join(code_block_content)
                     if code_text:
-                        self.insert(tk.END, code_text + '\n', 'md_code_block')
+                        self.insert(index, code_text + '\n', 'md_code_block')
                     code_block_content = []
                     in_code_block = False
                 else:
@@ -159,19 +171,19 @@ class TextDisplay(tk.Text):
                 continue
             elif in_table:
                 # テーブル終了
-                self._render_table(table_rows)
+                self._render_table(table_rows, index)
                 table_rows = []
                 in_table = False
 
             # 見出し
             if line.startswith('### '):
-                self.insert(tk.END, line[4:] + '\n', 'md_h3')
+                self.insert(index, line[4:] + '\n', 'md_h3')
                 continue
             elif line.startswith('## '):
-                self.insert(tk.END, line[3:] + '\n', 'md_h2')
+                self.insert(index, line[3:] + '\n', 'md_h2')
                 continue
             elif line.startswith('# '):
-                self.insert(tk.END, line[2:] + '\n', 'md_h1')
+                self.insert(index, line[2:] + '\n', 'md_h1')
                 continue
 
             # リスト項目（Markdown形式: -, *, +）
@@ -179,9 +191,9 @@ class TextDisplay(tk.Text):
             if list_match:
                 indent = list_match.group(1)
                 content = list_match.group(2)
-                self.insert(tk.END, indent + '- ', 'md_bullet')
-                self._render_inline_markdown(content)
-                self.insert(tk.END, '\n')
+                self.insert(index, indent + '- ', 'md_bullet')
+                self._render_inline_markdown(content, index)
+                self.insert(index, '\n')
                 continue
 
             # AIが出力する既存のビュレットリスト（•で始まる行）
@@ -189,9 +201,9 @@ class TextDisplay(tk.Text):
             if bullet_match:
                 indent = bullet_match.group(1)
                 content = bullet_match.group(2)
-                self.insert(tk.END, indent + '- ', 'md_bullet')
-                self._render_inline_markdown(content)
-                self.insert(tk.END, '\n')
+                self.insert(index, indent + '- ', 'md_bullet')
+                self._render_inline_markdown(content, index)
+                self.insert(index, '\n')
                 continue
 
             # 番号付きリスト（セクション番号も含む: 1. 2. 等）
@@ -200,23 +212,23 @@ class TextDisplay(tk.Text):
                 indent = num_list_match.group(1)
                 num = num_list_match.group(2)
                 content = num_list_match.group(3)
-                self.insert(tk.END, indent + num + '. ', 'md_bullet')
-                self._render_inline_markdown(content)
-                self.insert(tk.END, '\n')
+                self.insert(index, indent + num + '. ', 'md_bullet')
+                self._render_inline_markdown(content, index)
+                self.insert(index, '\n')
                 continue
 
             # 通常の行（インラインMarkdownを処理）
             if line.strip():
-                self._render_inline_markdown(line)
-                self.insert(tk.END, '\n')
+                self._render_inline_markdown(line, index)
+                self.insert(index, '\n')
             else:
-                self.insert(tk.END, '\n')
+                self.insert(index, '\n')
 
         # 最後にテーブルが残っていたらレンダリング
         if table_rows:
-            self._render_table(table_rows)
+            self._render_table(table_rows, index)
 
-    def _render_table(self, rows: list) -> None:
+    def _render_table(self, rows: list, index: str = tk.END) -> None:
         """Markdownテーブルを見やすいリスト形式でレンダリング"""
         if not rows:
             return
@@ -238,36 +250,36 @@ class TextDisplay(tk.Text):
         # 2列の場合：キー: 値 形式で表示
         if len(headers) == 2 and data_rows:
             # ヘッダー表示
-            self.insert(tk.END, f"[{headers[0]}] -> [{headers[1]}]\n", 'md_table_header')
-            self.insert(tk.END, '-' * 30 + '\n', 'md_table_border')
+            self.insert(index, f"[{headers[0]}] -> [{headers[1]}]\n", 'md_table_header')
+            self.insert(index, '-' * 30 + '\n', 'md_table_border')
 
             for data_row in data_rows:
                 if len(data_row) >= 2:
-                    self.insert(tk.END, '* ', 'md_bullet')
-                    self.insert(tk.END, data_row[0], 'md_table_header')
-                    self.insert(tk.END, '\n  ', 'md_table_border')
-                    self.insert(tk.END, data_row[1] + '\n', 'md_table_cell')
-            self.insert(tk.END, '\n')
+                    self.insert(index, '* ', 'md_bullet')
+                    self.insert(index, data_row[0], 'md_table_header')
+                    self.insert(index, '\n  ', 'md_table_border')
+                    self.insert(index, data_row[1] + '\n', 'md_table_cell')
+            self.insert(index, '\n')
 
         # 3列以上の場合：各行をカード形式で表示
         elif len(headers) >= 3 and data_rows:
             for data_row in data_rows:
-                self.insert(tk.END, '+' + '-' * 25 + '\n', 'md_table_border')
+                self.insert(index, '+' + '-' * 25 + '\n', 'md_table_border')
                 for i, cell in enumerate(data_row):
                     if i < len(headers):
-                        self.insert(tk.END, f'| {headers[i]}: ', 'md_table_header')
-                        self.insert(tk.END, f'{cell}\n', 'md_table_cell')
-                self.insert(tk.END, '+' + '-' * 25 + '\n', 'md_table_border')
+                        self.insert(index, f'| {headers[i]}: ', 'md_table_header')
+                        self.insert(index, f'{cell}\n', 'md_table_cell')
+                self.insert(index, '+' + '-' * 25 + '\n', 'md_table_border')
 
         # データ行がない場合（ヘッダーのみ）
         else:
             for i, header in enumerate(headers):
-                self.insert(tk.END, f'• {header}', 'md_table_header')
+                self.insert(index, f'• {header}', 'md_table_header')
                 if i < len(headers) - 1:
-                    self.insert(tk.END, ' | ', 'md_table_border')
-            self.insert(tk.END, '\n')
+                    self.insert(index, ' | ', 'md_table_border')
+            self.insert(index, '\n')
 
-    def _render_inline_markdown(self, text: str) -> None:
+    def _render_inline_markdown(self, text: str, index: str = tk.END) -> None:
         """インラインMarkdown（太字、イタリック、コード）をレンダリング"""
         # パターン: **bold**, *italic*, `code`
         patterns = [
@@ -303,14 +315,14 @@ class TextDisplay(tk.Text):
         for m in filtered_matches:
             # マッチ前のテキスト
             if m['start'] > pos:
-                self.insert(tk.END, text[pos:m['start']])
+                self.insert(index, text[pos:m['start']])
             # マッチしたテキスト
-            self.insert(tk.END, m['content'], m['tag'])
+            self.insert(index, m['content'], m['tag'])
             pos = m['end']
 
         # 残りのテキスト
         if pos < len(text):
-            self.insert(tk.END, text[pos:])
+            self.insert(index, text[pos:])
 
     def _get_message(self, key: str, **kwargs) -> str:
         """設定された言語に基づいてメッセージを取得"""
@@ -444,6 +456,121 @@ class TextDisplay(tk.Text):
         self.configure(state='disabled')
         self.see(tk.END)
 
+    def begin_stream(self, label: str, tag: Optional[str] = None) -> int:
+        """
+        ストリーミング表示を開始する（どのスレッドからでも呼べる）
+
+        本文はストリームごとの範囲に描画する。表示中に log_message などで追加された
+        テキストと、同時に開いている他のストリームは、その範囲の下に続く。
+
+        Parameters:
+            label: 見出し（'\n[AI] ' など）
+            tag: 見出しのタグ
+
+        Returns:
+            int: ストリームID（append_stream / end_stream に渡す）
+        """
+        with self._stream_lock:
+            stream_id = next(self._stream_ids)
+            self._streams[stream_id] = []
+        self.after(0, lambda: self._begin_stream(stream_id, label, tag))
+        return stream_id
+
+    def _begin_stream(self, stream_id: int, label: str, tag: Optional[str]) -> None:
+        self.configure(state='normal')
+        if tag:
+            self.insert(tk.END, label, tag)
+        else:
+            self.insert(tk.END, label)
+        # 本文の範囲。末尾の改行はストリームの範囲の外に置き、後から tk.END に追加される
+        # テキストが範囲に入らないようにする（終了時に不要なら削除する）
+        self.insert(tk.END, '\n')
+        start, end = f'stream_start_{stream_id}', f'stream_end_{stream_id}'
+        self.mark_set(start, 'end-2c')
+        self.mark_gravity(start, tk.LEFT)
+        self.mark_set(end, 'end-2c')
+        self.mark_gravity(end, tk.RIGHT)
+        self.configure(state='disabled')
+        self.see(tk.END)
+
+    def append_stream(self, stream_id: int, delta: str) -> None:
+        """
+        ストリーミングの断片を追加する（どのスレッドからでも呼べる）
+
+        断片はためておき、STREAM_FRAME_MS ごとにまとめて1回だけ描画する。
+        """
+        with self._stream_lock:
+            pending = self._streams.get(stream_id)
+            if pending is None:
+                return
+            pending.append(delta)
+            if self._stream_scheduled:
+                return
+            self._stream_scheduled = True
+        self.after(self.STREAM_FRAME_MS, self._flush_streams)
+
+    def _flush_streams(self) -> None:
+        """すべてのストリームのためた断片をまとめて描画する（Tk スレッド）"""
+        with self._stream_lock:
+            self._stream_scheduled = False
+            stream_ids = list(self._streams)
+        for stream_id in stream_ids:
+            self._flush_stream(stream_id)
+
+    def _flush_stream(self, stream_id: int) -> None:
+        """1つのストリームのためた断片を、そのストリームの範囲の末尾に描画する（Tk スレッド）"""
+        end = f'stream_end_{stream_id}'
+        if end not in self.mark_names():
+            return  # 開始前、または表示がクリアされた
+        with self._stream_lock:
+            pending = self._streams.get(stream_id)
+            text = ''.join(pending) if pending else ''
+            if pending:
+                pending.clear()
+        if not text:
+            return
+        self.configure(state='normal')
+        self.insert(end, text)
+        self.configure(state='disabled')
+        self.see(end)
+
+    def end_stream(self, stream_id: int, final_text: Optional[str] = None, footer: Optional[str] = None,
+                   use_markdown: bool = True) -> None:
+        """
+        ストリーミング表示を終える（どのスレッドからでも呼べる）
+
+        Parameters:
+            stream_id: begin_stream が返したID
+            final_text: 応答全体（Markdownを含む場合は描き直す。Noneなら描き直さない）
+            footer: 応答の後に表示する行（所要時間など）
+            use_markdown: Markdownで描き直すかどうか
+        """
+        self.after(0, lambda: self._end_stream(stream_id, final_text, footer, use_markdown))
+
+    def _end_stream(self, stream_id: int, final_text: Optional[str], footer: Optional[str],
+                    use_markdown: bool) -> None:
+        self._flush_stream(stream_id)
+        with self._stream_lock:
+            self._streams.pop(stream_id, None)
+        start, end = f'stream_start_{stream_id}', f'stream_end_{stream_id}'
+        if end not in self.mark_names():
+            return  # 表示がクリアされた
+
+        self.configure(state='normal')
+        if final_text is not None and use_markdown and self._has_markdown(final_text):
+            # このストリームの範囲だけを描き直す
+            self.delete(start, end)
+            self._render_markdown(final_text, end)
+        if self.get(f'{end} -1c', end) == '\n':
+            self.delete(end, f'{end} +1c')  # 本文が改行で終わっていれば範囲の後の改行は不要
+        else:
+            self.mark_set(end, f'{end} +1c')
+        if footer:
+            self.insert(end, footer + '\n')
+        self.mark_unset(start, end)
+        self.configure(state='disabled')
+        self.see(tk.END)
+
     def copy_selected(self, clipboard_clear: Callable, clipboard_append: Callable) -> bool:
         """選択されたテキストをコピー"""
         self.configure(state='normal')
@@ -468,7 +595,10 @@ class TextDisplay(tk.Text):
         self.configure(state='disabled')
 
     def clear(self) -> None:
-        """テキストエリアをクリア"""
+        """テキストエリアをクリア（表示中のストリームは以降描画しない）"""
         self.configure(state='normal')
         self.delete("1.0", tk.END)
+        for mark in self.mark_names():
+            if mark.startswith(('stream_start_', 'stream_end_')):
+                self.mark_unset(mark)
         self.configure(state='disabled')
@@ -2,13 +2,15 @@
 """
 辞書検索処理を担当するコントローラー
 """
+import time
 import threading
-from typing import Callable
+from typing import Callable, Optional
 from config.settings import config
 from core.translation import query_claude_api
 from core.dictionary import check_dictionary
 from core.language_detection import detect_language, is_single_word
 from core.network import is_connected
+from core.translation_cache import prompt_version
 
 
 # スレッドロック
@@ -24,7 +26,11 @@ class DictionaryController:
         history_manager,
         on_log: Callable[[str], None],
         on_status: Callable[[str], None],
-        get_message: Callable[[str], str]
+        get_message: Callable[[str], str],
+        translation_cache=None,
+        on_stream_start: Optional[Callable[[str, str], int]] = None,
+        on_stream_delta: Optional[Callable[[int, str], None]] = None,
+        on_stream_end: Optional[Callable[[int, Optional[str], Optional[str]], None]] = None
     ):
         """
         初期化
@@ -35,12 +41,57 @@ class DictionaryController:
             on_log: ログ出力コールバック
             on_status: ステータス更新コールバック
             get_message: メッセージ取得関数
+            translation_cache: 翻訳キャッシュ（TranslationCache、Noneでキャッシュなし）
+            on_stream_start: ストリーミング表示の開始コールバック(見出し, タグ) → ストリームID
+            on_stream_delta: ストリーミングの断片のコールバック(ストリームID, 断片)
+            on_stream_end: ストリーミング表示の終了コールバック(ストリームID, 応答全体, 後に表示する行)
+                （3つとも指定した場合のみ、Claudeの応答を届いた順に表示する）
         """
         self.clipboard = clipboard_service
         self.history = history_manager
+        self.cache = translation_cache
         self._on_log = on_log
         self._on_status = on_status
         self._get_message = get_message
+        self._on_stream_start = on_stream_start
+        self._on_stream_delta = on_stream_delta
+        self._on_stream_end = on_stream_end
+
+    def _query_claude(self, text: str, prompt_template: str, api_key: str) -> Optional[str]:
+        """
+        Claude APIで検索して表示する
+
+        ストリーミング表示が使えれば、最初の断片が届いた時点で表示を始める。
+        最初の断片までの時間（TTFT）と合計の時間を応答の後に表示する。
+
+        Returns:
+            str or None: 応答テキスト
+        """
+        streaming = bool(self._on_stream_start and self._on_stream_delta and self._on_stream_end)
+        start = time.perf_counter()
+        first_delta = []
+        stream = []  # ストリームID
+
+        def on_delta(delta: str) -> None:
+            if not first_delta:
+                first_delta.append(time.perf_counter() - start)
+                if streaming:
+                    stream.append(self._on_stream_start(f"{self._get_message('dict_meaning_label')}\n", 'dict_tag'))
+            if streaming:
+                self._on_stream_delta(stream[0], delta)
+
+        result = query_claude_api(text, prompt_template, api_key, model_type='haiku', on_delta=on_delta)
+        footer = None
+        if result and first_delta:
+            footer = self._get_message('claude_ttft').format(ttft=first_delta[0], total=time.perf_counter() - start)
+        if streaming and first_delta:
+            # 応答の後の表示もストリーミング表示の終了と同じ順で描画する
+            self._on_stream_end(stream[0], result, footer)
+        elif result:
+            self._on_log(f"{self._get_message('dict_meaning_label')}\n{result}")
+            if footer:
+                self._on_log(footer)
+        return result
 
     def lookup(self) -> None:
         """辞書検索処理"""
@@ -71,17 +122,21 @@ class DictionaryController:
                 source_lang = detect_language(text)
                 target_lang = 'EN' if source_lang == 'JA' else 'JA'
 
-                # 履歴から検索 - キャッシュ機能（SQLite/JSONどちらでも動作）
-                cached = self.history.find_cached(text, source_lang, "dictionary")
+                claude_api_key = config.get('Settings', 'claude_api_key', fallback='')
+                prompt_template = config.get('Settings', 'claude_prompt_template', fallback='')
+                cache_version = prompt_version(prompt_template)
+
+                # 翻訳キャッシュを検索（プロンプトを変更した場合は別キー）
+                cached = None
+                if self.cache:
+                    cached = self.cache.get(text, source_lang, target_lang, 'claude:haiku', cache_version)
                 if cached:
-                    dict_result = cached['translated_text']
+                    dict_result = cached
+                    self.history.add_entry(text, dict_result, source_lang, target_lang, "dictionary")
                     self._on_log(f"{self._get_message('dict_meaning_label')} [cache]\n{dict_result}")
                     self._on_status('dictionary_lookup_complete')
                     return
 
-                claude_api_key = config.get('Settings', 'claude_api_key', fallback='')
-                prompt_template = config.get('Settings', 'claude_prompt_template', fallback='')
-
                 # ローカル辞書で検索
                 local_res = check_dictionary(text, source_lang)
                 if local_res:
@@ -95,17 +150,19 @@ class DictionaryController:
                 # Claude APIで詳細を取得（辞書検索はHaikuで高速処理）
                 if claude_api_key and prompt_template and is_connected():
                     self._on_status('translation_in_progress')
-                    claude_result = query_claude_api(text, prompt_template, claude_api_key, model_type='haiku')
+                    claude_result = self._query_claude(text, prompt_template, claude_api_key)
 
                     if claude_result:
-                        self._on_log(f"{self._get_message('dict_meaning_label')}\n{claude_result}")
                         self._on_status('claude_lookup_complete')
 
                         if local_dict_result:
                             combined_result = f"{local_dict_result}\n\n{claude_result}"
-                            self.history.add_entry(text, combined_result, source_lang, target_lang, "dictionary")
                         else:
-                            self.history.add_entry(text, claude_result, source_lang, target_lang, "dictionary")
+                            combined_result = claude_result
+                        self.history.add_entry(text, combined_result, source_lang, target_lang, "dictionary")
+                        if self.cache:
+                            self.cache.put(text, source_lang, target_lang, 'claude:haiku',
+                                           combined_result, cache_version)
                     else:
                         if not local_dict_result:
                             self._on_log(self._get_message('claude_api_error'))
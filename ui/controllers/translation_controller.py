@@ -6,7 +6,8 @@ import threading
 from typing import Callable, Optional
 from config.settings import config
 from config.constants import MESSAGES
-from core.translation import translate_with_deepl
+from core.translation import translate_with_deepl_batch
+from core.segmentation import translate_segmented
 from core.dictionary import check_dictionary
 from core.language_detection import detect_language, is_single_word
 from core.network import is_connected
@@ -25,7 +26,9 @@ class TranslationController:
         history_manager,
         on_log: Callable[[str], None],
         on_status: Callable[[str], None],
-        get_message: Callable[[str], str]
+        get_message: Callable[[str], str],
+        translation_cache=None,
+        translation_memory=None
     ):
         """
         初期化
@@ -36,9 +39,13 @@ class TranslationController:
             on_log: ログ出力コールバック
             on_status: ステータス更新コールバック
             get_message: メッセージ取得関数
+            translation_cache: 翻訳キャッシュ（TranslationCache、Noneでキャッシュなし）
+            translation_memory: 翻訳メモリ（TranslationMemory、Noneであいまい一致なし）
         """
         self.clipboard = clipboard_service
         self.history = history_manager
+        self.cache = translation_cache
+        self.memory = translation_memory
         self._on_log = on_log
         self._on_status = on_status
         self._get_message = get_message
@@ -80,6 +87,27 @@ class TranslationController:
             # 固定モード: 常に設定された言語に翻訳
             return configured_target
 
+    def _lookup_translation_memory(self, text: str, source_lang: str, target_lang: str) -> Optional[dict]:
+        """
+        翻訳メモリから最も近い履歴を探す（取り込み中なら待たずに諦める）
+
+        Returns:
+            dict or None: TranslationMemory.lookup の結果
+        """
+        if self.memory is None or not self._get_config_bool('Settings', 'use_translation_memory', True):
+            return None
+        try:
+            self.memory.threshold = float(config.get('Settings', 'translation_memory_threshold', fallback='0.95'))
+        except ValueError:
+            pass
+        if self.memory.sync(self.history, wait=False) == 'busy':
+            return None
+        match = self.memory.lookup(text, source_lang, target_lang)
+        if match:
+            print(f"翻訳メモリ: 類似度 {match['score']:.1%}（しきい値 {self.memory.threshold:.0%}, "
+                  f"{'採用' if match['accepted'] else '不採用'}）: {match['original_text'][:50]}")
+        return match
+
     def translate(self) -> None:
         """通常の翻訳処理"""
         with translation_lock:
@@ -91,24 +119,22 @@ class TranslationController:
                     self._on_status('clipboard_empty')
                     return
 
+                # 長いテキストは打ち切らず、文の塊（1リクエストあたり max_length 文字まで）に分けて翻訳する
                 max_length = int(config.get('Settings', 'max_translation_length', fallback='1000'))
                 if len(text) > max_length:
                     self._on_log(f"\n{self._get_message('input_label')}{text[:100]}...")
-                    warning_msg = self._get_message('text_too_long').format(max_length=max_length)
-                    self._on_log(warning_msg)
-                    self._on_status('text_too_long')
-                    return
-
-                self._on_log(f"\n{self._get_message('input_label')}{text}")
+                else:
+                    self._on_log(f"\n{self._get_message('input_label')}{text}")
 
                 source_lang = detect_language(text)
                 # v1.20: 多言語対応 - 設定から翻訳先言語を決定
                 target_lang = self._determine_target_language(source_lang)
 
-                # 履歴から検索 - キャッシュ機能（SQLite/JSONどちらでも動作）
-                cached = self.history.find_cached(text, source_lang, "normal")
+                # 翻訳キャッシュを検索（翻訳先言語・プロバイダーごと）
+                cached = self.cache.get(text, source_lang, target_lang, 'deepl') if self.cache else None
                 if cached:
-                    translated = cached['translated_text']
+                    translated = cached
+                    self.history.add_entry(text, translated, source_lang, target_lang, "normal")
                     self._on_log(f"{self._get_message('translated_label')} [cache]\n{translated}")
                     self.clipboard.set_text(translated)
                     self._on_status('translation_complete')
@@ -124,17 +150,38 @@ class TranslationController:
                         self.history.add_entry(text, local_result, source_lang, target_lang, "normal")
                         return
 
+                # 翻訳メモリ（履歴のあいまい一致）で翻訳
+                match = self._lookup_translation_memory(text, source_lang, target_lang)
+                if match and match['accepted']:
+                    translated = match['translated_text']
+                    self._on_log(f"{self._get_message('translated_label')} [TM {match['score']:.0%}]\n{translated}")
+                    self.clipboard.set_text(translated)
+                    self._on_status('translation_complete')
+                    # 'memory' として記録する（'normal' にすると、あいまい一致の訳文が翻訳メモリの元になる）
+                    self.history.add_entry(text, translated, source_lang, target_lang, "memory")
+                    return
+
                 # DeepL APIで翻訳
                 use_deepl = self._get_config_bool('Settings', 'use_deepl', True)
 
                 if use_deepl and is_connected():
-                    translated = translate_with_deepl(text, target_lang)
+                    translated, stats, new_pairs = translate_segmented(
+                        text, source_lang, target_lang, translate_with_deepl_batch,
+                        cache=self.cache, provider='deepl', max_chars=max_length
+                    )
+                    if len(text) > max_length:
+                        self._on_log(self._get_message('text_split_translation').format(
+                            segments=stats['segments'], requests=stats['requests']))
 
                     if translated:
                         self._on_log(f"{self._get_message('translated_label')}\n{translated}")
                         self.clipboard.set_text(translated)
                         self._on_status('translation_complete')
                         self.history.add_entry(text, translated, source_lang, target_lang, "normal")
+                        if self.cache:
+                            # 文ごとの訳文と全文をまとめて保存（クリップボードへ渡したあと）
+                            self.cache.put_many(new_pairs + [(text, translated)],
+                                                source_lang, target_lang, 'deepl')
                     else:
                         self._on_status('translation_failed')
                 else:
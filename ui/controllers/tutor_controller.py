@@ -2,7 +2,7 @@
 """
 家庭教師（RAGチャット）処理を担当するコントローラー
 """
-from typing import Callable
+from typing import Callable, Optional
 
 
 class TutorController:
@@ -13,7 +13,11 @@ class TutorController:
         tutor_handler,
         on_log_tutor: Callable[[str, bool], None],
         on_status: Callable[[str], None],
-        on_status_text: Callable[[str], None]
+        on_status_text: Callable[[str], None],
+        on_stream_start: Optional[Callable[[str, str], int]] = None,
+        on_stream_delta: Optional[Callable[[int, str], None]] = None,
+        on_stream_end: Optional[Callable[[int, Optional[str], Optional[str]], None]] = None,
+        get_ai_label: Optional[Callable[[], str]] = None
     ):
         """
         初期化
@@ -23,11 +27,20 @@ class TutorController:
             on_log_tutor: 家庭教師メッセージ表示コールバック (message, is_user)
             on_status: ステータス更新コールバック
             on_status_text: ステータステキスト直接設定コールバック
+            on_stream_start: ストリーミング表示の開始コールバック(見出し, タグ) → ストリームID
+            on_stream_delta: ストリーミングの断片のコールバック(ストリームID, 断片)
+            on_stream_end: ストリーミング表示の終了コールバック(ストリームID, 応答全体, 後に表示する行)
+            get_ai_label: AIの見出しを返す関数（ストリーミング表示の見出しに使う）
+                （ストリーミングのコールバックを3つとも指定した場合のみ、応答を届いた順に表示する）
         """
         self.tutor_handler = tutor_handler
         self._on_log_tutor = on_log_tutor
         self._on_status = on_status
         self._on_status_text = on_status_text
+        self._on_stream_start = on_stream_start
+        self._on_stream_delta = on_stream_delta
+        self._on_stream_end = on_stream_end
+        self._get_ai_label = get_ai_label
 
     def process_message(self, message: str) -> None:
         """
@@ -36,12 +49,28 @@ class TutorController:
         Parameters:
             message: ユーザーからのメッセージ
         """
+        streaming = bool(self._on_stream_start and self._on_stream_delta and self._on_stream_end)
+        started = []  # ストリームID
+
+        def on_delta(delta: str) -> None:
+            if not started:
+                label = self._get_ai_label() if self._get_ai_label else 'AI'
+                started.append(self._on_stream_start(f"\n[{label}] ", 'tutor_ai_tag'))
+            self._on_stream_delta(started[0], delta)
+
         def on_success(response: str) -> None:
-            self._on_log_tutor(response, False)
+            if started:
+                self._on_stream_end(started[0], response, None)
+            else:
+                self._on_log_tutor(response, False)
             self._on_status('待機中...')
 
         def on_error(error_msg: str) -> None:
-            self._on_log_tutor(error_msg, False)
+            if started:
+                # 途中まで表示した応答の後に、同じ順で描画する
+                self._on_stream_end(started[0], None, error_msg)
+            else:
+                self._on_log_tutor(error_msg, False)
             self._on_status('error_occurred')
 
         def on_search_info(metadata: dict) -> None:
@@ -65,5 +94,6 @@ class TutorController:
             message,
             on_success=on_success,
             on_error=on_error,
-            on_search_info=on_search_info
+            on_search_info=on_search_info,
+            on_delta=on_delta if streaming else None
         )
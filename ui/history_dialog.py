@@ -2,6 +2,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from core.history import HistoryPageModel, HistorySearchRunner
+
+# 検索語の入力が止まってから検索するまでの時間（ミリ秒）
+SEARCH_DEBOUNCE_MS = 250
+
 
 def _center_window(window, width, height):
     """ウィンドウをモニター中央に配置"""
@@ -77,98 +82,170 @@ def show_history_dialog(app):
 
     detail_text = tk.Text(detail_frame, wrap=tk.WORD, height=5)
     detail_text.pack(fill=tk.BOTH, expand=True)
+    detail_text.tag_configure('match', background='#ffff80')
 
     # ボタンフレーム
     button_frame = ttk.Frame(main_frame)
     button_frame.pack(fill=tk.X, pady=(10, 0))
 
-    def load_history_to_tree():
-        """履歴をツリービューに読み込む"""
-        for item in tree.get_children():
-            tree.delete(item)
+    tree.tag_configure('normal', background='#f0f0ff')
+    tree.tag_configure('dictionary', background='#f0fff0')
+    tree.tag_configure('speech', background='#fff0f0')
+    tree.tag_configure('memory', background='#f8f8e8')
+
+    model = HistoryPageModel(app.history)
+    # ツリーの行ID → 行データ
+    row_by_item = {}
+    scroll_state = {'loading': False}
+    search_state = {'after_id': None}
+
+    def schedule(callback):
+        """ワーカースレッドからUIスレッドへ処理を渡す"""
+        try:
+            history_window.after(0, callback)
+        except (tk.TclError, RuntimeError):
+            pass  # ダイアログが閉じられた
+
+    # 問い合わせはワーカーで実行し、新しい検索が始まると古い検索は取り消される
+    runner = HistorySearchRunner(schedule)
+
+    def insert_rows(rows, at_top=False):
+        position = 0 if at_top else tk.END
+        for row in (reversed(rows) if at_top else rows):
+            item = tree.insert('', position, values=(row['timestamp'], row['original'], row['translated']),
+                               tags=(row['translation_type'],))
+            row_by_item[item] = row
+
+    def remove_rows(items):
+        for item in items:
+            row_by_item.pop(item, None)
+        if items:
+            tree.delete(*items)
+
+    def keep_view_at(item):
+        """行の追加・削除後も同じ行が先頭に見えるようにスクロール位置を戻す"""
+        children = tree.get_children()
+        if item and tree.exists(item) and children:
+            tree.yview_moveto(tree.index(item) / len(children))
+
+    def top_visible_item():
+        return tree.identify_row(1)
+
+    def apply_result(result):
+        """ワーカーの結果をツリーに反映（UIスレッド）"""
+        kind, rows, removed = result
+        if kind == 'reset':
+            remove_rows(tree.get_children())
+            insert_rows(rows)
+            tree.yview_moveto(0)
+        elif kind == 'older':
+            anchor = top_visible_item()
+            insert_rows(rows)
+            if removed:
+                remove_rows(tree.get_children()[:removed])
+                keep_view_at(anchor)
+        else:
+            anchor = top_visible_item()
+            insert_rows(rows, at_top=True)
+            if removed:
+                remove_rows(tree.get_children()[-removed:])
+            keep_view_at(anchor)
+        scroll_state['loading'] = False
 
+    def load_history_to_tree():
+        """
+        履歴をツリービューに読み込む（ワーカーで実行）
+        先頭ページを表示してから、保持できるページ数まで続きを順に流し込む
+        """
+        search_state['after_id'] = None
         filter_type = filter_var.get()
         if filter_type == "all":
             filter_type = None
+        query = search_var.get() or None
 
-        search_query = search_var.get()
-        if search_query:
-            history_entries = app.history.search_history(search_query)
-        else:
-            history_entries = app.history.get_history(filter_type=filter_type)
+        def task(emit):
+            emit(('reset', model.reset(filter_type, query), 0))
+            while model.has_older and len(model.pages) < model.max_pages:
+                emit(('older',) + model.load_older())
 
-        for entry in history_entries:
-            tree.insert('', tk.END, values=(
-                entry['timestamp'],
-                entry['original_text'][:30] + ('...' if len(entry['original_text']) > 30 else ''),
-                entry['translated_text'][:30] + ('...' if len(entry['translated_text']) > 30 else '')
-            ), tags=(entry['translation_type'],))
+        scroll_state['loading'] = False
+        runner.search(task, apply_result)
 
-        tree.tag_configure('normal', background='#f0f0ff')
-        tree.tag_configure('dictionary', background='#f0fff0')
-        tree.tag_configure('speech', background='#fff0f0')
-
-    def show_detail(event):
-        """詳細を表示"""
-        selected_items = tree.selection()
-        if not selected_items:
+    def on_tree_scroll(first, last):
+        """スクロールが端付近に達したら前後のページを読み込む"""
+        scrollbar.set(first, last)
+        if scroll_state['loading']:
             return
+        if model.has_older and float(last) >= 0.9:
+            scroll_state['loading'] = True
+            runner.submit(lambda emit: emit(('older',) + model.load_older()), apply_result)
+        elif model.has_newer and float(first) <= 0.1:
+            scroll_state['loading'] = True
+            runner.submit(lambda emit: emit(('newer',) + model.load_newer()), apply_result)
 
-        index = tree.index(selected_items[0])
-
-        filter_type = filter_var.get()
-        if filter_type == "all":
-            filter_type = None
+    tree.configure(yscrollcommand=on_tree_scroll)
 
-        search_query = search_var.get()
-        if search_query:
-            history_entries = app.history.search_history(search_query)
-        else:
-            history_entries = app.history.get_history(filter_type=filter_type)
+    def selected_entry():
+        """選択中の行のエントリ（IDから全文を取得）"""
+        selected_items = tree.selection()
+        if not selected_items or selected_items[0] not in row_by_item:
+            return None
+        return model.get_entry(row_by_item[selected_items[0]])
 
-        if index >= len(history_entries):
+    def show_detail(event):
+        """詳細を表示"""
+        entry = selected_entry()
+        if entry is None:
             return
 
-        entry = history_entries[index]
-
         detail_text.config(state=tk.NORMAL)
         detail_text.delete(1.0, tk.END)
         detail_text.insert(tk.END, f"【翻訳タイプ】: {entry['translation_type']}\n")
         detail_text.insert(tk.END, f"【時間】: {entry['timestamp']}\n")
         detail_text.insert(tk.END, f"【原文 ({entry['source_lang']})】: {entry['original_text']}\n")
         detail_text.insert(tk.END, f"【翻訳 ({entry['target_lang']})】: {entry['translated_text']}\n")
+
+        # 検索語を強調
+        query = search_var.get()
+        if query:
+            start = '1.0'
+            while True:
+                start = detail_text.search(query, start, stopindex=tk.END, nocase=True)
+                if not start:
+                    break
+                end = f"{start}+{len(query)}c"
+                detail_text.tag_add('match', start, end)
+                start = end
         detail_text.config(state=tk.DISABLED)
 
-    def on_search_filter_change(*args):
+    def on_search_change(*args):
+        """入力が止まってから検索する（デバウンス）"""
+        if search_state['after_id'] is not None:
+            history_window.after_cancel(search_state['after_id'])
+        search_state['after_id'] = history_window.after(SEARCH_DEBOUNCE_MS, load_history_to_tree)
+
+    def on_filter_change(*args):
+        if search_state['after_id'] is not None:
+            history_window.after_cancel(search_state['after_id'])
         load_history_to_tree()
 
-    search_var.trace_add("write", on_search_filter_change)
-    filter_var.trace_add("write", on_search_filter_change)
+    search_var.trace_add("write", on_search_change)
+    filter_var.trace_add("write", on_filter_change)
+
+    def on_destroy(event):
+        if event.widget is history_window:
+            runner.close()
+
+    history_window.bind('<Destroy>', on_destroy)
 
     tree.bind('<<TreeviewSelect>>', show_detail)
 
     def reuse_selected():
         """選択された翻訳を再利用"""
-        selected_items = tree.selection()
-        if not selected_items:
-            return
-
-        index = tree.index(selected_items[0])
-
-        filter_type = filter_var.get()
-        if filter_type == "all":
-            filter_type = None
-
-        search_query = search_var.get()
-        if search_query:
-            history_entries = app.history.search_history(search_query)
-        else:
-            history_entries = app.history.get_history(filter_type=filter_type)
-
-        if index >= len(history_entries):
+        entry = selected_entry()
+        if entry is None:
             return
 
-        entry = history_entries[index]
         app.clipboard_clear()
         app.clipboard_append(entry['translated_text'])
         app.update_status('text_copied')
@@ -176,28 +253,11 @@ def show_history_dialog(app):
 
     def delete_selected():
         """選択を削除"""
-        selected_items = tree.selection()
-        if not selected_items:
-            return
-
-        index = tree.index(selected_items[0])
-
-        filter_type = filter_var.get()
-        if filter_type == "all":
-            filter_type = None
-
-        search_query = search_var.get()
-        if search_query:
-            history_entries = app.history.search_history(search_query)
-        else:
-            history_entries = app.history.get_history(filter_type=filter_type)
-
-        if index >= len(history_entries):
+        entry = selected_entry()
+        if entry is None:
             return
 
-        entry = history_entries[index]
-        app.history.history.remove(entry)
-        app.history.save_history()
+        app.history.delete_entry(entry)
         load_history_to_tree()
 
     def clear_all_history():
@@ -14,10 +14,16 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.constants import MESSAGES, VERSION, APP_TITLE, get_message as const_get_message
 from config.settings import config, load_config
-from core.dictionary import init_dictionaries, close_dictionary
+from core.dictionary import (
+    init_dictionaries, close_dictionary, needs_dictionary_import, start_background_import
+)
 from core.text_to_speech import TextToSpeechHandler
 from core.history import TranslationHistory
-from core.tutor import TutorChatHandler
+from core.translation import prewarm_connections, close_sessions
+from core.network import monitor as connectivity_monitor
+from core.translation_cache import TranslationCache
+from core.translation_memory import TranslationMemory
+from core.tutor import TutorChatHandler, start_tokenizer_warmup
 from .services.clipboard_service import ClipboardService
 from .services.window_service import WindowService
 from .services.hotkey_service import HotkeyService
@@ -98,14 +104,20 @@ class TranslationApp(tk.Tk):
             history_manager=self.history,
             on_log=self.log_message,
             on_status=self.update_status,
-            get_message=self.get_message
+            get_message=self.get_message,
+            translation_cache=self.translation_cache,
+            translation_memory=self.translation_memory
         )
         self.dictionary_controller = DictionaryController(
             clipboard_service=self.clipboard,
             history_manager=self.history,
             on_log=self.log_message,
             on_status=self.update_status,
-            get_message=self.get_message
+            get_message=self.get_message,
+            translation_cache=self.translation_cache,
+            on_stream_start=self.text_display.begin_stream,
+            on_stream_delta=self.text_display.append_stream,
+            on_stream_end=self.text_display.end_stream
         )
         self.speech_controller = SpeechController(
             clipboard_service=self.clipboard,
@@ -118,7 +130,11 @@ class TranslationApp(tk.Tk):
             tutor_handler=self.tutor_handler,
             on_log_tutor=self.log_tutor_message,
             on_status=self.update_status,
-            on_status_text=self.status_bar.set_text
+            on_status_text=self.status_bar.set_text,
+            on_stream_start=self.text_display.begin_stream,
+            on_stream_delta=self.text_display.append_stream,
+            on_stream_end=self.text_display.end_stream,
+            get_ai_label=lambda: self.get_message('tutor_ai_label')
         )
 
         # ウィンドウの閉じるボタン押下時の処理を設定
@@ -133,15 +149,33 @@ class TranslationApp(tk.Tk):
 
         self.log_message(self.get_message('script_running'))
 
+        # 初回起動時の辞書インポートはウィンドウ表示後にバックグラウンドで実行
+        self.after(100, self.start_dictionary_import)
+        # 家庭教師モードの形態素解析（Janome）もウィンドウ表示後にバックグラウンドで読み込む
+        self.after(200, start_tokenizer_warmup)
+        # APIサーバーへの接続（DNS・TCP・TLS）を張っておき、最初のホットキーの待ち時間を減らす
+        self.after(300, prewarm_connections)
+        # 接続状態の定期確認（ホットキーのたびには確認しない）
+        self.after(300, connectivity_monitor.start)
+        # 翻訳メモリの索引も先に作っておく（作成中の翻訳はあいまい一致を使わない）
+        self.after(400, lambda: threading.Thread(
+            target=self.translation_memory.sync, args=(self.history,),
+            name="translation-memory-sync", daemon=True).start())
+
     def init_dictionary(self):
         """辞書機能を初期化する"""
         try:
             # dataディレクトリのパスを取得
             app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            data_dir = os.path.join(app_dir, 'data')
+            self.data_dir = os.path.join(app_dir, 'data')
 
-            # SQLiteモードで辞書を初期化
-            init_dictionaries(data_dir, use_sqlite=True)
+            # SQLiteモードで辞書を初期化（インポートは start_dictionary_import で実行）
+            init_dictionaries(self.data_dir, use_sqlite=True, defer_import=True)
+
+            from core import dictionary_db
+            dictionary_db.set_lookup_cache_size(
+                config.getint('Settings', 'dictionary_cache_size', fallback=1024)
+            )
 
             # 辞書サイズを取得
             from core.dictionary import get_dictionary_size
@@ -152,11 +186,45 @@ class TranslationApp(tk.Tk):
             print(f"辞書機能の初期化に失敗しました: {e}")
             self.dictionary_size = 0
 
+    def start_dictionary_import(self):
+        """初回起動時の辞書インポートをバックグラウンドで開始する"""
+        data_dir = getattr(self, 'data_dir', None)
+        if not data_dir or not needs_dictionary_import(data_dir):
+            return
+
+        def on_progress(event):
+            source = event['source']
+            if event['rows']:
+                source = f"{source} {event['rows']:,}"
+            text = self.get_message('dict_import_progress', source=source,
+                                    current=event['current'], total=event['total'])
+            self.after(0, lambda: self.status_bar.set_text(text))
+
+        def on_complete(total):
+            self.after(0, lambda: self._on_dictionary_import_complete(total))
+
+        start_background_import(data_dir, on_progress=on_progress, on_complete=on_complete)
+
+    def _on_dictionary_import_complete(self, total):
+        """辞書インポート完了時の処理（Tkスレッドで実行）"""
+        from core.dictionary import get_dictionary_size
+        self.dictionary_size = get_dictionary_size().get('total', 0)
+        self.update_status('dict_import_complete', words=f"{self.dictionary_size:,}")
+        print(f"辞書機能を初期化しました: {self.dictionary_size}単語")
+
     def init_history(self):
-        """翻訳履歴機能を初期化する"""
+        """翻訳履歴機能と翻訳キャッシュを初期化する"""
         self.history = TranslationHistory(self)
         print("翻訳履歴機能を初期化しました")
 
+        self.translation_cache = TranslationCache(
+            ttl_days=config.getfloat('Settings', 'translation_cache_ttl_days', fallback=30),
+            max_entries=config.getint('Settings', 'translation_cache_max_entries', fallback=5000)
+        )
+        self.translation_memory = TranslationMemory(
+            threshold=config.getfloat('Settings', 'translation_memory_threshold', fallback=0.95)
+        )
+
     def init_speech_handler(self):
         """音声出力ハンドラーを初期化する"""
         try:
@@ -418,6 +486,22 @@ class TranslationApp(tk.Tk):
             except Exception as e:
                 print(f"音声出力ハンドラークリーンアップエラー: {e}")
 
+        # 履歴の書き込みキューを書き切る（辞書データベースを閉じる前に行う）
+        if hasattr(self, 'history'):
+            try:
+                self.history.close()
+            except Exception as e:
+                print(f"履歴終了エラー: {e}")
+
+        if hasattr(self, 'translation_cache'):
+            try:
+                self.translation_cache.close()
+            except Exception as e:
+                print(f"翻訳キャッシュ終了エラー: {e}")
+
+        close_sessions()
+        connectivity_monitor.stop()
+
         # 辞書データベースを閉じる
         try:
             close_dictionary()